@@ -0,0 +1,236 @@
+# account_pool.py
+import os
+import json
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+from conf.metrics import RATE_LIMIT_WAITING
+
+
+@dataclass
+class Account:
+    """Chrome 프로필 하나에 대응하는 ChatGPT 계정과 사용량 한도
+
+    한도는 window_seconds 길이의 슬라이딩 윈도우 안에서 보낸 메시지/이미지 수로 센다.
+    """
+    name: str
+    user_data_dir: str
+    debug_port: int
+    message_limit: int = 40
+    image_limit: int = 20
+    window_seconds: float = 3 * 3600
+    # 사용 한도 메시지를 받은 뒤 쉬는 시간 (None이면 window_seconds)
+    cooldown_seconds: Optional[float] = None
+    message_times: Deque[float] = field(default_factory=deque)
+    image_times: Deque[float] = field(default_factory=deque)
+    parked_until: float = 0.0
+
+    def _expire(self, now: float):
+        cutoff = now - self.window_seconds
+        for times in (self.message_times, self.image_times):
+            while times and times[0] <= cutoff:
+                times.popleft()
+
+    def remaining(self, prompt_type: str, now: Optional[float] = None) -> int:
+        """지금 보낼 수 있는 남은 횟수 (이미지 프롬프트는 이미지 한도도 적용)"""
+        now = now or time.time()
+        if self.parked_until > now:
+            return 0
+
+        self._expire(now)
+        remaining = self.message_limit - len(self.message_times)
+        if prompt_type == 'image':
+            remaining = min(remaining, self.image_limit - len(self.image_times))
+        return max(remaining, 0)
+
+    def available_at(self, prompt_type: str) -> float:
+        """다시 보낼 수 있게 되는 시각"""
+        candidates = [self.parked_until]
+        if len(self.message_times) >= self.message_limit:
+            candidates.append(self.message_times[0] + self.window_seconds)
+        if prompt_type == 'image' and len(self.image_times) >= self.image_limit:
+            candidates.append(self.image_times[0] + self.window_seconds)
+        return max(candidates)
+
+    def record(self, prompt_type: str, now: Optional[float] = None):
+        now = now or time.time()
+        self.message_times.append(now)
+        if prompt_type == 'image':
+            self.image_times.append(now)
+
+    def park(self, now: Optional[float] = None):
+        """사용 한도에 걸린 계정을 쿨다운이 끝날 때까지 제외"""
+        now = now or time.time()
+        cooldown = self.cooldown_seconds if self.cooldown_seconds is not None else self.window_seconds
+        self.parked_until = max(self.parked_until, now + cooldown)
+
+
+class AccountPool:
+    """여러 계정에 프롬프트를 나눠 보내는 계정 풀
+
+    남은 한도가 가장 많은 계정을 고르고, 모든 계정이 소진되면 가장 먼저 풀리는
+    계정을 기다린다. 사용 기록은 state_path에 저장해 다음 실행에서도 이어서 센다.
+    """
+
+    def __init__(self, accounts: List[Account], state_path: Optional[str] = None):
+        if not accounts:
+            raise ValueError("계정 풀에 계정이 없습니다.")
+
+        self.accounts = accounts
+        self.state_path = state_path
+        if state_path:
+            self._load_state()
+
+    def select(self, prompt_type: str) -> Optional[Account]:
+        """남은 한도가 가장 많은 계정 (모두 소진되었으면 None)"""
+        now = time.time()
+        best = max(self.accounts, key=lambda account: account.remaining(prompt_type, now))
+        return best if best.remaining(prompt_type, now) > 0 else None
+
+    def acquire(self, prompt_type: str) -> Account:
+        """보낼 수 있는 계정이 생길 때까지 기다렸다가 반환"""
+        while True:
+            account = self.select(prompt_type)
+            if account:
+                return account
+
+            resume_at = min(account.available_at(prompt_type) for account in self.accounts)
+            wait = max(resume_at - time.time(), 1.0)
+            logging.warning("모든 계정의 사용 한도가 소진되어 %.0f초 대기합니다.", wait)
+            RATE_LIMIT_WAITING.set(1)
+            try:
+                time.sleep(wait)
+            finally:
+                RATE_LIMIT_WAITING.set(0)
+
+    def record(self, account: Account, prompt_type: str):
+        account.record(prompt_type)
+        self._save_state()
+
+    def park(self, account: Account):
+        account.park()
+        logging.warning("계정 %s 사용 한도 도달: %s까지 제외합니다.",
+                        account.name, time.strftime('%H:%M:%S', time.localtime(account.parked_until)))
+        self._save_state()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """계정별 남은 한도 (결과 보고용)"""
+        now = time.time()
+        return [{
+            'name': account.name,
+            'messages_remaining': account.remaining('text', now),
+            'images_remaining': account.remaining('image', now),
+            'parked_until': account.parked_until if account.parked_until > now else None
+        } for account in self.accounts]
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return
+
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception as e:
+            logging.warning(f"계정 사용 기록 읽기 실패: {str(e)}")
+            return
+
+        for account in self.accounts:
+            saved = state.get(account.name)
+            if saved:
+                account.message_times = deque(saved.get('message_times', []))
+                account.image_times = deque(saved.get('image_times', []))
+                account.parked_until = saved.get('parked_until', 0.0)
+
+    def _save_state(self):
+        """이 풀의 계정 사용 기록을 저장 (다른 작업 노드가 맡은 계정의 기록은 유지)"""
+        if not self.state_path:
+            return
+
+        with self._state_lock():
+            state = {}
+            if os.path.exists(self.state_path):
+                try:
+                    with open(self.state_path, 'r', encoding='utf-8') as f:
+                        state = json.load(f)
+                except Exception as e:
+                    logging.warning(f"계정 사용 기록 읽기 실패: {str(e)}")
+
+            state.update({account.name: {
+                'message_times': list(account.message_times),
+                'image_times': list(account.image_times),
+                'parked_until': account.parked_until
+            } for account in self.accounts})
+
+            tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+
+    @contextmanager
+    def _state_lock(self, timeout: float = 10.0):
+        """여러 작업 노드가 같은 기록 파일을 갱신할 때 쓰는 잠금 파일
+
+        잠금을 잡은 프로세스가 비정상 종료해 timeout이 지나도 풀리지 않으면 잠금을 깨고 진행한다.
+        """
+        lock_path = f"{self.state_path}.lock"
+        deadline = time.time() + timeout
+        while True:
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                if time.time() > deadline:
+                    logging.warning(f"오래된 잠금 파일을 제거합니다: {lock_path}")
+                    try:
+                        os.remove(lock_path)
+                    except FileNotFoundError:
+                        pass
+                    deadline = time.time() + timeout
+                time.sleep(0.05)
+
+        try:
+            yield
+        finally:
+            os.close(fd)
+            try:
+                os.remove(lock_path)
+            except FileNotFoundError:
+                pass
+
+
+def load_accounts(path: str) -> List[Account]:
+    """계정 목록 JSON 파일 읽기
+
+    파일 형식: [{"name": ..., "user_data_dir": ..., "debug_port": ..., "message_limit": ..., ...}, ...]
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+
+    accounts = [Account(**entry) for entry in entries]
+    names = [account.name for account in accounts]
+    if len(set(names)) != len(names):
+        raise ValueError("계정 이름이 중복되었습니다.")
+
+    ports = [account.debug_port for account in accounts]
+    if len(set(ports)) != len(ports):
+        raise ValueError("계정마다 디버그 포트가 달라야 합니다.")
+
+    return accounts
+
+
+def load_account_pool(path: str, shard_index: int = 0, shard_count: int = 1) -> AccountPool:
+    """계정 목록 JSON 파일로 계정 풀 생성
+
+    작업 노드가 여러 개면 계정을 shard_count개로 나눠 shard_index번째 몫만 사용하므로
+    노드끼리 같은 Chrome 프로필이나 디버그 포트를 쓰지 않는다.
+    사용 기록은 같은 위치의 <파일명>.state.json에 저장된다.
+    """
+    accounts = load_accounts(path)[shard_index::shard_count]
+    if not accounts:
+        raise ValueError(f"작업 노드 {shard_index}에 배정할 계정이 없습니다 (계정 수보다 작업 노드가 많음).")
+
+    return AccountPool(accounts, state_path=f"{os.path.splitext(path)[0]}.state.json")
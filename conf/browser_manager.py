@@ -127,6 +127,38 @@ class BrowserManager:
             logging.error(f"브라우저 연결 실패: {str(e)}")
             raise
 
+    def get_tab_memory_mb(self) -> Optional[float]:
+        """현재 탭의 JS 힙 사용량(MB) - CDP Performance.getMetrics 사용"""
+        if not self.driver:
+            return None
+
+        try:
+            self.driver.execute_cdp_cmd('Performance.enable', {})
+            metrics = self.driver.execute_cdp_cmd('Performance.getMetrics', {})
+            values = {metric['name']: metric['value'] for metric in metrics.get('metrics', [])}
+            heap_used = values.get('JSHeapUsedSize')
+            return heap_used / (1024 * 1024) if heap_used is not None else None
+
+        except Exception as e:
+            logging.debug("탭 메모리 확인 실패: %s", e)
+            return None
+
+    def recycle_tab(self):
+        """새 탭에서 ChatGPT를 열고 기존 탭을 닫아 탭 메모리 해제"""
+        if not self.driver:
+            raise RuntimeError("WebDriver가 설정되지 않았습니다.")
+
+        old_handle = self.driver.current_window_handle
+        self.driver.switch_to.new_window('tab')
+        new_handle = self.driver.current_window_handle
+
+        self.driver.switch_to.window(old_handle)
+        self.driver.close()
+        self.driver.switch_to.window(new_handle)
+
+        self.navigate_to_chatgpt()
+        logging.info("브라우저 탭을 새로 열었습니다.")
+
     def close_browser(self):
         """브라우저 종료"""
         try:
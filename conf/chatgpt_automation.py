@@ -1,56 +1,155 @@
 # chatgpt_automation.py
+import os
+import json
 import time
+import shutil
+import socket
 import logging
+from collections import deque
+from dataclasses import replace
 from typing import Dict, Any, Optional
 
 from config import Config
-from conf.browser_manager import BrowserManager
-# from image_downloader import ImageDownloader
-from excel_handler import ExcelHandler
-from chatgpt_interface import ChatGPTInterface
+from conf.prompt_type import detect_prompt_type
+from conf.job_store import JobStore, LeaseHeartbeat
+from conf.progress import ProgressReporter
+from conf.startup import seconds_since_process_start
+from conf.run_journal import RunJournal
+from conf.latency_history import LatencyHistory, RunningStats
+from conf.account_pool import Account, load_account_pool
+from conf.prompt_packing import is_packable, make_pack, split_packed_response
+from conf.logging_setup import setup_logging, log_context
+from conf.retry import (
+    RetryQueue, FailureClass, DEFAULT_RETRY_POLICIES, classify_failure, call_with_retry
+)
+from conf.metrics import (
+    MetricsServer, PROMPTS_SUCCEEDED, PROMPTS_FAILED, REQUEST_INTERVAL, RATE_LIMIT_WAITING, ACTIVE_SESSIONS,
+    STARTUP_SECONDS
+)
 
 
 class ChatGPTAutomation:
     """모든 기능을 통합하는 메인 클래스"""
 
-    def __init__(self, excel_path: str, config: Optional[Config] = None):
+    def __init__(self, excel_path: Optional[str], config: Optional[Config] = None):
         self.config = config or Config()
-        self.excel_handler = ExcelHandler(excel_path)
 
-        # 컴포넌트 초기화
-        self.browser_manager = BrowserManager(self.config)
+        # 작업 노드(run_worker)는 Excel 파일 없이 공유 작업 큐만으로 실행할 수 있다
+        # (pandas를 쓰는 모듈은 Excel 파일이 있을 때만 불러옴)
+        self.excel_handler = None
+        self.result_sink = None
+        # 디렉토리나 glob 패턴이면 여러 파일의 모든 시트를 하나의 작업으로 처리
+        self.workbook_batch = False
+        if excel_path:
+            from conf.excel_handler import ExcelHandler
+            from conf.result_sink import ResultSink
+            from conf.prompt_template import load_prompt_template
+            from conf.workbook_batch import WorkbookSet, MultiSheetResultSink, is_workbook_batch
+
+            self.workbook_batch = is_workbook_batch(excel_path)
+
+        if excel_path and self.workbook_batch:
+            if self.config.watch:
+                # 여러 파일 작업은 추가되는 행을 감지하지 않으므로 감시 모드가 끝나지 않음
+                raise ValueError("여러 파일 작업은 감시 모드(--watch)를 지원하지 않습니다.")
+            if self.config.result_output != 'excel':
+                # 결과는 파일/시트별로 원래 시트에 기록하며 CSV/Parquet 사이드 파일은 지원하지 않음
+                raise ValueError(f"여러 파일 작업은 결과 출력 형식 '{self.config.result_output}'을(를) 지원하지 않습니다 "
+                                 "(원본 시트에만 기록).")
+            self.excel_handler = WorkbookSet(excel_path, load_prompt_template(self.config), self.config.parse_workers)
+            self.result_sink = MultiSheetResultSink(self.excel_handler, flush_every=self.config.result_flush_every)
+        elif excel_path:
+            self.excel_handler = ExcelHandler(excel_path, load_prompt_template(self.config))
+            output_format = self.config.result_output
+            if self.config.watch and output_format == 'excel':
+                # 감시 중인 원본을 다시 쓰면 그사이 추가된 행이 사라지고 파일 변경으로 감지되므로
+                # 결과는 원본 옆 CSV 파일에 기록
+                output_format = 'csv'
+            self.result_sink = ResultSink(
+                self.excel_handler,
+                output_format=output_format,
+                output_dir=self.config.result_output_dir,
+                flush_every=self.config.result_flush_every
+            )
+
+        # 브라우저 관련 컴포넌트는 initialize()에서 생성 (selenium/requests/PIL도 그때 불러옴)
+        self.browser_manager = None
         self.driver = None
-        # self.image_downloader = None
+        self.image_downloader = None
         self.chatgpt_interface = None
+        # 실패 유형별 재시도 정책
+        self.retry_policies = dict(DEFAULT_RETRY_POLICIES)
+        # 로그에 붙일 세션 식별자 (작업 노드 ID 또는 디버그 포트)
+        self.session_id = self.config.worker_id or f"port-{self.config.debug_port}"
+        # 프로세스 시작부터 첫 프롬프트 전송까지 걸린 시간 (초)
+        self.startup_seconds: Optional[float] = None
+
+        # 계정 풀 (선택): 계정마다 브라우저 세션을 따로 열고 프롬프트마다 전환
+        self.base_config = self.config
+        self.account_pool = None
+        if self.config.accounts_path:
+            self.account_pool = load_account_pool(
+                self.config.accounts_path, self.config.account_shard_index, self.config.account_shard_count
+            )
+        self.active_account: Optional[Account] = None
+        self._account_sessions: Dict[str, tuple] = {}
+        if self.account_pool:
+            # 사용 한도는 계정 풀이 계정 단위로 쉬게 하므로 다른 계정까지 멈추지 않음
+            self.retry_policies[FailureClass.RATE_LIMITED] = replace(
+                self.retry_policies[FailureClass.RATE_LIMITED], pause_all=False, base_delay=5, max_delay=60
+            )
 
         # 로깅 설정
         self._setup_logging()
+        if self.result_sink and self.config.watch and self.config.result_output == 'excel':
+            logging.info(f"감시 모드에서는 원본 Excel 대신 {self.result_sink.output_dir}의 CSV 파일에 결과를 기록합니다.")
+
+        # 이미지 샤드 저장 (선택): 작업 노드마다 샤드 파일 이름을 분리
+        self.image_archive = None
+        if self.config.image_output == 'archive':
+            from conf.image_archive import ImageArchive
+
+            prefix = f"images-{self.config.worker_id}" if self.config.worker_id else "images"
+            self.image_archive = ImageArchive(self.config.download_folder, self.config.archive_shard_size_mb, prefix)
+
+        # 지표 엔드포인트 (선택)
+        self.metrics_server = None
+        REQUEST_INTERVAL.set(self.config.request_interval)
+        if self.config.metrics_port:
+            self.metrics_server = MetricsServer(self.config.metrics_port)
+            self.metrics_server.start()
 
     def _setup_logging(self):
-        """로깅 설정"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('chatgpt_automation.log'),
-                logging.StreamHandler()
-            ]
+        """로깅 설정 (큐 기반 비동기 출력, 파일은 JSON 구조화 로그)"""
+        setup_logging(
+            log_file=self.config.log_file,
+            json_file=self.config.log_json,
+            repeat_interval=self.config.log_repeat_interval
         )
 
     def initialize(self):
         """시스템 초기화"""
         try:
+            from conf.browser_manager import BrowserManager
+            from conf.image_downloader import ImageDownloader
+            from conf.chatgpt_interface import ChatGPTInterface
+
             # 브라우저 연결
+            if self.browser_manager is None:
+                self.browser_manager = BrowserManager(self.config)
             self.browser_manager.connect_to_existing_browser()
             self.driver = self.browser_manager.driver
 
             # ChatGPT 페이지로 이동
             self.browser_manager.navigate_to_chatgpt()
 
-            # 컴포넌트 초기화
-            # self.image_downloader = ImageDownloader(self.config, self.driver)
+            # 컴포넌트 초기화 (이미지 검색은 인터페이스가 추적하는 최신 턴 안으로 한정)
             self.chatgpt_interface = ChatGPTInterface(self.config, self.driver)
+            self.image_downloader = ImageDownloader(
+                self.config, self.driver, turn_locator=self.chatgpt_interface.get_latest_turn_element
+            )
 
+            ACTIVE_SESSIONS.inc()
             logging.info("시스템 초기화 완료")
             return True
 
@@ -58,50 +157,190 @@ class ChatGPTAutomation:
             logging.error(f"시스템 초기화 실패: {str(e)}")
             return False
 
-    def run_automation(self) -> Dict[str, Any]:
-        """자동화 실행"""
+    def run_automation(self, progress: Optional[ProgressReporter] = None) -> Dict[str, Any]:
+        """자동화 실행
+
+        progress가 주어지면 처리 속도, ETA, 오류율을 주기적으로 출력한다.
+        Config.dry_run이면 브라우저를 열지 않고 실행 계획(plan_run)만 반환한다.
+        """
+        if self.config.dry_run:
+            return self.plan_run()
+
         results = {
             'total_prompts': 0,
             'processed_prompts': 0,
             'downloaded_images': 0,
+            'captured_responses': 0,
+            'avg_ttft': None,
+            'avg_tokens_per_sec': None,
+            'peak_rss_mb': None,
             'errors': []
         }
+        started_at = time.time()
+        bounded = self.config.memory_bounded
+        # 행마다 늘어나는 목록 대신 합계만 누적 (처리 시간은 메모리 제한 모드에서 표본만 보관)
+        ttfts = RunningStats(max_samples=0)
+        token_rates = RunningStats(max_samples=0)
+        latencies = RunningStats(max_samples=self.config.latency_sample_size if bounded else None)
+        rows_since_memory_check = 0
+        journal = None
+        latency_history = LatencyHistory(self._latency_history_path()).load()
+
+        # 메모리 제한 모드에서는 최근 오류만 유지하고 전체 결과는 저널에 기록
+        if bounded:
+            results['errors'] = deque(maxlen=self.config.max_retained_errors)
+            results['error_count'] = 0
+            journal = RunJournal(self.config.journal_path or self._default_journal_path())
+            results['journal'] = journal.path
 
         try:
-            # 시스템 초기화
-            if not self.initialize():
+            # 감시 모드: 처음 읽기 전의 파일 상태를 기준으로 이후 추가되는 행을 감지
+            if self.config.watch:
+                self.excel_handler.start_watch()
+
+            if bounded:
+                # 프롬프트를 청크 단위로 읽으며 처리 (총 개수는 시트 행 수로 추정)
+                prompts = self.excel_handler.iter_prompts()
+                results['total_prompts'] = self.excel_handler.estimate_prompt_count()
+            else:
+                # 프롬프트 데이터 로드 (브라우저 연결 전에 최종 프롬프트까지 일괄 조합)
+                prompts = self.excel_handler.get_unprocessed_prompts()
+
+            # 이어하기: 이전 실행에서 처리된 행 제외
+            processed_rows = set()
+            if self.config.resume:
+                processed_rows = self.result_sink.load_processed_rows()
+                prompts = (prompt for prompt in prompts if self._row_key(prompt) not in processed_rows)
+                if not bounded:
+                    prompts = list(prompts)
+                else:
+                    results['total_prompts'] = max(results['total_prompts'] - len(processed_rows), 0)
+                logging.info(f"이어하기: 처리 완료된 {len(processed_rows)}개 행을 건너뜁니다.")
+
+            if not bounded:
+                results['total_prompts'] = len(prompts)
+
+                if not prompts and not self.config.watch:
+                    logging.info("처리할 프롬프트가 없습니다.")
+                    return results
+
+            # 시스템 초기화 (계정 풀을 쓰면 계정별 브라우저는 처음 배정될 때 연결)
+            if not self.account_pool and not self.initialize():
                 results['errors'].append("시스템 초기화 실패")
                 return results
 
-            # 프롬프트 데이터 로드
-            prompts = self.excel_handler.get_unprocessed_prompts()
-            results['total_prompts'] = len(prompts)
+            if progress:
+                progress.start(results['total_prompts'])
 
-            if not prompts:
-                logging.info("처리할 프롬프트가 없습니다.")
-                return results
+            if self.config.watch:
+                prompts = self._watch_prompts(prompts, processed_rows, results, progress)
+            if self.config.pack_text_prompts:
+                prompts = self._pack_prompts(prompts)
+
+            # 각 프롬프트 처리 (실패한 행은 유형별 정책에 따라 큐 뒤에서 재시도)
+            retry_queue = RetryQueue(prompts, self.retry_policies)
+            finished = 0
 
-            # 각 프롬프트 처리
-            for i, prompt_data in enumerate(prompts):
+            for prompt_data, attempt in retry_queue:
+                packed_rows = prompt_data.get('packed')
                 try:
-                    result = self._process_single_prompt(prompt_data, i)
+                    if progress and attempt == 0:
+                        for _ in range(len(packed_rows) if packed_rows else 1):
+                            progress.task_started()
 
-                    if result['success']:
-                        results['processed_prompts'] += 1
-                        results['downloaded_images'] += result.get('downloaded_count', 0)
-                    else:
-                        results['errors'].append(f"프롬프트 {i + 1}: {result.get('error', '알 수 없는 오류')}")
+                    prompt_started_at = time.time()
+                    account = self._dispatch_account(prompt_data) if self.account_pool else None
+                    with log_context(prompt_id=prompt_data['row_index'], session_id=self.session_id):
+                        if packed_rows:
+                            result, row_results, missing = self._process_packed_prompts(prompt_data)
+                        else:
+                            result = self._process_single_prompt(prompt_data, finished)
+                            row_results, missing = [(prompt_data, result)], []
+                        if account:
+                            self._record_account_usage(account, result)
+
+                        # 묶음 전송 실패도 실패 유형별 정책으로 묶음 전체를 재시도
+                        if not result['success'] and \
+                                self._schedule_retry(retry_queue, prompt_data, result, attempt):
+                            continue
+
+                        if packed_rows and not result['success']:
+                            # 재시도 한도를 넘은 묶음은 모든 행을 같은 오류로 실패 처리
+                            row_results = [(row, result) for row in missing]
+                        elif missing:
+                            # 답변 구역을 찾지 못한 행은 개별 전송 (진행 상황에는 이미 시작된 행으로 집계됨)
+                            logging.warning(f"묶음 응답에서 {len(missing)}개 항목의 답변을 찾지 못해 개별 전송합니다.")
+                            for row in missing:
+                                retry_queue.push(row, attempt=attempt + 1)
+
+                    retry_queue.done(prompt_data)
+                    prompt_latency = (time.time() - prompt_started_at) / max(len(row_results), 1)
+
+                    for row_data, row_result in row_results:
+                        finished += 1
+                        self._record_result(row_data, row_result)
+                        self._count_result(row_result)
+                        if journal:
+                            self._journal_result(journal, row_data, row_result)
+
+                        if row_result['success'] and row_result.get('prompt_type'):
+                            latency_history.record(row_result['prompt_type'], prompt_latency)
+                        if self.config.benchmark:
+                            latencies.add(prompt_latency)
+                        if progress:
+                            progress.task_finished(row_result['success'])
+
+                        stream_stats = row_result.get('stream')
+                        if stream_stats:
+                            results['captured_responses'] += 1
+                            if stream_stats['ttft'] is not None:
+                                ttfts.add(stream_stats['ttft'])
+                            if stream_stats['tokens_per_sec'] is not None:
+                                token_rates.add(stream_stats['tokens_per_sec'])
+
+                        if row_result['success']:
+                            results['processed_prompts'] += 1
+                            results['downloaded_images'] += row_result.get('downloaded_count', 0)
+                        else:
+                            self._append_error(results, f"행 {row_data['row_index']}: {row_result.get('error', '알 수 없는 오류')}")
 
                     # 진행 상황 로깅
-                    logging.info(f"진행 상황: {i + 1}/{len(prompts)} 완료")
+                    logging.info(f"진행 상황: {finished}/{results['total_prompts']} 완료")
 
-                    # 요청 간격 조절
-                    time.sleep(3)
+                    self._update_peak_rss(results)
+                    # 묶음 전송은 한 번에 여러 행이 끝나므로 나머지 연산 대신 마지막 확인 이후 행 수로 판단
+                    rows_since_memory_check += len(row_results)
+                    if bounded and rows_since_memory_check >= self.config.memory_check_every:
+                        rows_since_memory_check = 0
+                        self._check_tab_memory()
 
                 except Exception as e:
-                    error_msg = f"프롬프트 {i + 1} 처리 중 오류: {str(e)}"
+                    error_msg = f"행 {prompt_data['row_index']} 처리 중 오류: {str(e)}"
                     logging.error(error_msg)
-                    results['errors'].append(error_msg)
+                    self._append_error(results, error_msg)
+                    for _ in range(len(packed_rows) if packed_rows else 1):
+                        finished += 1
+                        if progress:
+                            progress.task_finished(False)
+
+                finally:
+                    # 요청 간격 조절
+                    if retry_queue.has_pending():
+                        self._wait_request_interval()
+
+            if bounded:
+                # 추정치 대신 실제로 처리한 행 수로 보정
+                results['total_prompts'] = finished
+
+            if self.config.benchmark:
+                results['benchmark'] = self._summarize_latencies(latencies, time.time() - started_at)
+                results['benchmark']['startup_seconds'] = self.startup_seconds
+
+            if self.account_pool:
+                results['accounts'] = self.account_pool.snapshot()
+
+            results['avg_ttft'] = ttfts.mean
+            results['avg_tokens_per_sec'] = token_rates.mean
 
             logging.info(f"자동화 완료: {results['processed_prompts']}/{results['total_prompts']} 처리됨")
             return results
@@ -109,41 +348,207 @@ class ChatGPTAutomation:
         except Exception as e:
             error_msg = f"자동화 실행 중 오류: {str(e)}"
             logging.error(error_msg)
-            results['errors'].append(error_msg)
+            self._append_error(results, error_msg)
             return results
 
+        finally:
+            if progress:
+                progress.stop()
+            self._flush_results(results)
+            self._update_peak_rss(results)
+            try:
+                latency_history.save()
+            except Exception as e:
+                logging.warning(f"처리 시간 이력 저장 실패: {str(e)}")
+            if journal:
+                journal.close()
+                results['errors'] = list(results['errors'])
+
+    def _watch_prompts(self, prompts, processed_rows, results: Dict[str, Any],
+                       progress: Optional[ProgressReporter] = None):
+        """처음 읽은 프롬프트를 내보낸 뒤, 시트에 추가되는 행을 주기적으로 확인해 이어서 내보냄
+
+        새 행이 없으면 None을 내보내 재시도 대기 중인 행이 먼저 처리되게 한다.
+        """
+        last_row_index = 0
+        for prompt in prompts:
+            last_row_index = max(last_row_index, prompt['row_index'])
+            yield prompt
+
+        logging.info("감시 모드: 시트에 추가되는 행을 기다립니다.")
+        idle_since = time.time()
+
+        while True:
+            appended = [
+                prompt for prompt in self.excel_handler.read_appended_prompts(last_row_index)
+                if self._row_key(prompt) not in processed_rows
+            ]
+
+            if appended:
+                last_row_index = max(prompt['row_index'] for prompt in appended)
+                results['total_prompts'] += len(appended)
+                if progress:
+                    progress.total += len(appended)
+                idle_since = time.time()
+                yield from appended
+                continue
+
+            timeout = self.config.watch_idle_timeout
+            if timeout is not None and time.time() - idle_since >= timeout:
+                logging.info(f"감시 모드: {timeout:.0f}초 동안 추가된 행이 없어 종료합니다.")
+                return
+
+            time.sleep(self.config.watch_poll_interval)
+            yield None
+
+    def _pack_prompts(self, prompts):
+        """연속된 짧은 텍스트 프롬프트를 pack_size개씩 묶음 항목으로 합침
+
+        묶을 수 없는 프롬프트나 감시 모드의 대기 신호(None)가 오면 모아 둔 묶음을 먼저 내보낸다.
+        """
+        batch = []
+        for prompt in prompts:
+            if prompt is not None and is_packable(prompt['full_prompt'], self.config.pack_max_chars):
+                batch.append(prompt)
+                if len(batch) >= self.config.pack_size:
+                    yield make_pack(batch) if len(batch) > 1 else batch[0]
+                    batch = []
+                continue
+
+            if batch:
+                yield make_pack(batch) if len(batch) > 1 else batch[0]
+                batch = []
+            yield prompt
+
+        if batch:
+            yield make_pack(batch) if len(batch) > 1 else batch[0]
+
+    def _process_packed_prompts(self, pack: Dict[str, Any]):
+        """묶음 메시지를 한 번 전송하고 응답을 행별 결과로 나눔
+
+        (전송 결과, [(행, 결과), ...], 답변을 찾지 못한 행 목록)을 반환한다. 전송에 실패하면
+        모든 행이 답변을 찾지 못한 행이 되며, 재시도 여부는 호출하는 쪽이 전송 결과로 판단한다.
+        """
+        rows = pack['packed']
+        sections = {}
+
+        try:
+            if self.startup_seconds is None:
+                self._record_startup()
+            logging.info(f"{len(rows)}개 프롬프트를 묶어 전송합니다.")
+            send_result = self.chatgpt_interface.send_prompt_to_chatgpt(pack['full_prompt'])
+
+            if send_result['success']:
+                sections = split_packed_response(self.chatgpt_interface.get_latest_response() or '', len(rows))
+            else:
+                logging.warning(f"묶음 전송 실패: {send_result.get('error')}")
+
+        except Exception as e:
+            logging.error(f"묶음 전송 중 오류: {str(e)}")
+            send_result = {'success': False, 'prompt_type': 'text', 'error': str(e), 'failure': classify_failure(e)}
+
+        row_results = []
+        missing = []
+        for number, row in enumerate(rows, 1):
+            text = sections.get(number)
+            if text is None:
+                missing.append(row)
+                continue
+
+            os.makedirs(self.config.response_folder, exist_ok=True)
+            response_path = self._response_path(row)
+            with open(response_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+
+            row_results.append((row, {
+                'success': True,
+                'downloaded_count': 0,
+                'download_time': '',
+                'images': [],
+                'duplicates': [],
+                'prompt_type': 'text',
+                'response_path': response_path,
+                'stream': None,
+                'error': None,
+                'failure': None
+            }))
+
+        return send_result, row_results, missing
+
     def _process_single_prompt(self, prompt_data: Dict[str, Any], index: int) -> Dict[str, Any]:
         """단일 프롬프트 처리"""
         result = {
             'success': False,
             'downloaded_count': 0,
-            'error': None
+            'download_time': '',
+            'images': [],
+            'duplicates': [],
+            'prompt_type': None,
+            'stream': None,
+            'error': None,
+            'failure': None
         }
 
         try:
             # 프롬프트 조합
-            full_prompt = self.excel_handler.combine_prompt_elements(prompt_data)
+            full_prompt = prompt_data.get('full_prompt') or self.excel_handler.combine_prompt_elements(prompt_data)
             logging.info(f"처리 중: {full_prompt[:100]}...")
 
+            # 스트리밍 모드인 경우 프롬프트별 응답 파일 경로 지정
+            stream_path = None
+            if self.config.stream_responses:
+                stream_path = self._response_path(prompt_data)
+
             # ChatGPT에 프롬프트 전송
-            send_result = self.chatgpt_interface.send_prompt_to_chatgpt(full_prompt)
+            if self.startup_seconds is None:
+                self._record_startup()
+            send_result = self.chatgpt_interface.send_prompt_to_chatgpt(full_prompt, stream_path)
+
+            stream_stats = send_result.get('stream')
+            if stream_stats:
+                result['stream'] = stream_stats
+                if stream_stats['ttft'] is not None:
+                    logging.info(f"응답 스트림 기록: {stream_stats['path']} "
+                                 f"(TTFT {stream_stats['ttft']:.2f}s, "
+                                 f"{stream_stats['tokens_per_sec'] or 0:.1f} tokens/s)")
 
+            result['prompt_type'] = send_result['prompt_type']
             if not send_result['success']:
                 result['error'] = send_result.get('error', '프롬프트 전송 실패')
+                result['failure'] = send_result.get('failure')
                 return result
 
-            # # 이미지 타입 프롬프트인 경우 이미지 다운로드
-            # if send_result['prompt_type'] == 'image' and send_result['has_images']:
-            #     downloaded_count = self.image_downloader.download_generated_images(full_prompt)
-            #     result['downloaded_count'] = downloaded_count
-            #
-            #     if downloaded_count > 0:
-            #         logging.info(f"{downloaded_count}개의 이미지를 다운로드했습니다.")
-            #     else:
-            #         logging.warning("이미지를 다운로드하지 못했습니다.")
+            # 이미지 타입 프롬프트인 경우 최신 턴의 이미지만 다운로드
+            if send_result['prompt_type'] == 'image' and send_result['has_images']:
+                # 다운로드 실패는 이미지가 남아 있는 현재 턴 안에서 백오프하며 재시도
+                downloaded_count = call_with_retry(
+                    lambda: self.image_downloader.download_generated_images(
+                        full_prompt, self.chatgpt_interface.find_turn_images()
+                    ),
+                    self.retry_policies[FailureClass.DOWNLOAD_FAILED]
+                )
+                # 중복으로 건너뛴 이미지는 다운로드 수에서 제외하고 따로 기록
+                result['images'] = list(self.image_downloader.last_downloaded_files)
+                result['downloaded_count'] = len(result['images'])
+                result['duplicates'] = list(self.image_downloader.last_duplicate_files)
+
+                if downloaded_count > 0:
+                    logging.info(f"{result['downloaded_count']}개의 이미지를 다운로드했습니다.")
+                else:
+                    logging.warning("이미지를 다운로드하지 못했습니다.")
+                    result['error'] = "이미지 다운로드 실패"
+                    result['failure'] = FailureClass.DOWNLOAD_FAILED
+                    return result
+
+            if result['downloaded_count']:
+                result['download_time'] = time.strftime('%Y-%m-%d %H:%M:%S')
 
-            # Excel 처리 상태 업데이트
-            self.excel_handler.update_processed_status(index)
+                # 샤드 저장 모드면 개별 파일을 샤드로 옮기고 '샤드/파일명' 참조로 기록
+                if self.image_archive:
+                    result['images'] = self.image_archive.add_files(
+                        prompt_data['row_index'], result['images'],
+                        source=self._archive_source(prompt_data), sheet=prompt_data.get('sheet', '')
+                    )
 
             result['success'] = True
             return result
@@ -152,13 +557,521 @@ class ChatGPTAutomation:
             error_msg = f"프롬프트 처리 중 오류: {str(e)}"
             logging.error(error_msg)
             result['error'] = error_msg
+            result['failure'] = classify_failure(e)
             return result
 
+    def _schedule_retry(self, retry_queue: RetryQueue, prompt_data: Dict[str, Any],
+                        result: Dict[str, Any], attempt: int) -> bool:
+        """실패 유형을 분류해 재시도를 예약 (예약되면 True)"""
+        failure = result.get('failure') or classify_failure(result.get('error'))
+        result['failure'] = failure
+
+        # 이미지 다운로드는 현재 턴 안에서 이미 재시도했으므로 다시 전송하지 않음
+        if failure == FailureClass.DOWNLOAD_FAILED:
+            return False
+
+        if failure == FailureClass.SESSION_DEAD:
+            self._restart_session()
+
+        return retry_queue.retry(prompt_data, failure, attempt)
+
+    def _restart_session(self) -> bool:
+        """끊어진 브라우저 세션을 닫고 다시 연결"""
+        logging.warning("브라우저 세션이 끊어져 다시 연결합니다.")
+        if self.browser_manager:
+            if self.browser_manager.driver:
+                ACTIVE_SESSIONS.dec()
+            self.browser_manager.close_browser()
+        return self.initialize()
+
+    def _dispatch_account(self, prompt_data: Dict[str, Any]) -> Account:
+        """남은 한도가 가장 많은 계정을 골라 그 계정의 브라우저 세션으로 전환
+
+        브라우저를 열지 못한 계정은 쉬게 하고 다른 계정으로 다시 배정한다.
+        """
+        prompt_type = detect_prompt_type(prompt_data.get('full_prompt') or prompt_data.get('prompt', ''))
+        failed = set()
+        while True:
+            account = self.account_pool.acquire(prompt_type)
+            try:
+                self._activate_account(account)
+                return account
+            except RuntimeError as e:
+                logging.warning(f"{str(e)} - 다른 계정으로 다시 배정합니다.")
+                failed.add(account.name)
+                if len(failed) >= len(self.account_pool.accounts):
+                    raise RuntimeError("브라우저를 열 수 있는 계정이 없습니다.")
+
+    def _activate_account(self, account: Account):
+        """계정의 브라우저 세션으로 전환 (처음 쓰는 계정이면 Chrome 프로필을 열어 연결)"""
+        if self.active_account is account:
+            return
+
+        if self.active_account:
+            self._account_sessions[self.active_account.name] = self._current_session()
+
+        self.active_account = account
+        self.session_id = account.name
+        session = self._account_sessions.get(account.name)
+        if session:
+            self.config, self.browser_manager, self.driver, self.image_downloader, self.chatgpt_interface = session
+            return
+
+        self.config = replace(self.base_config, user_data_dir=account.user_data_dir, debug_port=account.debug_port)
+        self.browser_manager = self.driver = self.image_downloader = self.chatgpt_interface = None
+        if not self.initialize():
+            # 연결되지 않는 계정은 쿨다운 동안 배정하지 않음
+            self.active_account = None
+            self.account_pool.park(account)
+            raise RuntimeError(f"계정 {account.name} 브라우저 초기화 실패")
+
+    def _current_session(self) -> tuple:
+        return self.config, self.browser_manager, self.driver, self.image_downloader, self.chatgpt_interface
+
+    def _record_account_usage(self, account: Account, result: Dict[str, Any]):
+        """전송한 프롬프트를 계정 사용량에 반영하고, 사용 한도에 걸렸으면 계정을 쉬게 함"""
+        not_sent = (FailureClass.INPUT_NOT_FOUND, FailureClass.SESSION_DEAD)
+        if result.get('prompt_type') and result.get('failure') not in not_sent:
+            self.account_pool.record(account, result['prompt_type'])
+        if result.get('failure') == FailureClass.RATE_LIMITED:
+            self.account_pool.park(account)
+
+    def plan_run(self, workers: int = 1) -> Dict[str, Any]:
+        """브라우저 없이 실행 계획과 예상 소요 시간 계산
+
+        실제 실행과 같은 방식으로 프롬프트를 읽고(이어하기 포함) 타입을 분류한 뒤,
+        이전 실행의 타입별 처리 시간과 요청 간격으로 작업 노드 수에 따른 소요 시간을 추정한다.
+        중복된 최종 프롬프트와 이어하기에서 이미 처리된 프롬프트는 추정에 넣지 않는다.
+        """
+        prompts = self.excel_handler.get_unprocessed_prompts()
+        skipped_rows = 0
+        # 이전 실행에서 이미 처리된 최종 프롬프트 (같은 프롬프트의 다른 행은 캐시 적중으로 봄)
+        cached_prompts = set()
+
+        if self.config.resume:
+            processed_rows = self.result_sink.load_processed_rows()
+            remaining = []
+            for prompt in prompts:
+                if self._row_key(prompt) in processed_rows:
+                    cached_prompts.add(prompt['full_prompt'])
+                else:
+                    remaining.append(prompt)
+            skipped_rows = len(prompts) - len(remaining)
+            prompts = remaining
+
+        # 같은 최종 프롬프트는 한 번만, 이미 처리된 프롬프트는 세지 않고 추정
+        type_counts: Dict[str, int] = {}
+        unique_prompts = set()
+        cache_hits = 0
+        for prompt in prompts:
+            full_prompt = prompt['full_prompt']
+            if full_prompt in unique_prompts:
+                continue
+            unique_prompts.add(full_prompt)
+            if full_prompt in cached_prompts:
+                cache_hits += 1
+                continue
+            prompt_type = detect_prompt_type(full_prompt)
+            type_counts[prompt_type] = type_counts.get(prompt_type, 0) + 1
+        sends = sum(type_counts.values())
+
+        history = LatencyHistory(self._latency_history_path()).load()
+        workers = max(workers, 1)
+        by_type = {}
+        serial_time = 0.0
+        serial_time_p95 = 0.0
+
+        for prompt_type, count in type_counts.items():
+            estimate = history.estimate(prompt_type)
+            by_type[prompt_type] = {'count': count, **estimate}
+            serial_time += count * estimate['mean']
+            serial_time_p95 += count * estimate['p95']
+
+        # 요청 간격은 작업 노드마다 따로 적용되므로 처리 시간과 함께 노드 수로 나뉜다
+        interval_time = sends * self.config.request_interval
+        parallelism = max(min(workers, sends), 1)
+        plan = {
+            'dry_run': True,
+            'total_prompts': len(prompts),
+            'skipped_rows': skipped_rows,
+            # 같은 최종 프롬프트가 여러 행에 있는 경우와 이전 실행에서 처리된 프롬프트 (추정에서 제외)
+            'duplicate_prompts': len(prompts) - len(unique_prompts),
+            'cache_hits': cache_hits,
+            'estimated_sends': sends,
+            'by_type': by_type,
+            'workers': workers,
+            'request_interval': self.config.request_interval,
+            'estimated_seconds': (serial_time + interval_time) / parallelism,
+            'estimated_seconds_p95': (serial_time_p95 + interval_time) / parallelism,
+            'history_path': history.path,
+            'errors': []
+        }
+
+        logging.info(f"실행 계획: {plan['total_prompts']}개 프롬프트, 작업 노드 {workers}개, "
+                     f"예상 {plan['estimated_seconds'] / 60:.1f}분 (p95 {plan['estimated_seconds_p95'] / 60:.1f}분)")
+        return plan
+
+    def _latency_history_path(self) -> str:
+        """프롬프트 타입별 처리 시간 이력 파일 경로"""
+        if self.config.latency_history_path:
+            return self.config.latency_history_path
+        return os.path.join(self.config.result_output_dir or os.getcwd(), "latency_history.json")
+
+    def _record_startup(self):
+        """첫 프롬프트 전송 시점까지의 시작 시간 기록"""
+        self.startup_seconds = seconds_since_process_start()
+        if self.startup_seconds is not None:
+            STARTUP_SECONDS.set(self.startup_seconds)
+            logging.info(f"시작부터 첫 프롬프트 전송까지 {self.startup_seconds:.2f}초")
+
+    def _default_journal_path(self) -> str:
+        """결과 출력 디렉토리(없으면 Excel 파일 옆)의 실행 저널 경로"""
+        base_dir = self.config.result_output_dir or os.path.dirname(os.path.abspath(self.excel_handler.excel_path))
+        name = os.path.splitext(os.path.basename(self.excel_handler.excel_path))[0]
+        return os.path.join(base_dir, f"{name}_journal_{time.strftime('%Y%m%d_%H%M%S')}.jsonl")
+
+    @staticmethod
+    def _journal_result(journal: RunJournal, prompt_data: Dict[str, Any], result: Dict[str, Any]):
+        """행별 처리 결과를 저널에 기록"""
+        failure = result.get('failure')
+        journal.write({
+            'row_index': prompt_data['row_index'],
+            'source': prompt_data.get('source'),
+            'sheet': prompt_data.get('sheet'),
+            'success': result['success'],
+            'downloaded_count': result.get('downloaded_count', 0),
+            'images': result.get('images', []),
+            'duplicates': result.get('duplicates', []),
+            'error': result.get('error'),
+            'failure': failure.value if failure else None
+        })
+
+    @staticmethod
+    def _append_error(results: Dict[str, Any], error_msg: str):
+        """오류 기록 (메모리 제한 모드에서는 최근 오류만 유지하고 전체 건수를 셈)"""
+        results['errors'].append(error_msg)
+        if 'error_count' in results:
+            results['error_count'] += 1
+
+    @staticmethod
+    def _update_peak_rss(results: Dict[str, Any]):
+        """프로세스 RSS(MB)를 측정해 최대값 갱신"""
+        import psutil
+
+        rss_mb = psutil.Process().memory_info().rss / (1024 * 1024)
+        results['peak_rss_mb'] = max(results['peak_rss_mb'] or 0.0, rss_mb)
+
+    def _check_tab_memory(self):
+        """탭 JS 힙이 한도를 넘으면 탭을 새로 열어 메모리 해제"""
+        heap_mb = self.browser_manager.get_tab_memory_mb()
+        if heap_mb is None or heap_mb < self.config.chrome_memory_limit_mb:
+            return
+
+        logging.warning("탭 메모리 %.0fMB가 한도 %.0fMB를 넘어 탭을 새로 엽니다.",
+                        heap_mb, self.config.chrome_memory_limit_mb)
+        try:
+            self.browser_manager.recycle_tab()
+            # 새 탭에는 이전 대화 턴이 없으므로 기준점 초기화
+            self.chatgpt_interface.turn_baseline = 0
+        except Exception as e:
+            logging.error(f"탭 재시작 실패, 세션을 다시 연결합니다: {str(e)}")
+            self._restart_session()
+
+    def _wait_request_interval(self):
+        """요청 간격만큼 대기 (대기 중 상태를 지표로 노출)"""
+        RATE_LIMIT_WAITING.set(1)
+        try:
+            time.sleep(self.config.request_interval)
+        finally:
+            RATE_LIMIT_WAITING.set(0)
+
+    @staticmethod
+    def _count_result(result: Dict[str, Any]):
+        """처리 결과를 지표에 반영"""
+        if result['success']:
+            PROMPTS_SUCCEEDED.inc()
+        else:
+            PROMPTS_FAILED.inc()
+
+    @staticmethod
+    def _summarize_latencies(latencies: RunningStats, elapsed: float) -> Dict[str, Any]:
+        """프롬프트별 처리 시간 통계 (초, 표본만 보관한 경우 p50/p95는 표본 기준)"""
+        summary = {
+            'count': latencies.count,
+            'elapsed': elapsed,
+            'prompts_per_min': latencies.count / elapsed * 60 if elapsed > 0 else 0.0
+        }
+        if latencies.count:
+            ordered = sorted(latencies.samples)
+            summary.update({
+                'mean': latencies.mean,
+                'p50': ordered[len(ordered) // 2],
+                'p95': ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)],
+                'max': latencies.max
+            })
+        return summary
+
+    def _record_result(self, prompt_data: Dict[str, Any], result: Dict[str, Any]):
+        """처리 결과를 버퍼에 기록 (주기적으로 한 번에 병합)"""
+        if result['success']:
+            self.result_sink.record(
+                self._row_key(prompt_data),
+                download_count=result['downloaded_count'],
+                download_time=result['download_time'],
+                status='success'
+            )
+        else:
+            self.result_sink.record(self._row_key(prompt_data), status='failed', processed=False)
+
+    @staticmethod
+    def _row_key(prompt_data: Dict[str, Any]):
+        """결과 기록/이어하기에 쓰는 행 식별자
+
+        여러 파일 작업이면 (원본 파일, 시트, DataFrame 인덱스), 아니면 DataFrame 인덱스.
+        """
+        if 'sheet' in prompt_data:
+            return prompt_data['source'], prompt_data['sheet'], prompt_data['row_index'] - 1
+        return prompt_data['row_index'] - 1
+
+    def _archive_source(self, prompt_data: Dict[str, Any]) -> str:
+        """이미지 샤드 색인에 기록할 원본 Excel 파일 경로 (작업 노드는 작업 큐가 알려준 경로)"""
+        if prompt_data.get('source'):
+            return prompt_data['source']
+        return os.path.abspath(self.excel_handler.excel_path) if self.excel_handler else ''
+
+    def _response_path(self, prompt_data: Dict[str, Any]) -> str:
+        """행별 응답 파일 경로 (여러 파일 작업이면 파일/시트 이름을 붙여 겹치지 않게 함)"""
+        name = f"row_{prompt_data['row_index']}.txt"
+        if 'sheet' in prompt_data:
+            workbook = os.path.splitext(os.path.basename(prompt_data['source']))[0]
+            name = f"{workbook}_{prompt_data['sheet']}_{name}"
+        return os.path.join(self.config.response_folder, name)
+
+    def _flush_results(self, results: Dict[str, Any]):
+        """버퍼에 남은 결과 기록"""
+        if not self.result_sink:
+            return
+
+        try:
+            self.result_sink.flush()
+        except Exception as e:
+            results['errors'].append(f"결과 기록 실패: {str(e)}")
+
+    def open_job_store(self) -> JobStore:
+        """Config에 지정된 공유 작업 큐 열기"""
+        if not self.config.job_store_path:
+            raise ValueError("job_store_path가 설정되지 않았습니다.")
+
+        return JobStore(
+            self.config.job_store_path,
+            visibility_timeout=self.config.job_visibility_timeout,
+            max_attempts=self.config.job_max_attempts
+        )
+
+    def enqueue_jobs(self, store: JobStore) -> int:
+        """(코디네이터) Excel의 미처리 프롬프트를 공유 작업 큐에 등록
+
+        이어하기면 처리 완료된 행은 등록하지 않고, 지난 실행에서 실패한 행은 다시 등록한다.
+        """
+        if self.workbook_batch:
+            # 작업 큐는 (원본 파일, 행 번호) 단위라 시트를 구분할 수 없음
+            raise ValueError("여러 파일 작업은 공유 작업 큐(--workers 2 이상)를 지원하지 않습니다.")
+
+        source = os.path.abspath(self.excel_handler.excel_path)
+        prompts = self.excel_handler.get_unprocessed_prompts()
+
+        # 이어하기: 이전 실행에서 처리된 행 제외 (run_automation과 같은 기준)
+        if self.config.resume:
+            processed_rows = self.result_sink.load_processed_rows()
+            prompts = [prompt for prompt in prompts if self._row_key(prompt) not in processed_rows]
+            logging.info(f"이어하기: 처리 완료된 {len(processed_rows)}개 행을 건너뜁니다.")
+
+        # 작업 큐 파일은 실행 간에 유지되므로 지난 실행의 완료/실패 행을 정리한 뒤 등록
+        store.clear_finished(source)
+        return store.enqueue(prompts, source=source)
+
+    def run_worker(self, store: JobStore, poll_interval: float = 5) -> Dict[str, Any]:
+        """(작업 노드) 공유 작업 큐에서 프롬프트를 임대해 처리하고 결과를 보고
+
+        다른 노드가 임대 중인 작업이 남아 있으면 만료되어 재배정될 수 있으므로
+        큐가 완전히 빌 때까지 대기한다. 계정 풀을 쓰면 run_automation과 같이 작업마다
+        이 노드 몫의 계정 중 하나로 전환하고 사용량을 기록한다.
+        """
+        worker_id = self.config.worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        results = {
+            'worker_id': worker_id,
+            'processed_prompts': 0,
+            'downloaded_images': 0,
+            'errors': []
+        }
+
+        # 계정 풀을 쓰면 계정별 브라우저는 처음 배정될 때 연결
+        if not self.account_pool and not self.initialize():
+            results['errors'].append("시스템 초기화 실패")
+            return results
+
+        logging.info(f"작업 노드 시작: {worker_id}")
+
+        while True:
+            jobs = store.lease(worker_id)
+            if not jobs:
+                if store.is_drained():
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            for job in jobs:
+                # 계정 한도가 풀리기를 기다리는 동안에도 임대가 만료되지 않도록 하트비트 안에서 배정
+                with LeaseHeartbeat(store, worker_id):
+                    started_at = time.time()
+                    try:
+                        account = self._dispatch_account(job) if self.account_pool else None
+                    except RuntimeError as e:
+                        account = None
+                        result = {'success': False, 'error': str(e), 'failure': FailureClass.UNKNOWN}
+                    else:
+                        with log_context(prompt_id=job['row_index'], session_id=self.session_id):
+                            result = self._process_single_prompt(job, job['row_index'])
+                        if account:
+                            self._record_account_usage(account, result)
+                self._count_result(result)
+
+                if result['success']:
+                    store.complete(job['job_id'], worker_id, {
+                        'download_count': result['downloaded_count'],
+                        'download_time': result['download_time'],
+                        'images': result['images'],
+                        # 코디네이터가 이미지를 모을 수 있도록 노드의 저장 위치를 함께 보고
+                        'image_folder': os.path.abspath(self.config.download_folder),
+                        'image_output': self.config.image_output,
+                        'response_path': (result['stream'] or {}).get('path'),
+                        'worker_id': worker_id,
+                        # 코디네이터가 타입별 처리 시간 이력에 반영 (실행 계획 추정용)
+                        'prompt_type': result.get('prompt_type'),
+                        'latency': time.time() - started_at
+                    })
+                    results['processed_prompts'] += 1
+                    results['downloaded_images'] += result['downloaded_count']
+                else:
+                    error = result.get('error') or '알 수 없는 오류'
+                    if (result.get('failure') or classify_failure(error)) == FailureClass.SESSION_DEAD:
+                        self._restart_session()
+                    store.fail(job['job_id'], worker_id, error)
+                    results['errors'].append(f"행 {job['row_index']}: {error}")
+
+                # 요청 간격 조절
+                self._wait_request_interval()
+
+        logging.info(f"작업 노드 종료: {worker_id} ({results['processed_prompts']}개 처리)")
+        return results
+
+    def merge_job_results(self, store: JobStore) -> int:
+        """(코디네이터) 작업 노드들이 보고한 결과를 하나의 출력으로 병합
+
+        행별 결과는 결과 출력(ResultSink)에, 이미지 목록은 이미지 매니페스트(JSONL)에 기록한다.
+        접근할 수 있는 노드의 이미지 파일은 코디네이터의 다운로드 폴더로 복사해 한곳에 모으고,
+        노드가 보고한 처리 시간은 타입별 처리 시간 이력(실행 계획 추정용)에 반영한다.
+        """
+        source = os.path.abspath(self.excel_handler.excel_path)
+        merged = 0
+        collected = 0
+        latency_history = LatencyHistory(self._latency_history_path()).load()
+
+        manifest_path = self.image_manifest_path()
+        tmp_path = f"{manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as manifest:
+            for job in store.iter_results(source):
+                result = job['result']
+                if job['status'] == 'done':
+                    self.result_sink.record(
+                        job['row_index'] - 1,
+                        download_count=result.get('download_count', 0),
+                        download_time=result.get('download_time', ''),
+                        status='success'
+                    )
+                    if result.get('prompt_type') and result.get('latency') is not None:
+                        latency_history.record(result['prompt_type'], result['latency'])
+                    if result.get('images'):
+                        images, missing = self._collect_job_images(result)
+                        collected += len(images) - len(missing)
+                        manifest.write(json.dumps({
+                            'row_index': job['row_index'],
+                            'worker_id': result.get('worker_id'),
+                            'image_output': result.get('image_output', 'files'),
+                            'images': images,
+                            'missing': missing,
+                            'response_path': result.get('response_path')
+                        }, ensure_ascii=False) + '\n')
+                else:
+                    self.result_sink.record(job['row_index'] - 1, status='failed', processed=False)
+                merged += 1
+        os.replace(tmp_path, manifest_path)
+
+        self.result_sink.flush()
+        try:
+            latency_history.save()
+        except Exception as e:
+            logging.warning(f"처리 시간 이력 저장 실패: {str(e)}")
+        logging.info(f"작업 노드 결과 {merged}건을 병합했습니다 (이미지 {collected}개, 매니페스트: {manifest_path}).")
+        return merged
+
+    def image_manifest_path(self) -> str:
+        """분산 실행에서 행별 이미지 목록을 기록하는 매니페스트 파일 경로"""
+        name = os.path.splitext(os.path.basename(self.excel_handler.excel_path))[0]
+        os.makedirs(self.result_sink.output_dir, exist_ok=True)
+        return os.path.join(self.result_sink.output_dir, f"{name}_images.jsonl")
+
+    def _collect_job_images(self, result: Dict[str, Any]):
+        """작업 노드가 보고한 이미지를 코디네이터의 다운로드 폴더로 모음
+
+        (이미지 경로 목록, 찾지 못한 원래 경로 목록)을 반환한다. 샤드 저장 모드의 참조
+        ('샤드/파일명')는 노드 폴더 기준 절대 경로로 바꿔 기록하고 복사하지 않는다.
+        """
+        node_folder = result.get('image_folder') or ''
+        if result.get('image_output') == 'archive':
+            return [os.path.join(node_folder, ref) for ref in result['images']], []
+
+        target_folder = os.path.abspath(self.config.download_folder)
+        images, missing = [], []
+        for path in result['images']:
+            path = path if os.path.isabs(path) else os.path.join(node_folder, os.path.basename(path))
+            if not os.path.exists(path):
+                missing.append(path)
+                images.append(path)
+                continue
+
+            if os.path.dirname(os.path.abspath(path)) == target_folder:
+                images.append(os.path.abspath(path))
+                continue
+
+            # 다른 노드의 같은 파일명과 겹치지 않도록 작업 노드 ID를 붙여 복사
+            os.makedirs(target_folder, exist_ok=True)
+            target = os.path.join(target_folder, os.path.basename(path))
+            if os.path.exists(target):
+                target = os.path.join(target_folder, f"{result.get('worker_id')}_{os.path.basename(path)}")
+            shutil.copy2(path, target)
+            images.append(target)
+
+        return images, missing
+
     def cleanup(self):
         """리소스 정리"""
         try:
-            if self.browser_manager:
-                self.browser_manager.close_browser()
+            if self.active_account:
+                self._account_sessions[self.active_account.name] = self._current_session()
+            browser_managers = [session[1] for session in self._account_sessions.values()] or [self.browser_manager]
+
+            for browser_manager in browser_managers:
+                if browser_manager:
+                    if browser_manager.driver:
+                        ACTIVE_SESSIONS.dec()
+                    browser_manager.close_browser()
+            if self.metrics_server:
+                self.metrics_server.stop()
+                self.metrics_server = None
+            if self.image_archive:
+                self.image_archive.close()
+                self.image_archive = None
             logging.info("리소스 정리 완료")
 
         except Exception as e:
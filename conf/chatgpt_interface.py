@@ -5,11 +5,95 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import logging
 import re
 
 from config import Config
+from conf.response_stream import ResponseStreamCapture
+from conf.prompt_type import detect_prompt_type
+from conf.retry import FailureClass, classify_failure
+from conf.metrics import PROMPTS_SENT, RESPONSE_LATENCY, IMAGE_GENERATION_LATENCY
+
+
+# 어시스턴트 메시지(턴) 셀렉터
+ASSISTANT_MESSAGE_SELECTOR = "[data-message-author-role='assistant']"
+
+# 사용 한도 안내가 표시되는 알림 영역
+RATE_LIMIT_NOTICE_SELECTOR = "[role='alert'], [data-testid*='toast']"
+# 알림 영역에 표시되는 사용 한도 안내 문구 (답변 본문은 검사하지 않음)
+RATE_LIMIT_NOTICE_PATTERN = re.compile(
+    r"you've (reached|hit) (our|your|the) (\w+ )?(limit|usage cap)|too many requests in 1 hour|사용 한도에 도달",
+    re.IGNORECASE
+)
+
+# 전송 이후 생긴 최신 어시스턴트 메시지 하나만 반환 (메시지 목록 전체를 드라이버로 넘기지 않음)
+LATEST_TURN_SCRIPT = """
+const messages = document.querySelectorAll(arguments[0]);
+return messages.length > arguments[1] ? messages[messages.length - 1] : null;
+"""
+
+# 어시스턴트 메시지 수 (요소 참조를 만들지 않고 개수만 반환)
+COUNT_MESSAGES_SCRIPT = "return document.querySelectorAll(arguments[0]).length;"
+
+# 턴 컨테이너 내부의 이미지 요소를 한 번의 스크립트 호출로 수집
+TURN_IMAGES_SCRIPT = """
+const message = arguments[0];
+const turn = message.closest('article') || message;
+return Array.from(turn.querySelectorAll('img'));
+"""
+
+
+# 현재 턴의 이미지가 로드/디코딩을 마치면 true, 시간 초과 시 false로 완료되는 비동기 스크립트
+IMAGE_READY_SCRIPT = """
+const message = arguments[0];
+const timeoutMs = arguments[1];
+const done = arguments[arguments.length - 1];
+const turn = message.closest('article') || message;
+const progressSelector = "[role='progressbar'], .animate-spin, [data-testid='loading']";
+let finished = false;
+let observer = null;
+
+const finish = (value) => {
+    if (finished) { return; }
+    finished = true;
+    if (observer) { observer.disconnect(); }
+    clearTimeout(timer);
+    done(value);
+};
+
+const candidates = () => Array.from(turn.querySelectorAll('img')).filter(img => {
+    const src = img.currentSrc || img.src || '';
+    return src && !src.startsWith('data:image/svg') && !src.includes('avatar');
+});
+
+const isFinal = (img) => img.complete && img.naturalWidth > 50 && img.naturalHeight > 50;
+
+const check = () => {
+    if (finished || turn.querySelector(progressSelector)) { return; }
+    const images = candidates();
+    if (!images.length) { return; }
+
+    images.forEach(img => {
+        if (!img.__readyHooked) {
+            img.__readyHooked = true;
+            img.addEventListener('load', check);
+        }
+    });
+    if (!images.every(isFinal)) { return; }
+
+    Promise.all(images.map(img => img.decode().catch(() => null))).then(() => {
+        if (candidates().every(isFinal) && !turn.querySelector(progressSelector)) {
+            finish(true);
+        }
+    });
+};
+
+const timer = setTimeout(() => finish(false), timeoutMs);
+observer = new MutationObserver(check);
+observer.observe(turn, {childList: true, subtree: true, attributes: true, attributeFilter: ['src', 'class']});
+check();
+"""
 
 
 class ChatGPTInterface:
@@ -19,6 +103,8 @@ class ChatGPTInterface:
         self.config = config
         self.driver = driver
         self.prompt_counter = 0
+        # 전송 시점의 어시스턴트 메시지 수 (이 값 이후의 메시지가 현재 턴)
+        self.turn_baseline = 0
 
     def wait_for_prompt_input(self) -> bool:
         """프롬프트 입력창이 준비될 때까지 대기"""
@@ -44,30 +130,47 @@ class ChatGPTInterface:
             return False
 
         except Exception as e:
-            logging.error(f"프롬프트 입력창 대기 중 오류: {str(e)}")
+            logging.error("프롬프트 입력창 대기 중 오류: %s", e)
             return False
 
-    def wait_for_response_completion(self) -> bool:
-        """ChatGPT 응답 완료까지 대기"""
+    def wait_for_response_completion(self, stream_capture: Optional[ResponseStreamCapture] = None) -> bool:
+        """ChatGPT 응답 완료까지 대기
+
+        stream_capture가 주어지면 대기하는 동안 응답 텍스트를 점진적으로 수집한다.
+        """
         try:
             max_wait_time = self.config.max_wait_time
+            poll_interval = self.config.stream_poll_interval if stream_capture else 2
             start_time = time.time()
 
             while time.time() - start_time < max_wait_time:
+                if stream_capture:
+                    self._poll_stream(stream_capture)
+
                 if not self.is_chatgpt_responding():
                     if self.is_response_complete():
                         logging.info("응답이 완료되었습니다.")
                         return True
 
-                time.sleep(2)
+                time.sleep(poll_interval)
 
             logging.warning("응답 대기 시간이 초과되었습니다.")
             return False
 
         except Exception as e:
-            logging.error(f"응답 대기 중 오류: {str(e)}")
+            logging.error("응답 대기 중 오류: %s", e)
             return False
 
+    def _poll_stream(self, stream_capture: ResponseStreamCapture):
+        """현재 턴이 나타나면 옵저버를 설치하고 쌓인 delta를 수집"""
+        if not stream_capture.attached:
+            turn_element = self.get_latest_turn_element()
+            if turn_element is None:
+                return
+            stream_capture.attach(turn_element)
+
+        stream_capture.poll()
+
     def is_chatgpt_responding(self) -> bool:
         """ChatGPT가 현재 응답 중인지 확인"""
         try:
@@ -93,7 +196,7 @@ class ChatGPTInterface:
             return False
 
         except Exception as e:
-            logging.error(f"응답 상태 확인 중 오류: {str(e)}")
+            logging.error("응답 상태 확인 중 오류: %s", e)
             return False
 
     def is_response_complete(self) -> bool:
@@ -128,90 +231,143 @@ class ChatGPTInterface:
             return False
 
         except Exception as e:
-            logging.error(f"응답 완료 확인 중 오류: {str(e)}")
+            logging.error("응답 완료 확인 중 오류: %s", e)
             return False
 
-    def has_image_elements(self) -> bool:
-        """페이지에 이미지 요소가 있는지 확인 (개선된 버전)"""
+    def count_assistant_messages(self) -> int:
+        """현재 페이지의 어시스턴트 메시지 수"""
         try:
-            # 더 포괄적인 이미지 셀렉터
-            selectors = [
-                "img[src*='blob:']",
-                "img[src*='dalle']",
-                "img[src*='oaidalleapiprodscus']",  # DALL-E 3 이미지
-                "img[alt*='Generated']",
-                "img[alt*='generated']",
-                ".result-image img",
-                "[data-testid*='image'] img",
-                "img[src*='chatgpt']",
-                "img[width][height]:not([src*='avatar'])",  # 아바타 제외한 크기가 있는 이미지
-                "div[data-message-author-role='assistant'] img",  # 어시스턴트 메시지 내 이미지
-                ".message img",
-                "figure img",
-                ".dalle-image img"
-            ]
+            return int(self.driver.execute_script(COUNT_MESSAGES_SCRIPT, ASSISTANT_MESSAGE_SELECTOR) or 0)
+        except Exception as e:
+            logging.debug("어시스턴트 메시지 수 확인 중 오류: %s", e)
+            return 0
 
-            for selector in selectors:
-                try:
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    valid_images = []
-
-                    for element in elements:
-                        try:
-                            # 이미지가 실제로 표시되고 크기가 있는지 확인
-                            if (element.is_displayed() and
-                                    element.size['width'] > 50 and
-                                    element.size['height'] > 50):
-                                src = element.get_attribute('src')
-                                # 유효한 이미지 소스인지 확인
-                                if src and not src.startswith('data:image/svg'):
-                                    valid_images.append(element)
-                        except:
-                            continue
-
-                    if valid_images:
-                        logging.info(f"{len(valid_images)}개의 유효한 이미지를 발견했습니다 (셀렉터: {selector})")
-                        return True
+    def get_latest_turn_element(self):
+        """마지막 전송 이후 생성된 최신 어시스턴트 메시지 요소 (없으면 None)
 
-                except Exception as e:
-                    logging.debug(f"셀렉터 {selector} 확인 중 오류: {str(e)}")
+        폴링마다 호출되므로 대화가 길어져도 요소 하나만 받아 오도록 스크립트 한 번으로 찾는다.
+        """
+        try:
+            return self.driver.execute_script(LATEST_TURN_SCRIPT, ASSISTANT_MESSAGE_SELECTOR, self.turn_baseline)
+
+        except Exception as e:
+            logging.debug("최신 턴 요소 확인 중 오류: %s", e)
+            return None
+
+    def find_turn_images(self, turn_element=None) -> List:
+        """최신 턴 안의 유효한 이미지 요소 목록"""
+        turn_element = turn_element or self.get_latest_turn_element()
+        if turn_element is None:
+            return []
+
+        try:
+            elements = self.driver.execute_script(TURN_IMAGES_SCRIPT, turn_element) or []
+        except Exception as e:
+            logging.debug("턴 이미지 검색 중 오류: %s", e)
+            return []
+
+        valid_images = []
+        for element in elements:
+            try:
+                # 이미지가 실제로 표시되고 크기가 있는지 확인
+                if not (element.is_displayed() and
+                        element.size['width'] > 50 and
+                        element.size['height'] > 50):
                     continue
 
-            logging.warning("유효한 이미지 요소를 찾을 수 없습니다.")
+                src = element.get_attribute('src')
+                # 유효한 이미지 소스인지 확인 (아바타, SVG 제외)
+                if src and not src.startswith('data:image/svg') and 'avatar' not in src:
+                    valid_images.append(element)
+            except:
+                continue
+
+        return valid_images
+
+    def is_rate_limited(self) -> bool:
+        """페이지 알림 영역에 사용 한도 안내가 표시되는지 확인
+
+        어시스턴트 답변은 'Too Many Requests' 같은 단어를 정상적으로 포함할 수 있으므로
+        알림 요소의 안내 문구만 검사한다.
+        """
+        try:
+            for element in self.driver.find_elements(By.CSS_SELECTOR, RATE_LIMIT_NOTICE_SELECTOR):
+                text = element.text
+                if text and RATE_LIMIT_NOTICE_PATTERN.search(text):
+                    return True
+            return False
+
+        except Exception as e:
+            logging.debug("사용 한도 확인 중 오류: %s", e)
+            return False
+
+    def has_image_elements(self) -> bool:
+        """최신 어시스턴트 턴에 이미지 요소가 있는지 확인"""
+        try:
+            valid_images = self.find_turn_images()
+            if valid_images:
+                logging.info("현재 턴에서 %s개의 유효한 이미지를 발견했습니다.", len(valid_images))
+                return True
+
+            logging.warning("현재 턴에서 유효한 이미지 요소를 찾을 수 없습니다.")
             return False
 
         except Exception as e:
-            logging.error(f"이미지 요소 확인 중 오류: {str(e)}")
+            logging.error("이미지 요소 확인 중 오류: %s", e)
             return False
 
     def wait_for_image_generation(self, timeout: int = 120) -> bool:
-        """이미지 생성 완료까지 대기 (새로운 메소드)"""
+        """이미지 생성 완료까지 대기
+
+        현재 턴의 <img>가 load/decode()를 마치고 최종 크기를 가질 때 바로 반환한다.
+        스크립트를 실행할 수 없으면 짧은 간격의 폴링으로 대신한다.
+        """
         try:
             start_time = time.time()
 
-            while time.time() - start_time < timeout:
-                # 이미지 생성 진행 상황 확인
-                if self.is_image_generation_in_progress():
-                    logging.info("이미지 생성 중...")
-                    time.sleep(5)
-                    continue
+            # 응답 완료 직후 턴 요소가 아직 없을 수 있으므로 잠시 확인
+            turn_element = self.get_latest_turn_element()
+            while turn_element is None and time.time() - start_time < min(timeout, 10):
+                time.sleep(0.2)
+                turn_element = self.get_latest_turn_element()
 
-                # 이미지가 생성되었는지 확인
-                if self.has_image_elements():
-                    logging.info("이미지 생성이 완료되었습니다.")
-                    # 추가 로딩 시간 제공
-                    time.sleep(3)
-                    return True
+            if turn_element is None:
+                logging.warning("이미지 생성 대기: 현재 턴을 찾을 수 없습니다.")
+                return False
+
+            remaining = max(timeout - (time.time() - start_time), 1)
+            try:
+                self.driver.set_script_timeout(remaining + 5)
+                ready = self.driver.execute_async_script(IMAGE_READY_SCRIPT, turn_element, int(remaining * 1000))
+            except Exception as e:
+                logging.debug("이미지 로드 감지 스크립트 실패, 폴링으로 대기: %s", e)
+                return self._poll_image_generation(start_time, timeout)
 
-                time.sleep(2)
+            if ready:
+                logging.info("이미지 생성이 완료되었습니다.")
+                return True
 
             logging.warning("이미지 생성 대기 시간이 초과되었습니다.")
             return False
 
         except Exception as e:
-            logging.error(f"이미지 생성 대기 중 오류: {str(e)}")
+            logging.error("이미지 생성 대기 중 오류: %s", e)
             return False
 
+    def _poll_image_generation(self, start_time: float, timeout: int) -> bool:
+        """이미지 생성 완료를 폴링으로 확인 (스크립트 대기를 쓸 수 없을 때)"""
+        while time.time() - start_time < timeout:
+            if self.is_image_generation_in_progress():
+                logging.info("이미지 생성 중...")
+            elif self.has_image_elements():
+                logging.info("이미지 생성이 완료되었습니다.")
+                return True
+
+            time.sleep(1)
+
+        logging.warning("이미지 생성 대기 시간이 초과되었습니다.")
+        return False
+
     def is_image_generation_in_progress(self) -> bool:
         """이미지 생성이 진행 중인지 확인"""
         try:
@@ -238,41 +394,38 @@ class ChatGPTInterface:
             return False
 
         except Exception as e:
-            logging.error(f"이미지 생성 진행 상황 확인 중 오류: {str(e)}")
+            logging.error("이미지 생성 진행 상황 확인 중 오류: %s", e)
             return False
 
-    def detect_prompt_type(self, prompt: str) -> str:
+    @staticmethod
+    def detect_prompt_type(prompt: str) -> str:
         """프롬프트 타입 감지 (이미지 생성 vs 텍스트)"""
-        image_keywords = [
-            'generate', 'create', 'draw', 'paint', 'design', 'illustration',
-            'picture', 'image', 'photo', 'artwork', 'sketch', 'render',
-            '생성', '그려', '만들어', '디자인', '일러스트', '그림', '사진'
-        ]
-
-        prompt_lower = prompt.lower()
+        return detect_prompt_type(prompt)
 
-        if any(keyword in prompt_lower for keyword in image_keywords):
-            return "image"
-        else:
-            return "text"
+    def send_prompt_to_chatgpt(self, prompt: str, stream_path: Optional[str] = None) -> Dict[str, Any]:
+        """ChatGPT에 프롬프트 전송 (개선된 버전)
 
-    def send_prompt_to_chatgpt(self, prompt: str) -> Dict[str, Any]:
-        """ChatGPT에 프롬프트 전송 (개선된 버전)"""
+        stream_path가 주어지면 응답 텍스트를 생성되는 동안 해당 파일에 점진적으로 기록한다.
+        """
         result = {
             'success': False,
             'prompt_type': 'text',
             'has_images': False,
-            'error': None
+            'stream': None,
+            'error': None,
+            'failure': None
         }
+        stream_capture = None
 
         try:
             # 프롬프트 타입 감지
             result['prompt_type'] = self.detect_prompt_type(prompt)
-            logging.info(f"감지된 프롬프트 타입: {result['prompt_type']}")
+            logging.info("감지된 프롬프트 타입: %s", result['prompt_type'])
 
             # 입력창 대기
             if not self.wait_for_prompt_input():
                 result['error'] = "입력창을 찾을 수 없습니다."
+                result['failure'] = FailureClass.INPUT_NOT_FOUND
                 return result
 
             # 입력창 찾기 및 프롬프트 입력
@@ -290,15 +443,19 @@ class ChatGPTInterface:
                 try:
                     input_element = self.driver.find_element(By.CSS_SELECTOR, selector)
                     if input_element.is_displayed() and input_element.is_enabled():
-                        logging.info(f"입력창을 찾았습니다: {selector}")
+                        logging.info("입력창을 찾았습니다: %s", selector)
                         break
                 except:
                     continue
 
             if not input_element:
                 result['error'] = "입력창을 찾을 수 없습니다."
+                result['failure'] = FailureClass.INPUT_NOT_FOUND
                 return result
 
+            # 전송 전 어시스턴트 메시지 수를 기록해 이번 턴의 범위를 고정
+            self.turn_baseline = self.count_assistant_messages()
+
             # 기존 텍스트 클리어 및 새 프롬프트 입력
             input_element.clear()
             time.sleep(0.5)
@@ -320,7 +477,7 @@ class ChatGPTInterface:
                     if send_button.is_enabled():
                         send_button.click()
                         sent = True
-                        logging.info(f"전송 버튼 클릭: {selector}")
+                        logging.info("전송 버튼 클릭: %s", selector)
                         break
                 except:
                     continue
@@ -330,59 +487,74 @@ class ChatGPTInterface:
                 logging.info("Enter 키로 전송")
 
             self.prompt_counter += 1
-            logging.info(f"프롬프트 전송 완료: {prompt[:50]}...")
+            PROMPTS_SENT.inc()
+            sent_at = time.perf_counter()
+            logging.info("프롬프트 전송 완료: %s...", prompt[:50])
+
+            if stream_path:
+                stream_capture = ResponseStreamCapture(self.driver, stream_path)
+                stream_capture.start()
 
             # 일반 응답 대기
-            if not self.wait_for_response_completion():
+            response_completed = self.wait_for_response_completion(stream_capture)
+            RESPONSE_LATENCY.observe(time.perf_counter() - sent_at)
+
+            if stream_capture:
+                result['stream'] = stream_capture.finish()
+                stream_capture = None
+
+            # 사용 한도 안내가 뜨면 응답이 바로 '완료'되므로 완료 여부와 관계없이 확인
+            # (이미지 생성 대기 전에 확인해 한도 안내를 기다리느라 시간을 쓰지 않음)
+            if self.is_rate_limited():
+                result['error'] = "사용 한도에 도달했습니다."
+                result['failure'] = FailureClass.RATE_LIMITED
+                return result
+
+            if not response_completed:
                 result['error'] = "응답 대기 시간 초과"
+                result['failure'] = FailureClass.RESPONSE_TIMEOUT
                 return result
 
             # 이미지 타입 프롬프트인 경우 추가 대기
             if result['prompt_type'] == 'image':
                 logging.info("이미지 생성 프롬프트로 감지됨. 이미지 생성 완료까지 대기 중...")
-                if self.wait_for_image_generation():
+                with IMAGE_GENERATION_LATENCY.time():
+                    image_generated = self.wait_for_image_generation()
+
+                if image_generated:
                     result['has_images'] = True
                     logging.info("이미지 생성 완료 확인됨")
                 else:
                     logging.warning("이미지 생성이 완료되지 않았거나 감지되지 않음")
                     # 그래도 한 번 더 확인
-                    time.sleep(5)
                     result['has_images'] = self.has_image_elements()
             else:
                 result['has_images'] = self.has_image_elements()
 
             result['success'] = True
-            logging.info(f"응답 완료. 이미지 포함: {result['has_images']}")
+            logging.info("응답 완료. 이미지 포함: %s", result['has_images'])
             return result
 
         except Exception as e:
             error_msg = f"프롬프트 전송 중 오류: {str(e)}"
             logging.error(error_msg)
             result['error'] = error_msg
+            result['failure'] = classify_failure(e)
+            if stream_capture:
+                result['stream'] = stream_capture.finish()
             return result
 
     def get_latest_response(self) -> Optional[str]:
-        """최신 응답 텍스트 가져오기"""
+        """최신 턴의 응답 텍스트 가져오기"""
         try:
-            # 응답 메시지 셀렉터들
-            selectors = [
-                "[data-message-author-role='assistant']:last-child",
-                ".message.assistant:last-child",
-                ".response-message:last-child"
-            ]
+            response_element = self.get_latest_turn_element()
+            if response_element is None:
+                return None
 
-            for selector in selectors:
-                try:
-                    response_element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    if response_element:
-                        return response_element.text.strip()
-                except:
-                    continue
-
-            return None
+            return response_element.text.strip()
 
         except Exception as e:
-            logging.error(f"응답 텍스트 가져오기 실패: {str(e)}")
+            logging.error("응답 텍스트 가져오기 실패: %s", e)
             return None
 
     def clear_conversation(self):
@@ -400,6 +572,7 @@ class ChatGPTInterface:
                     new_chat_button = self.driver.find_element(By.CSS_SELECTOR, selector)
                     new_chat_button.click()
                     time.sleep(2)
+                    self.turn_baseline = 0
                     logging.info("새 채팅을 시작했습니다.")
                     return True
                 except:
@@ -409,5 +582,5 @@ class ChatGPTInterface:
             return False
 
         except Exception as e:
-            logging.error(f"대화 초기화 실패: {str(e)}")
+            logging.error("대화 초기화 실패: %s", e)
             return False
\ No newline at end of file
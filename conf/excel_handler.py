@@ -1,15 +1,32 @@
 # excel_handler.py
+import numpy as np
 import pandas as pd
 import os
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Iterator
 import logging
 
+from conf.prompt_template import PromptTemplate
+from conf.result_sink import processed_flags
+
 
 class ExcelHandler:
     """Excel 파일 처리를 담당하는 클래스"""
 
-    def __init__(self, excel_path: str):
+    # 프롬프트 보조 요소 열 이름 (소문자 기준)
+    ELEMENT_ALIASES = {
+        'style': ('style', '스타일'),
+        'scene': ('scene', '장면'),
+        'resolution': ('resolution', '해상도')
+    }
+    RESOLUTION_KEYWORDS = ('4k', '8k', 'hd', 'ultra', 'high', 'quality')
+    # 여러 시트를 함께 처리할 때 쓰는 우선순위 열 이름 (값이 클수록 먼저 처리)
+    PRIORITY_ALIASES = ('priority', '우선순위')
+
+    def __init__(self, excel_path: str, template: Optional[PromptTemplate] = None):
         self.excel_path = excel_path
+        self.template = template
+        # 감시 모드에서 마지막으로 확인한 파일 상태 (수정 시각, 크기)
+        self._watch_signature = None
         self.validate_file()
 
     def validate_file(self):
@@ -21,7 +38,11 @@ class ExcelHandler:
             raise ValueError("지원되지 않는 파일 형식입니다. Excel 파일(.xlsx, .xls)을 사용하세요.")
 
     def get_prompts_from_excel(self) -> List[Dict[str, Any]]:
-        """Excel 파일에서 프롬프트 데이터를 읽어오기 (G열 2행부터)"""
+        """Excel 파일에서 프롬프트 데이터를 읽어오기 (G열 2행부터)
+
+        style/scene/resolution 열이 있으면 함께 읽고, 최종 프롬프트(full_prompt)를
+        브라우저 처리 전에 한 번에 조합한다.
+        """
         try:
             # Excel 파일 읽기 (헤더는 1행으로 설정)
             df = pd.read_excel(self.excel_path, header=0)
@@ -36,20 +57,7 @@ class ExcelHandler:
             # 2행부터 시작 (인덱스는 0부터 시작하므로 1부터)
             df = df.iloc[1:].copy()
 
-            # G열에 값이 있는 행만 필터링
-            df = df.dropna(subset=[g_column])
-            df = df[df[g_column].astype(str).str.strip() != '']
-
-            # 딕셔너리 리스트로 변환
-            prompts = []
-            for index, row in df.iterrows():
-                prompt_value = str(row[g_column]).strip()
-                if prompt_value and prompt_value.lower() != 'nan':
-                    prompt_data = {
-                        'prompt': prompt_value,
-                        'row_index': index + 1  # 원본 엑셀 행 번호 (1부터 시작)
-                    }
-                    prompts.append(prompt_data)
+            prompts = self._build_prompts(df, g_column)
 
             logging.info(f"Excel G열에서 {len(prompts)}개의 프롬프트를 읽었습니다 (2행부터).")
             return prompts
@@ -58,6 +66,279 @@ class ExcelHandler:
             logging.error(f"Excel 파일 읽기 실패: {str(e)}")
             raise
 
+    def _build_prompts(self, df: pd.DataFrame, g_column) -> List[Dict[str, Any]]:
+        """G열 값이 있는 행만 골라 최종 프롬프트까지 조합한 딕셔너리 목록으로 변환"""
+        # G열에 값이 있는 행만 필터링
+        df = df.dropna(subset=[g_column]).copy()
+        df['prompt'] = df[g_column].astype(str).str.strip()
+        df = df[(df['prompt'] != '') & (df['prompt'].str.lower() != 'nan')]
+
+        # 보조 요소 열 읽기 (없으면 빈 값)
+        element_columns = self.find_element_columns(df.columns)
+        for element, column in element_columns.items():
+            df[element] = self._clean_text(df[column]) if column else ''
+
+        # 최종 프롬프트를 일괄 조합 (템플릿이 있으면 템플릿 사용)
+        if self.template:
+            df['full_prompt'] = self.template.render_bulk(df)
+        else:
+            df['full_prompt'] = self.assemble_prompts(df)
+        df['row_index'] = df.index + 1  # 원본 엑셀 행 번호 (1부터 시작)
+
+        return df[['prompt', *element_columns, 'full_prompt', 'row_index']].to_dict('records')
+
+    def get_prompts_from_all_sheets(self) -> Dict[str, Dict[str, Any]]:
+        """모든 시트의 프롬프트와 처리 완료 행을 파일을 한 번만 열어 읽기
+
+        반환값은 {시트 이름: {'prompts': [...], 'processed': {DataFrame 인덱스, ...}}}이며
+        프롬프트에는 시트 이름(sheet)과 우선순위(priority, 열이 없으면 0)가 붙는다.
+        G열이 없는 시트는 건너뛴다.
+        """
+        sheets = pd.read_excel(self.excel_path, sheet_name=None, header=0)
+
+        parsed = {}
+        for sheet_name, df in sheets.items():
+            if len(df.columns) <= 6:
+                logging.info(f"G열이 없는 시트를 건너뜁니다: {self.excel_path} [{sheet_name}]")
+                continue
+
+            processed = set()
+            if 'processed' in df.columns:
+                done = processed_flags(df['processed'])
+                processed = set(int(index) for index in df.index[done])
+
+            # 2행부터 시작 (get_prompts_from_excel과 같은 기준)
+            df = df.iloc[1:].copy()
+            prompts = self._build_prompts(df, df.columns[6])
+
+            priorities = self._priority_values(df)
+            for prompt in prompts:
+                prompt['sheet'] = sheet_name
+                prompt['priority'] = priorities.get(prompt['row_index'] - 1, 0)
+
+            parsed[sheet_name] = {'prompts': prompts, 'processed': processed}
+
+        return parsed
+
+    def _priority_values(self, df: pd.DataFrame) -> Dict[int, float]:
+        """우선순위 열이 있으면 {DataFrame 인덱스: 우선순위} (숫자가 아니면 0)"""
+        normalized = {str(column).strip().lower(): column for column in df.columns}
+        column = next((normalized[alias] for alias in self.PRIORITY_ALIASES if alias in normalized), None)
+        if column is None:
+            return {}
+
+        values = pd.to_numeric(df[column], errors='coerce').fillna(0)
+        return {int(index): float(value) for index, value in values.items()}
+
+    def iter_prompts(self, chunk_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """프롬프트를 chunk_size 행씩 읽어 하나씩 반환 (전체 목록을 메모리에 올리지 않음)
+
+        .xlsx는 openpyxl 읽기 전용 모드로 스트리밍하고, 그 밖의 형식은 전체를 읽는다.
+        """
+        if not self.excel_path.endswith('.xlsx'):
+            yield from self.get_prompts_from_excel()
+            return
+
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(self.excel_path, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None or len(header) <= 6:
+                raise ValueError("엑셀 파일에 G열이 존재하지 않습니다.")
+
+            columns = [column if column is not None else f"Unnamed: {i}" for i, column in enumerate(header)]
+            g_column = columns[6]
+
+            # 2행부터 시작 (DataFrame 인덱스 0 = 엑셀 2행이므로 인덱스 1부터)
+            next(rows, None)
+            index = 1
+            chunk, chunk_index = [], []
+            for row in rows:
+                chunk.append(row)
+                chunk_index.append(index)
+                index += 1
+
+                if len(chunk) >= chunk_size:
+                    yield from self._build_prompts(pd.DataFrame(chunk, columns=columns, index=chunk_index), g_column)
+                    chunk, chunk_index = [], []
+
+            if chunk:
+                yield from self._build_prompts(pd.DataFrame(chunk, columns=columns, index=chunk_index), g_column)
+
+        finally:
+            workbook.close()
+
+    def estimate_prompt_count(self) -> int:
+        """시트의 데이터 행 수로 프롬프트 수를 추정 (진행률 표시용)"""
+        if not self.excel_path.endswith('.xlsx'):
+            return len(self.get_prompts_from_excel())
+
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(self.excel_path, read_only=True)
+        try:
+            return max((workbook.worksheets[0].max_row or 0) - 2, 0)
+        finally:
+            workbook.close()
+
+    def _file_signature(self):
+        stat = os.stat(self.excel_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def start_watch(self):
+        """현재 파일 상태를 기준점으로 기록 (이후 변경되면 read_appended_prompts가 다시 읽음)"""
+        self._watch_signature = self._file_signature()
+
+    def read_appended_prompts(self, after_row_index: int) -> List[Dict[str, Any]]:
+        """after_row_index 이후 행의 프롬프트 (파일 수정 시각/크기가 그대로면 읽지 않음)
+
+        .xlsx는 읽기 전용 모드로 뒤쪽 행만 읽는다. 저장 중인 파일이라 열 수 없으면
+        빈 목록을 반환하고 다음 확인 때 다시 읽는다.
+        """
+        signature = self._file_signature()
+        if signature == self._watch_signature:
+            return []
+
+        try:
+            if not self.excel_path.endswith('.xlsx'):
+                prompts = [prompt for prompt in self.get_prompts_from_excel() if prompt['row_index'] > after_row_index]
+            else:
+                prompts = self._read_tail_prompts(after_row_index)
+
+        except Exception as e:
+            logging.debug(f"추가된 행 읽기 실패 (다음 확인 때 재시도): {str(e)}")
+            return []
+
+        self._watch_signature = signature
+        if prompts:
+            logging.info(f"추가된 프롬프트 {len(prompts)}개를 읽었습니다.")
+        return prompts
+
+    def _read_tail_prompts(self, after_row_index: int) -> List[Dict[str, Any]]:
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(self.excel_path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            header = next(sheet.iter_rows(min_row=1, max_row=1, values_only=True), None)
+            if header is None or len(header) <= 6:
+                raise ValueError("엑셀 파일에 G열이 존재하지 않습니다.")
+
+            columns = [column if column is not None else f"Unnamed: {i}" for i, column in enumerate(header)]
+
+            # row_index r은 엑셀 r+1행 (DataFrame 인덱스 i = 엑셀 i+2행)
+            start_row = max(after_row_index, 1) + 2
+            numbered = list(self._iter_rows_from(sheet, start_row, len(columns)))
+            if not numbered:
+                return []
+
+            index = [row_number - 2 for row_number, _ in numbered]
+            rows = [values for _, values in numbered]
+            return self._build_prompts(pd.DataFrame(rows, columns=columns, index=index), columns[6])
+
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _iter_rows_from(sheet, min_row: int, width: int) -> Iterator[tuple]:
+        """읽기 전용 시트에서 min_row행부터 (엑셀 행 번호, 값 튜플)을 반환
+
+        iter_rows(min_row=...)도 앞쪽 행의 셀 값을 모두 만든 뒤 버리므로, 행 번호(r 속성)가
+        min_row보다 작은 행은 셀을 해석하지 않고 건너뛴다. 압축된 XML이라 파일 앞부분을
+        읽는 것 자체는 피할 수 없다.
+        """
+        from openpyxl.worksheet._reader import WorkSheetParser
+
+        class TailRowParser(WorkSheetParser):
+            def parse_row(self, row):
+                number = row.get('r')
+                if number is not None and number.isdigit() and int(number) < min_row:
+                    self.row_counter = int(number)
+                    return self.row_counter, []
+                return super().parse_row(row)
+
+        workbook = sheet.parent
+        with sheet._get_source() as source:
+            parser = TailRowParser(source, sheet._shared_strings, data_only=workbook.data_only,
+                                   epoch=workbook.epoch, date_formats=workbook._date_formats,
+                                   timedelta_formats=workbook._timedelta_formats)
+            for row_number, cells in parser.parse():
+                if row_number < min_row or not cells:
+                    continue
+                values = [None] * width
+                for cell in cells:
+                    if cell['column'] <= width:
+                        values[cell['column'] - 1] = cell['value']
+                yield row_number, tuple(values)
+
+    def find_element_columns(self, columns) -> Dict[str, Optional[str]]:
+        """style/scene/resolution에 해당하는 열 이름 찾기 (대소문자 무시, 한글 별칭 허용)"""
+        normalized = {str(column).strip().lower(): column for column in columns}
+
+        element_columns = {}
+        for element, aliases in self.ELEMENT_ALIASES.items():
+            element_columns[element] = next(
+                (normalized[alias] for alias in aliases if alias in normalized), None
+            )
+        return element_columns
+
+    @staticmethod
+    def _clean_text(series: pd.Series) -> pd.Series:
+        """결측값을 빈 문자열로 바꾸고 공백 제거"""
+        return series.fillna('').astype(str).str.strip().replace('nan', '')
+
+    def assemble_prompts(self, df: pd.DataFrame) -> pd.Series:
+        """모든 행의 프롬프트를 벡터화된 문자열 연산으로 한 번에 조합
+
+        combine_prompt_elements와 같은 규칙을 따른다.
+        """
+        base = self._clean_text(df['prompt'])
+        base_lower = base.str.lower()
+        full_prompt = base.copy()
+
+        def append(part: pd.Series):
+            nonlocal full_prompt
+            separator = np.where(full_prompt != '', ', ', '')
+            full_prompt = full_prompt.where(part == '', full_prompt + separator + part)
+
+        def not_in_base(values: pd.Series) -> np.ndarray:
+            # 행마다 다른 부분 문자열 검사라 열 단위 소문자 변환 후 한 번만 순회
+            lowered = values.str.lower()
+            return np.fromiter(
+                (value not in text for value, text in zip(lowered, base_lower)),
+                dtype=bool, count=len(values)
+            )
+
+        # 스타일 추가 (중복 방지)
+        style = self._clean_text(df['style']) if 'style' in df else pd.Series('', index=df.index)
+        append(('in ' + style + ' style').where((style != '') & not_in_base(style), ''))
+
+        # 장면 추가 (중복 방지)
+        scene = self._clean_text(df['scene']) if 'scene' in df else pd.Series('', index=df.index)
+        append(('scene: ' + scene).where((scene != '') & not_in_base(scene), ''))
+
+        # 해상도 추가
+        resolution = self._clean_text(df['resolution']) if 'resolution' in df else pd.Series('', index=df.index)
+        resolution_lower = resolution.str.lower()
+        resolution_part = np.select(
+            [
+                resolution == '',
+                resolution_lower.str.contains('|'.join(self.RESOLUTION_KEYWORDS), regex=True),
+                resolution_lower.str.contains('x', regex=False)  # 1920x1080 형태
+            ],
+            [
+                '',
+                resolution + ' quality',
+                'resolution ' + resolution
+            ],
+            default=resolution + ' resolution'
+        )
+        append(pd.Series(resolution_part, index=df.index, dtype=object))
+
+        return full_prompt
+
     def update_processed_status(self, row_index: int):
         """특정 행의 처리 상태를 업데이트"""
         try:
@@ -109,8 +390,7 @@ class ExcelHandler:
 
         # 해상도 추가
         if resolution:
-            resolution_keywords = ['4k', '8k', 'hd', 'ultra', 'high', 'quality']
-            if any(keyword in resolution.lower() for keyword in resolution_keywords):
+            if any(keyword in resolution.lower() for keyword in self.RESOLUTION_KEYWORDS):
                 elements.append(f"{resolution} quality")
             elif 'x' in resolution.lower():  # 1920x1080 형태
                 elements.append(f"resolution {resolution}")
@@ -123,29 +403,32 @@ class ExcelHandler:
         logging.debug(f"조합된 프롬프트: {full_prompt}")
         return full_prompt
 
+    def merge_result_frame(self, frame: pd.DataFrame):
+        """row 인덱스를 가진 결과 DataFrame을 Excel 파일에 한 번에 병합"""
+        df = pd.read_excel(self.excel_path)
+
+        # 범위를 벗어난 행은 무시
+        frame = frame[(frame.index >= 0) & (frame.index < len(df))]
+
+        for column in frame.columns:
+            if column not in df.columns:
+                df[column] = pd.Series(dtype=frame[column].dtype)
+            else:
+                df[column] = df[column].astype(object)
+
+        # 벡터화된 병합 (셀 단위 루프 없음)
+        df.loc[frame.index, list(frame.columns)] = frame.to_numpy(dtype=object)
+
+        df.to_excel(self.excel_path, index=False)
+
     def add_result_column(self, results: List[Dict[str, Any]]):
         """결과를 Excel 파일에 추가"""
         try:
-            df = pd.read_excel(self.excel_path)
+            frame = pd.DataFrame(results, columns=['download_count', 'download_time', 'status'])
+            frame = frame.fillna({'download_count': 0, 'download_time': '', 'status': ''})
 
-            # 결과 컬럼들 추가
-            if 'download_count' not in df.columns:
-                df['download_count'] = 0
-            if 'download_time' not in df.columns:
-                df['download_time'] = ''
-            if 'status' not in df.columns:
-                df['status'] = ''
-
-            # 결과 업데이트
-            for i, result in enumerate(results):
-                if i < len(df):
-                    df.at[i, 'download_count'] = result.get('download_count', 0)
-                    df.at[i, 'download_time'] = result.get('download_time', '')
-                    df.at[i, 'status'] = result.get('status', '')
-
-            # 파일 저장
-            df.to_excel(self.excel_path, index=False)
+            self.merge_result_frame(frame)
             logging.info("결과가 Excel 파일에 저장되었습니다.")
 
         except Exception as e:
-            logging.error(f"결과 저장 실패: {str(e)}")
\ No newline at end of file
+            logging.error(f"결과 저장 실패: {str(e)}")
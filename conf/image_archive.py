@@ -0,0 +1,168 @@
+# image_archive.py
+import os
+import io
+import mmap
+import glob
+import time
+import sqlite3
+import logging
+import tarfile
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+ARCHIVE_INDEX_FILENAME = "image_archive.db"
+
+
+class ImageArchive:
+    """이미지를 크기 제한이 있는 tar 샤드에 모아 저장하고, 행 번호로 바로 읽을 수 있게 하는 클래스
+
+    샤드는 압축하지 않은 tar라서 색인(SQLite)에 기록한 바이트 오프셋으로 mmap에서
+    원본 바이트를 그대로 잘라 읽을 수 있다. 작업 노드마다 prefix를 달리하면 같은 폴더와
+    색인을 함께 써도 샤드 파일이 겹치지 않는다. 색인은 (원본 파일, 시트, 행 번호)로 찾으므로
+    여러 Excel 파일이 같은 폴더를 써도 행 번호가 섞이지 않는다.
+    """
+
+    def __init__(self, folder: str, shard_size_mb: float = 1024, prefix: str = "images"):
+        self.folder = folder
+        self.shard_size = int(shard_size_mb * 1024 * 1024)
+        self.prefix = prefix
+        os.makedirs(folder, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(folder, ARCHIVE_INDEX_FILENAME), timeout=30,
+                                    check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS images (
+                row_index INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                shard TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL
+            );
+        """)
+        # 원본 파일/시트 열이 없던 이전 색인은 빈 값으로 채워 이어서 사용
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(images)")}
+        for column in ('source', 'sheet'):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE images ADD COLUMN {column} TEXT NOT NULL DEFAULT ''")
+        self.conn.execute("DROP INDEX IF EXISTS idx_images_row")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_images_key ON images (source, sheet, row_index)")
+
+        self._tar: Optional[tarfile.TarFile] = None
+        self._shard_name: Optional[str] = None
+        self._maps: Dict[str, Tuple[object, mmap.mmap]] = {}
+
+    # ---- 쓰기 ----
+
+    def _shard_paths(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.folder, f"{self.prefix}-*.tar")))
+
+    def _open_shard(self):
+        """마지막 샤드에 이어쓰고, 크기 한도를 넘었으면 다음 번호의 샤드를 새로 만듦"""
+        paths = self._shard_paths()
+        number = 0
+        if paths:
+            last = paths[-1]
+            number = int(os.path.splitext(last)[0].rsplit('-', 1)[1])
+            if os.path.getsize(last) >= self.shard_size:
+                number += 1
+
+        self._shard_name = f"{self.prefix}-{number:05d}.tar"
+        self._tar = tarfile.open(os.path.join(self.folder, self._shard_name), 'a', format=tarfile.PAX_FORMAT)
+
+    def add_bytes(self, row_index: int, name: str, data: bytes, source: str = '', sheet: str = '') -> str:
+        """이미지 바이트를 현재 샤드에 추가하고 '샤드/이름' 참조를 반환
+
+        source/sheet는 행이 속한 원본 Excel 파일과 시트 (색인 조회 키).
+        """
+        with self._lock:
+            if self._tar is None:
+                self._open_shard()
+            elif self._tar.fileobj.tell() + len(data) > self.shard_size:
+                self._tar.close()
+                self._open_shard()
+
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            self._tar.addfile(info, io.BytesIO(data))
+            self._tar.fileobj.flush()
+
+            # 데이터는 512바이트 블록 단위로 채워지므로, 현재 위치에서 채운 크기만큼 앞이 데이터 시작점
+            padded_size = -(-info.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+            data_offset = self._tar.offset - padded_size
+
+            self.conn.execute(
+                "INSERT INTO images (source, sheet, row_index, name, shard, offset, size, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (source, sheet, row_index, name, self._shard_name, data_offset, info.size, time.time())
+            )
+            return f"{self._shard_name}/{name}"
+
+    def add_files(self, row_index: int, filepaths: List[str], remove: bool = True,
+                  source: str = '', sheet: str = '') -> List[str]:
+        """다운로드한 이미지 파일들을 샤드로 옮기고 참조 목록을 반환 (remove면 원본 삭제)"""
+        refs = []
+        for filepath in filepaths:
+            with open(filepath, 'rb') as f:
+                refs.append(self.add_bytes(row_index, os.path.basename(filepath), f.read(), source, sheet))
+            if remove:
+                os.remove(filepath)
+        return refs
+
+    # ---- 읽기 ----
+
+    def _map(self, shard: str) -> mmap.mmap:
+        """샤드 파일을 읽기 전용 mmap으로 열기 (열린 매핑은 재사용)"""
+        mapped = self._maps.get(shard)
+        if mapped is None:
+            f = open(os.path.join(self.folder, shard), 'rb')
+            mapped = (f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            self._maps[shard] = mapped
+        return mapped[1]
+
+    def lookup(self, row_index: int, source: str = '', sheet: str = '') -> List[Dict[str, object]]:
+        """원본 파일/시트의 행 번호에 해당하는 이미지 색인 항목 (샤드, 오프셋, 크기)"""
+        rows = self.conn.execute(
+            "SELECT name, shard, offset, size FROM images WHERE source = ? AND sheet = ? AND row_index = ? "
+            "ORDER BY rowid", (source, sheet, row_index)
+        ).fetchall()
+        return [{'name': name, 'shard': shard, 'offset': offset, 'size': size} for name, shard, offset, size in rows]
+
+    def read(self, row_index: int, source: str = '', sheet: str = '') -> List[Tuple[str, memoryview]]:
+        """원본 파일/시트의 행 번호에 해당하는 이미지들을 압축 해제 없이 (이름, 바이트 뷰)로 반환"""
+        images = []
+        for entry in self.lookup(row_index, source, sheet):
+            if self._tar is not None and entry['shard'] == self._shard_name:
+                # 쓰는 중인 샤드는 매핑 이후 커졌을 수 있으므로 버퍼를 비우고 다시 매핑
+                self._tar.fileobj.flush()
+                self._close_map(entry['shard'])
+
+            view = memoryview(self._map(entry['shard']))
+            images.append((entry['name'], view[entry['offset']:entry['offset'] + entry['size']]))
+        return images
+
+    def _close_map(self, shard: str):
+        mapped = self._maps.pop(shard, None)
+        if mapped:
+            f, mapped_file = mapped
+            try:
+                mapped_file.close()
+            except BufferError:
+                # 바깥에서 아직 참조 중인 뷰가 있으면 가비지 컬렉션 때 해제됨
+                pass
+            f.close()
+
+    def close(self):
+        with self._lock:
+            if self._tar is not None:
+                self._tar.close()
+                self._tar = None
+                logging.info(f"이미지 샤드 기록 완료: {self._shard_name}")
+
+        for shard in list(self._maps):
+            self._close_map(shard)
+        self.conn.close()
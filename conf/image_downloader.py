@@ -2,45 +2,103 @@
 import os
 import time
 import requests
+from requests.adapters import HTTPAdapter
 from PIL import Image
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import TimeoutException
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 import logging
 import base64
 
 from config import Config
+from conf.metrics import DOWNLOAD_BYTES, DOWNLOAD_DURATION
+from conf.image_hash import ImageHashIndex
+
+
+# 이번 실행에서 성공 없이 이 횟수만큼 실패한 다운로드 방법은 건너뜀
+DEAD_STRATEGY_THRESHOLD = 3
+
+# 스트리밍 다운로드/디코딩 청크 크기 (바이트)
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# 페이지 안에서 blob: URL을 fetch 해 data URL로 돌려주는 비동기 스크립트
+BLOB_FETCH_SCRIPT = """
+const img = arguments[0];
+const done = arguments[arguments.length - 1];
+fetch(img.src)
+    .then(response => response.blob())
+    .then(blob => {
+        const reader = new FileReader();
+        reader.onloadend = () => done(reader.result);
+        reader.onerror = () => done('error: FileReader');
+        reader.readAsDataURL(blob);
+    })
+    .catch(error => done('error: ' + error));
+"""
+
+# 턴 컨테이너 안에서 셀렉터에 맞는 요소 수집
+TURN_SELECT_SCRIPT = """
+const message = arguments[0];
+const turn = message.closest('article') || message;
+return Array.from(turn.querySelectorAll(arguments[1]));
+"""
 
 
 class ImageDownloader:
     """이미지 다운로드를 담당하는 클래스"""
 
-    def __init__(self, config: Config, driver):
+    # 생성된 이미지 셀렉터 (앞에서부터 시도)
+    GENERATED_IMAGE_SELECTORS = (
+        "img[class*='absolute top-0 z-1 w-full']",
+        "img[src*='dalle']",
+        "img[alt*='Generated']",
+        ".result-image img",
+        "[data-testid*='image'] img"
+    )
+
+    def __init__(self, config: Config, driver, turn_locator: Optional[Callable] = None):
         self.config = config
         self.driver = driver
+        # 최신 어시스턴트 턴 요소를 반환하는 함수 (주어지면 이미지 검색을 그 턴 안으로 한정)
+        self.turn_locator = turn_locator
+        # 마지막 download_generated_images 호출에서 저장한 파일 경로
+        self.last_downloaded_files: List[str] = []
+        # 마지막 호출에서 기존 이미지와 거의 같다고 판정된 파일 (건너뛴 경우 이미 삭제됨)
+        self.last_duplicate_files: List[str] = []
+
+        # 지각 해시 기반 중복 이미지 색인 (선택)
+        self.hash_index: Optional[ImageHashIndex] = None
+        if config.dedup_images:
+            self.hash_index = ImageHashIndex(config.download_folder, config.dedup_hash, config.dedup_max_distance)
+            self.hash_index.load()
+
+        # 연결을 재사용하는 HTTP 세션
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        self.http.mount('http://', adapter)
+        self.http.mount('https://', adapter)
+
+        # 이번 실행에서 src 종류별로 성공한 방법과 계속 실패한 방법 기록
+        self.preferred_strategy: Dict[str, str] = {}
+        self.strategy_failures: Dict[Tuple[str, str], int] = {}
+        self.strategy_successes: Dict[Tuple[str, str], int] = {}
 
     def find_generated_images(self) -> List:
-        """생성된 이미지 요소들을 찾기"""
+        """생성된 이미지 요소들을 찾기 (turn_locator가 있으면 최신 턴 안에서만)"""
+        if self.turn_locator:
+            return self._find_turn_images()
+
         try:
             wait = WebDriverWait(self.driver, 10)
 
             # 다양한 이미지 셀렉터 시도
-            selectors = [
-                "img[class*='absolute top-0 z-1 w-full']",
-                "img[src*='dalle']",
-                "img[alt*='Generated']",
-                ".result-image img",
-                "[data-testid*='image'] img"
-            ]
-
-            for selector in selectors:
+            for selector in self.GENERATED_IMAGE_SELECTORS:
                 try:
                     images = wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, selector)))
                     if images:
-                        logging.info(f"{len(images)}개의 이미지를 찾았습니다.")
+                        logging.info("%s개의 이미지를 찾았습니다.", len(images))
                         return images
                 except TimeoutException:
                     continue
@@ -49,7 +107,28 @@ class ImageDownloader:
             return []
 
         except Exception as e:
-            logging.error(f"이미지 검색 중 오류: {str(e)}")
+            logging.error("이미지 검색 중 오류: %s", e)
+            return []
+
+    def _find_turn_images(self) -> List:
+        """최신 턴 안에서 생성된 이미지 요소 찾기 (이전 턴의 이미지는 다시 받지 않음)"""
+        try:
+            turn_element = self.turn_locator()
+            if turn_element is None:
+                logging.warning("현재 턴을 찾을 수 없어 이미지를 검색하지 않습니다.")
+                return []
+
+            for selector in self.GENERATED_IMAGE_SELECTORS:
+                images = self.driver.execute_script(TURN_SELECT_SCRIPT, turn_element, selector) or []
+                if images:
+                    logging.info("현재 턴에서 %s개의 이미지를 찾았습니다.", len(images))
+                    return images
+
+            logging.warning("현재 턴에서 이미지를 찾을 수 없습니다.")
+            return []
+
+        except Exception as e:
+            logging.error("이미지 검색 중 오류: %s", e)
             return []
 
     def generate_filename(self, prompt: str, index: int = 0) -> str:
@@ -69,84 +148,62 @@ class ImageDownloader:
             if not img_url or img_url.startswith('data:'):
                 return False
 
-            response = requests.get(img_url, timeout=30)
-            response.raise_for_status()
-
+            # 응답 본문을 메모리에 모두 올리지 않고 청크 단위로 파일에 기록
             filepath = os.path.join(self.config.download_folder, filename)
-            with open(filepath, 'wb') as f:
-                f.write(response.content)
+            with self.http.get(img_url, timeout=30, stream=True) as response:
+                response.raise_for_status()
+                with open(filepath, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
 
-            logging.info(f"이미지 다운로드 완료: {filename}")
+            logging.info("이미지 다운로드 완료: %s", filename)
             return True
 
         except Exception as e:
-            logging.error(f"URL 다운로드 실패: {str(e)}")
+            logging.error("URL 다운로드 실패: %s", e)
             return False
 
     def download_blob_image(self, img_element, filename: str) -> bool:
-        """Blob URL 이미지 다운로드"""
+        """Blob URL 이미지 다운로드 (페이지 안에서 fetch 해 원본 바이트를 그대로 가져옴)"""
         try:
-            # JavaScript를 사용하여 blob을 base64로 변환
-            script = """
-            const img = arguments[0];
-            const canvas = document.createElement('canvas');
-            const ctx = canvas.getContext('2d');
-            canvas.width = img.naturalWidth;
-            canvas.height = img.naturalHeight;
-            ctx.drawImage(img, 0, 0);
-            return canvas.toDataURL('image/png');
-            """
-
-            base64_data = self.driver.execute_script(script, img_element)
-            if not base64_data:
+            self.driver.set_script_timeout(30)
+            data_url = self.driver.execute_async_script(BLOB_FETCH_SCRIPT, img_element)
+            if not data_url or not data_url.startswith('data:'):
+                logging.debug("Blob 가져오기 실패: %s", data_url)
                 return False
 
-            # base64 데이터에서 실제 이미지 데이터 추출
-            img_data = base64_data.split(',')[1]
-            img_bytes = base64.b64decode(img_data)
-
-            filepath = os.path.join(self.config.download_folder, filename)
-            with open(filepath, 'wb') as f:
-                f.write(img_bytes)
-
-            logging.info(f"Blob 이미지 다운로드 완료: {filename}")
-            return True
+            return self._save_data_url(data_url, filename)
 
         except Exception as e:
-            logging.error(f"Blob 다운로드 실패: {str(e)}")
+            logging.error("Blob 다운로드 실패: %s", e)
             return False
 
-    def download_image_by_click(self, img_element, filename: str) -> bool:
-        """클릭을 통한 이미지 다운로드"""
+    def save_data_url_image(self, img_element, filename: str) -> bool:
+        """data: URL 이미지 저장"""
         try:
-            # 이미지 우클릭
-            actions = ActionChains(self.driver)
-            actions.context_click(img_element).perform()
-            time.sleep(1)
-
-            # 컨텍스트 메뉴에서 "이미지 저장" 클릭 시도
-            try:
-                save_option = WebDriverWait(self.driver, 3).until(
-                    EC.element_to_be_clickable((By.XPATH, "//*[contains(text(), '이미지 저장') or contains(text(), 'Save image')]"))
-                )
-                save_option.click()
-                logging.info(f"클릭 다운로드 시도: {filename}")
-                return True
-
-            except TimeoutException:
-                logging.warning("컨텍스트 메뉴를 찾을 수 없습니다.")
-                return False
-
+            return self._save_data_url(img_element.get_attribute('src'), filename)
         except Exception as e:
-            logging.error(f"클릭 다운로드 실패: {str(e)}")
+            logging.error("data URL 저장 실패: %s", e)
             return False
 
+    def _save_data_url(self, data_url: str, filename: str) -> bool:
+        # base64 데이터를 청크 단위로 디코딩해 기록 (디코딩된 전체 사본을 만들지 않음)
+        start = data_url.index(',') + 1
+        step = DOWNLOAD_CHUNK_SIZE // 3 * 4
+
+        filepath = os.path.join(self.config.download_folder, filename)
+        with open(filepath, 'wb') as f:
+            for offset in range(start, len(data_url), step):
+                f.write(base64.b64decode(data_url[offset:offset + step]))
+
+        logging.info("이미지 저장 완료: %s", filename)
+        return True
+
     def take_image_screenshot(self, img_element, filename: str) -> bool:
         """스크린샷을 통한 이미지 저장"""
         try:
-            # 이미지 요소로 스크롤
-            self.driver.execute_script("arguments[0].scrollIntoView(true);", img_element)
-            time.sleep(1)
+            # 이미지 요소로 스크롤 (요소 스크린샷은 렌더링된 상태를 바로 캡처)
+            self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", img_element)
 
             # 요소 스크린샷
             screenshot = img_element.screenshot_as_png
@@ -155,11 +212,11 @@ class ImageDownloader:
             with open(filepath, 'wb') as f:
                 f.write(screenshot)
 
-            logging.info(f"스크린샷 저장 완료: {filename}")
+            logging.info("스크린샷 저장 완료: %s", filename)
             return True
 
         except Exception as e:
-            logging.error(f"스크린샷 저장 실패: {str(e)}")
+            logging.error("스크린샷 저장 실패: %s", e)
             return False
 
     def resize_downloaded_image(self, filepath: str, max_size: tuple = (1024, 1024)):
@@ -169,14 +226,79 @@ class ImageDownloader:
                 if img.size[0] > max_size[0] or img.size[1] > max_size[1]:
                     img.thumbnail(max_size, Image.Resampling.LANCZOS)
                     img.save(filepath, optimize=True, quality=85)
-                    logging.info(f"이미지 크기 조정 완료: {filepath}")
+                    logging.info("이미지 크기 조정 완료: %s", filepath)
 
         except Exception as e:
-            logging.error(f"이미지 크기 조정 실패: {str(e)}")
-
-    def download_generated_images(self, prompt: str) -> int:
-        """생성된 모든 이미지 다운로드"""
-        images = self.find_generated_images()
+            logging.error("이미지 크기 조정 실패: %s", e)
+
+    @staticmethod
+    def get_src_scheme(src: Optional[str]) -> str:
+        """이미지 src의 종류 ('http', 'blob', 'data', 'other')"""
+        if not src:
+            return 'other'
+        if src.startswith(('http://', 'https://')):
+            return 'http'
+        if src.startswith('blob:'):
+            return 'blob'
+        if src.startswith('data:'):
+            return 'data'
+        return 'other'
+
+    def select_strategies(self, scheme: str) -> List[Tuple[str, Callable]]:
+        """src 종류에 맞는 다운로드 방법 순서
+
+        이번 실행에서 성공한 방법을 먼저 시도하고, 성공 없이 계속 실패한 방법은 건너뛴다.
+        스크린샷은 항상 마지막 대안으로 남긴다.
+        """
+        candidates = {
+            'http': ['url'],
+            'blob': ['blob'],
+            'data': ['data_url']
+        }.get(scheme, [])
+
+        preferred = self.preferred_strategy.get(scheme)
+        if preferred in candidates:
+            candidates.remove(preferred)
+            candidates.insert(0, preferred)
+
+        names = [name for name in candidates if not self._is_dead_strategy(scheme, name)]
+        names.append('screenshot')
+
+        return [(name, self.strategies[name]) for name in names]
+
+    @property
+    def strategies(self) -> Dict[str, Callable]:
+        return {
+            'url': self.download_image_by_url,
+            'blob': self.download_blob_image,
+            'data_url': self.save_data_url_image,
+            'screenshot': self.take_image_screenshot
+        }
+
+    def _is_dead_strategy(self, scheme: str, name: str) -> bool:
+        key = (scheme, name)
+        return (self.strategy_successes.get(key, 0) == 0 and
+                self.strategy_failures.get(key, 0) >= DEAD_STRATEGY_THRESHOLD)
+
+    def _record_strategy(self, scheme: str, name: str, success: bool):
+        key = (scheme, name)
+        if success:
+            self.strategy_successes[key] = self.strategy_successes.get(key, 0) + 1
+            self.preferred_strategy[scheme] = name
+        else:
+            self.strategy_failures[key] = self.strategy_failures.get(key, 0) + 1
+            if self._is_dead_strategy(scheme, name):
+                logging.warning("다운로드 방법 '%s'이(가) %s 이미지에서 계속 실패해 이번 실행에서 건너뜁니다.", name, scheme)
+
+    def download_generated_images(self, prompt: str, images: Optional[List] = None) -> int:
+        """생성된 모든 이미지 다운로드 (저장했거나 중복으로 판정한 이미지 수 반환)
+
+        images가 주어지면 (최신 턴에서 찾은 이미지) 문서 전체 검색 없이 그 이미지만 저장한다.
+        """
+        self.last_downloaded_files = []
+        self.last_duplicate_files = []
+        if images is None:
+            images = self.find_generated_images()
         if not images:
             return 0
 
@@ -185,23 +307,63 @@ class ImageDownloader:
         for i, img_element in enumerate(images):
             filename = self.generate_filename(prompt, i)
 
-            # 다양한 다운로드 방법 시도
-            methods = [
-                self.download_image_by_url,
-                self.download_blob_image,
-                self.download_image_by_click,
-                self.take_image_screenshot
-            ]
+            try:
+                scheme = self.get_src_scheme(img_element.get_attribute('src'))
+            except Exception:
+                scheme = 'other'
 
-            for method in methods:
+            for name, method in self.select_strategies(scheme):
+                download_started_at = time.perf_counter()
                 if method(img_element, filename):
-                    # 이미지 크기 조정
+                    self._record_strategy(scheme, name, True)
+
                     filepath = os.path.join(self.config.download_folder, filename)
-                    self.resize_downloaded_image(filepath)
+                    DOWNLOAD_DURATION.observe(time.perf_counter() - download_started_at)
+                    DOWNLOAD_BYTES.inc(os.path.getsize(filepath))
                     downloaded_count += 1
+
+                    if self.hash_index and self._handle_duplicate(filepath):
+                        break
+
+                    # 이미지 크기 조정
+                    self.resize_downloaded_image(filepath)
+                    self.last_downloaded_files.append(filepath)
                     break
+
+                self._record_strategy(scheme, name, False)
             else:
-                logging.warning(f"이미지 {i + 1} 다운로드 실패")
+                logging.warning("이미지 %s 다운로드 실패", i + 1)
+
+        if self.last_duplicate_files:
+            logging.info("총 %s개의 이미지를 다운로드했습니다 (중복 %s개).",
+                         downloaded_count, len(self.last_duplicate_files))
+        else:
+            logging.info("총 %s개의 이미지를 다운로드했습니다.", downloaded_count)
+        return downloaded_count
+
+    def _handle_duplicate(self, filepath: str) -> bool:
+        """기존 이미지와 거의 같으면 중복으로 기록하고, 건너뛰기 설정이면 파일을 지워 True 반환
+
+        중복이 아닌 이미지는 색인에 추가한다.
+        """
+        try:
+            hash_value = self.hash_index.hash_file(filepath)
+            duplicate = self.hash_index.find_duplicate(filepath, hash_value)
+        except Exception as e:
+            logging.debug("이미지 해시 실패: %s", e)
+            return False
+
+        if duplicate is None:
+            self.hash_index.add(filepath, hash_value)
+            return False
+
+        match, distance = duplicate
+        self.last_duplicate_files.append(filepath)
+        if self.config.duplicate_action == 'skip':
+            os.remove(filepath)
+            logging.info("중복 이미지 건너뜀: %s (기존 %s, 거리 %d)", os.path.basename(filepath), match, distance)
+            return True
 
-        logging.info(f"총 {downloaded_count}개의 이미지를 다운로드했습니다.")
-        return downloaded_count
\ No newline at end of file
+        logging.info("중복 이미지 표시: %s (기존 %s, 거리 %d)", os.path.basename(filepath), match, distance)
+        self.hash_index.add(filepath, hash_value)
+        return False
@@ -0,0 +1,200 @@
+# image_hash.py
+import os
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.gif', '.bmp')
+
+# 다운로드 폴더에 함께 저장하는 해시 색인 파일 (한 줄에 "16진수 해시<TAB>파일명")
+HASH_INDEX_FILENAME = ".image_hashes.tsv"
+
+
+def _grayscale_pixels(img: Image.Image, size: int) -> np.ndarray:
+    """흑백으로 변환해 size x size로 축소한 픽셀 배열"""
+    small = img.convert('L').resize((size, size), Image.Resampling.LANCZOS)
+    return np.asarray(small, dtype=np.float64)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    """불리언 배열을 64비트 정수 해시로 변환"""
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), 'big')
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """n x n DCT-II 변환 행렬 (정규화)"""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.sqrt(2.0 / n) * np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+
+_DCT_32 = _dct_matrix(32)
+
+
+def average_hash(img: Image.Image, hash_size: int = 8) -> int:
+    """aHash: 8x8로 축소한 뒤 평균보다 밝은 픽셀을 1로 표시"""
+    pixels = _grayscale_pixels(img, hash_size)
+    return _bits_to_int(pixels > pixels.mean())
+
+
+def perceptual_hash(img: Image.Image, hash_size: int = 8) -> int:
+    """pHash: 32x32 DCT의 저주파 8x8 계수를 중앙값과 비교 (밝기/압축 변화에 강함)"""
+    pixels = _grayscale_pixels(img, _DCT_32.shape[0])
+    dct = _DCT_32 @ pixels @ _DCT_32.T
+    low = dct[:hash_size, :hash_size]
+    # 직류 성분(평균 밝기)은 중앙값 계산에서 제외
+    median = np.median(low.ravel()[1:])
+    return _bits_to_int(low > median)
+
+
+HASH_FUNCTIONS = {
+    'ahash': average_hash,
+    'phash': perceptual_hash,
+}
+
+
+def hash_image_file(filepath: str, method: str = 'phash') -> int:
+    """이미지 파일의 지각 해시"""
+    with Image.open(filepath) as img:
+        return HASH_FUNCTIONS[method](img)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    """해밍 거리 기반 BK-트리 (거리 d 이내 해시를 전체 탐색 없이 검색)
+
+    노드는 [해시, 값 목록, {거리: 자식 노드}] 리스트로 저장해 객체 수를 줄인다.
+    """
+
+    def __init__(self):
+        self.root: Optional[list] = None
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, hash_value: int, value):
+        self.size += 1
+        if self.root is None:
+            self.root = [hash_value, [value], {}]
+            return
+
+        node = self.root
+        while True:
+            distance = hamming_distance(hash_value, node[0])
+            if distance == 0:
+                node[1].append(value)
+                return
+
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [hash_value, [value], {}]
+                return
+            node = child
+
+    def search(self, hash_value: int, max_distance: int) -> List[Tuple[int, object]]:
+        """거리 max_distance 이내의 (거리, 값) 목록 (가까운 순)"""
+        if self.root is None:
+            return []
+
+        matches = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(hash_value, node[0])
+            if distance <= max_distance:
+                matches.extend((distance, value) for value in node[1])
+
+            # 삼각 부등식: 자식과의 거리가 [d - max, d + max] 범위인 가지만 탐색
+            low, high = distance - max_distance, distance + max_distance
+            stack.extend(child for edge, child in node[2].items() if low <= edge <= high)
+
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+
+class ImageHashIndex:
+    """다운로드 폴더의 이미지 지각 해시 색인 (거의 같은 이미지 찾기용)
+
+    색인은 폴더 안의 텍스트 파일에 한 줄씩 추가 기록되므로, 다음 실행에서는
+    이미 해시한 파일을 다시 열지 않는다.
+    """
+
+    def __init__(self, folder: str, method: str = 'phash', max_distance: int = 4):
+        if method not in HASH_FUNCTIONS:
+            raise ValueError(f"지원하지 않는 해시 방식입니다: {method}")
+
+        self.folder = folder
+        self.method = method
+        self.max_distance = max_distance
+        self.index_path = os.path.join(folder, HASH_INDEX_FILENAME)
+        self.tree = BKTree()
+        self._indexed: Dict[str, int] = {}
+
+    def load(self) -> int:
+        """저장된 색인을 읽고, 색인에 없는 폴더 안 이미지를 추가로 해시 (추가된 수 반환)
+
+        샤드로 옮겨진 이미지도 중복 판정에 쓰이도록 색인 항목은 파일이 없어도 유지한다.
+        """
+        for hash_value, filename in self._read_index():
+            if filename not in self._indexed:
+                self._insert(hash_value, filename)
+
+        added = 0
+        for entry in os.scandir(self.folder):
+            if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS) and entry.name not in self._indexed:
+                try:
+                    self.add(entry.path)
+                    added += 1
+                except Exception as e:
+                    logging.debug("이미지 해시 실패 (%s): %s", entry.name, e)
+
+        logging.info("이미지 해시 색인: %d개 (새로 해시 %d개)", len(self.tree), added)
+        return added
+
+    def _read_index(self) -> Iterator[Tuple[int, str]]:
+        if not os.path.exists(self.index_path):
+            return
+
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                hash_hex, _, filename = line.rstrip('\n').partition('\t')
+                if filename:
+                    yield int(hash_hex, 16), filename
+
+    def _insert(self, hash_value: int, filename: str):
+        self._indexed[filename] = hash_value
+        self.tree.add(hash_value, filename)
+
+    def hash_file(self, filepath: str) -> int:
+        return hash_image_file(filepath, self.method)
+
+    def find_duplicate(self, filepath: str, hash_value: Optional[int] = None) -> Optional[Tuple[str, int]]:
+        """가장 가까운 기존 이미지 (파일명, 거리) - max_distance 안에 없으면 None"""
+        if hash_value is None:
+            hash_value = self.hash_file(filepath)
+
+        filename = os.path.basename(filepath)
+        for distance, match in self.tree.search(hash_value, self.max_distance):
+            if match != filename:
+                return match, distance
+        return None
+
+    def add(self, filepath: str, hash_value: Optional[int] = None) -> int:
+        """이미지를 색인에 추가하고 색인 파일에 기록"""
+        if hash_value is None:
+            hash_value = self.hash_file(filepath)
+
+        filename = os.path.basename(filepath)
+        self._insert(hash_value, filename)
+        with open(self.index_path, 'a', encoding='utf-8') as f:
+            f.write(f"{hash_value:016x}\t{filename}\n")
+        return hash_value
@@ -0,0 +1,241 @@
+# job_store.py
+import json
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Iterator
+
+
+class JobStore:
+    """여러 작업 노드가 공유하는 프롬프트 작업 큐 (SQLite 기반)
+
+    작업 노드는 프롬프트를 임대(lease)해 처리하고, 처리 중에는 하트비트로 임대를 연장한다.
+    임대 만료 시간(visibility timeout)이 지난 작업은 다른 노드에 다시 배정된다.
+    모든 노드가 같은 DB 파일에 접근할 수 있어야 한다 (공유 볼륨 등).
+    """
+
+    def __init__(self, db_path: str, visibility_timeout: float = 300, max_attempts: int = 3):
+        self.db_path = db_path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._create_tables()
+
+    def _create_tables(self):
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                source TEXT NOT NULL,
+                row_index INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker_id TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                updated_at REAL,
+                UNIQUE (source, row_index)
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, lease_expires);
+            CREATE TABLE IF NOT EXISTS workers (
+                worker_id TEXT PRIMARY KEY,
+                last_heartbeat REAL
+            );
+        """)
+
+    @contextmanager
+    def _transaction(self):
+        """쓰기 잠금을 먼저 잡는 트랜잭션 (다른 프로세스와의 경쟁 방지)"""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            else:
+                self.conn.execute("COMMIT")
+
+    def enqueue(self, prompts: List[Dict[str, Any]], source: str) -> int:
+        """프롬프트를 큐에 추가 (이미 있는 행은 무시) 후 추가된 수 반환"""
+        now = time.time()
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (source, row_index, payload, updated_at) VALUES (?, ?, ?, ?)",
+                [(source, prompt['row_index'], json.dumps(prompt, ensure_ascii=False, default=str), now)
+                 for prompt in prompts]
+            )
+            added = conn.total_changes - before
+
+        logging.info(f"작업 큐에 {added}개의 프롬프트를 추가했습니다 ({source}).")
+        return added
+
+    def clear_finished(self, source: str) -> int:
+        """이전 실행에서 끝난(완료/실패) 작업을 지우고 지운 수를 반환
+
+        새 실행에서 같은 행을 다시 등록할 수 있게 하며, 다른 노드가 처리 중인 작업은 그대로 둔다.
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE source = ? AND status IN ('done', 'failed')", (source,)
+            )
+        if cursor.rowcount:
+            logging.info(f"이전 실행의 작업 {cursor.rowcount}개를 정리했습니다 ({source}).")
+        return cursor.rowcount
+
+    def requeue_expired(self) -> int:
+        """임대가 만료된 작업을 대기 상태로 되돌림"""
+        with self._transaction() as conn:
+            return self._requeue_expired(conn)
+
+    def _requeue_expired(self, conn) -> int:
+        """임대 만료도 시도 횟수로 세어, 작업 노드를 계속 죽이는 행이 무한히 재배정되지 않게 함"""
+        now = time.time()
+        expired_result = json.dumps({'error': "임대 만료 (작업 노드가 응답하지 않음)"}, ensure_ascii=False)
+        cursor = conn.execute(
+            "UPDATE jobs SET attempts = attempts + 1, worker_id = NULL, lease_expires = NULL, "
+            "status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END, "
+            "result = CASE WHEN attempts + 1 >= ? THEN ? ELSE result END, updated_at = ? "
+            "WHERE status = 'leased' AND lease_expires < ?",
+            (self.max_attempts, self.max_attempts, expired_result, now, now)
+        )
+        if cursor.rowcount:
+            logging.warning(f"임대가 만료된 작업 {cursor.rowcount}개를 다시 배정합니다 (시도 한도를 넘은 작업은 실패 처리).")
+        return cursor.rowcount
+
+    def lease(self, worker_id: str, batch_size: int = 1) -> List[Dict[str, Any]]:
+        """대기 중인 작업을 임대해 반환 (각 항목에 job_id와 원본 파일 경로 source 포함)"""
+        now = time.time()
+        with self._transaction() as conn:
+            self._requeue_expired(conn)
+
+            rows = conn.execute(
+                "SELECT job_id, source, payload FROM jobs WHERE status = 'pending' ORDER BY job_id LIMIT ?",
+                (batch_size,)
+            ).fetchall()
+
+            conn.executemany(
+                "UPDATE jobs SET status = 'leased', worker_id = ?, lease_expires = ?, updated_at = ? "
+                "WHERE job_id = ?",
+                [(worker_id, now + self.visibility_timeout, now, job_id) for job_id, _, _ in rows]
+            )
+            self._touch_worker(conn, worker_id, now)
+
+        jobs = []
+        for job_id, source, payload in rows:
+            job = json.loads(payload)
+            job['job_id'] = job_id
+            job['source'] = source
+            jobs.append(job)
+        return jobs
+
+    def heartbeat(self, worker_id: str) -> int:
+        """작업 노드가 가진 임대를 연장하고 연장된 작업 수를 반환"""
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE status = 'leased' AND worker_id = ?",
+                (now + self.visibility_timeout, worker_id)
+            )
+            self._touch_worker(conn, worker_id, now)
+            return cursor.rowcount
+
+    @staticmethod
+    def _touch_worker(conn, worker_id: str, now: float):
+        conn.execute(
+            "INSERT INTO workers (worker_id, last_heartbeat) VALUES (?, ?) "
+            "ON CONFLICT(worker_id) DO UPDATE SET last_heartbeat = excluded.last_heartbeat",
+            (worker_id, now)
+        )
+
+    def complete(self, job_id: int, worker_id: str, result: Dict[str, Any]) -> bool:
+        """작업 완료 보고 (임대가 이미 다른 노드로 넘어갔으면 False)"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, lease_expires = NULL, updated_at = ? "
+                "WHERE job_id = ? AND worker_id = ? AND status = 'leased'",
+                (json.dumps(result, ensure_ascii=False, default=str), time.time(), job_id, worker_id)
+            )
+
+        if not cursor.rowcount:
+            logging.warning(f"작업 {job_id}의 임대가 만료되어 완료 보고가 무시되었습니다.")
+        return bool(cursor.rowcount)
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> bool:
+        """작업 실패 보고 (시도 횟수가 남았으면 다시 대기 상태로)"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET attempts = attempts + 1, worker_id = NULL, lease_expires = NULL, "
+                "status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END, "
+                "result = ?, updated_at = ? "
+                "WHERE job_id = ? AND worker_id = ? AND status = 'leased'",
+                (self.max_attempts, json.dumps({'error': error}, ensure_ascii=False),
+                 time.time(), job_id, worker_id)
+            )
+        return bool(cursor.rowcount)
+
+    def counts(self) -> Dict[str, int]:
+        """상태별 작업 수"""
+        with self._lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        counts.update(dict(rows))
+        return counts
+
+    def is_drained(self) -> bool:
+        """대기 중이거나 처리 중인 작업이 없는지 확인"""
+        counts = self.counts()
+        return counts['pending'] == 0 and counts['leased'] == 0
+
+    def iter_results(self, source: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """완료/실패한 작업의 결과 (row_index, status, result)"""
+        query = "SELECT row_index, status, result FROM jobs WHERE status IN ('done', 'failed')"
+        params = ()
+        if source:
+            query += " AND source = ?"
+            params = (source,)
+
+        with self._lock:
+            rows = self.conn.execute(query + " ORDER BY row_index", params).fetchall()
+
+        for row_index, status, result in rows:
+            yield {
+                'row_index': row_index,
+                'status': status,
+                'result': json.loads(result) if result else {}
+            }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class LeaseHeartbeat:
+    """작업 처리 중 백그라운드에서 주기적으로 임대를 연장하는 스레드"""
+
+    def __init__(self, store: JobStore, worker_id: str, interval: Optional[float] = None):
+        self.store = store
+        self.worker_id = worker_id
+        self.interval = interval or max(store.visibility_timeout / 3, 1)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"heartbeat-{worker_id}", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.store.heartbeat(self.worker_id)
+            except Exception as e:
+                logging.error(f"하트비트 전송 실패: {str(e)}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
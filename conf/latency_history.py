@@ -0,0 +1,99 @@
+# latency_history.py
+import os
+import json
+import random
+import logging
+from typing import Dict, List, Optional
+
+
+# 이력이 없을 때 사용하는 프롬프트 타입별 처리 시간 추정치 (초)
+DEFAULT_LATENCIES = {
+    'text': 30.0,
+    'image': 120.0,
+}
+
+
+class LatencyHistory:
+    """이전 실행의 프롬프트 타입별 처리 시간 기록 (실행 계획 추정용)
+
+    타입마다 누적 개수/합계와 최근 max_samples개 표본만 JSON 파일에 보관한다.
+    """
+
+    def __init__(self, path: str, max_samples: int = 500):
+        self.path = path
+        self.max_samples = max_samples
+        self.stats: Dict[str, Dict] = {}
+
+    def load(self) -> 'LatencyHistory':
+        """기록 파일 읽기 (없거나 손상되었으면 빈 이력)"""
+        if not os.path.exists(self.path):
+            return self
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.stats = json.load(f)
+        except Exception as e:
+            logging.warning(f"처리 시간 이력 읽기 실패: {str(e)}")
+            self.stats = {}
+        return self
+
+    def record(self, prompt_type: str, seconds: float):
+        entry = self.stats.setdefault(prompt_type, {'count': 0, 'total': 0.0, 'samples': []})
+        entry['count'] += 1
+        entry['total'] += seconds
+        entry['samples'].append(round(seconds, 3))
+        if len(entry['samples']) > self.max_samples:
+            del entry['samples'][:len(entry['samples']) - self.max_samples]
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.stats, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def estimate(self, prompt_type: str) -> Dict[str, Optional[float]]:
+        """타입별 처리 시간 추정치 (최근 표본의 평균/p50/p95, 이력이 없으면 기본값)"""
+        samples: List[float] = sorted(self.stats.get(prompt_type, {}).get('samples', []))
+        if not samples:
+            default = DEFAULT_LATENCIES.get(prompt_type, DEFAULT_LATENCIES['text'])
+            return {'samples': 0, 'mean': default, 'p50': default, 'p95': default}
+
+        return {
+            'samples': len(samples),
+            'mean': sum(samples) / len(samples),
+            'p50': samples[len(samples) // 2],
+            'p95': samples[min(int(len(samples) * 0.95), len(samples) - 1)],
+        }
+
+
+class RunningStats:
+    """실행 중 값의 개수/합계/최댓값과 표본을 누적하는 통계
+
+    max_samples가 None이면 모든 값을 보관하고, 정수면 그 크기의 저수지 표본(reservoir
+    sampling)만 보관해 행 수와 관계없이 메모리 사용량이 일정하다 (0이면 표본 없이 평균만).
+    """
+
+    def __init__(self, max_samples: Optional[int] = None):
+        self.max_samples = max_samples
+        self.count = 0
+        self.total = 0.0
+        self.max: Optional[float] = None
+        self.samples: List[float] = []
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = value if self.max is None else max(self.max, value)
+
+        if self.max_samples is None or len(self.samples) < self.max_samples:
+            self.samples.append(value)
+        elif self.max_samples:
+            # 지금까지 본 값마다 같은 확률로 표본에 남도록 교체
+            slot = random.randrange(self.count)
+            if slot < self.max_samples:
+                self.samples[slot] = value
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
@@ -0,0 +1,243 @@
+# logging_setup.py
+import os
+import sys
+import json
+import atexit
+import queue
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, Dict, Tuple
+
+
+# 로그 레코드에 붙일 실행 문맥 (스레드/태스크별로 분리됨)
+prompt_id_var: contextvars.ContextVar = contextvars.ContextVar('prompt_id', default=None)
+session_id_var: contextvars.ContextVar = contextvars.ContextVar('session_id', default=None)
+
+_listener: Optional[QueueListener] = None
+# 리스너를 만든 프로세스와 설정값 (fork된 자식 프로세스에서 다시 설정할 때 사용)
+_listener_pid: Optional[int] = None
+_setup_kwargs: Dict = {}
+_setup_lock = threading.Lock()
+
+
+@contextmanager
+def log_context(prompt_id=None, session_id=None):
+    """with 블록 안에서 남기는 로그에 prompt_id/session_id를 붙임"""
+    tokens = []
+    if prompt_id is not None:
+        tokens.append((prompt_id_var, prompt_id_var.set(prompt_id)))
+    if session_id is not None:
+        tokens.append((session_id_var, session_id_var.set(session_id)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """로그를 남기는 스레드의 문맥(prompt_id, session_id)을 레코드에 기록"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.prompt_id = prompt_id_var.get()
+        record.session_id = session_id_var.get()
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """같은 위치에서 같은 메시지가 interval 안에 반복되면 생략하고, 다음 출력 시 생략 횟수를 붙임
+
+    인자까지 채운 메시지로 비교하므로 대기 중 반복되는 폴링 로그만 생략되고, 프롬프트마다
+    내용이 다른 로그는 모두 남는다. DEBUG/INFO만 제한하고 WARNING 이상은 항상 통과시킨다.
+    메시지를 포맷해야 하므로 로그를 남기는 스레드가 아닌 큐 리스너 스레드에서 적용한다.
+    """
+
+    # 기록해 둔 메시지가 이보다 많아지면 interval이 지난 항목을 정리
+    MAX_KEYS = 1024
+
+    def __init__(self, interval: float = 30.0):
+        super().__init__()
+        self.interval = interval
+        self._last_seen: Dict[Tuple, float] = {}
+        self._suppressed: Dict[Tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.interval <= 0:
+            return True
+
+        key = (record.pathname, record.lineno, record.getMessage(), getattr(record, 'session_id', None))
+        # 리스너가 늦게 꺼내도 간격이 어긋나지 않도록 레코드 생성 시각 기준
+        now = record.created
+
+        with self._lock:
+            last = self._last_seen.get(key)
+            if last is not None and now - last < self.interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+
+            self._last_seen[key] = now
+            record.suppressed = self._suppressed.pop(key, 0)
+            if len(self._last_seen) > self.MAX_KEYS:
+                self._prune(now)
+        return True
+
+    def _prune(self, now: float):
+        """생략 중인 메시지를 제외하고 interval이 지난 항목 삭제 (메시지 종류만큼 늘어나지 않도록)"""
+        for key, last in list(self._last_seen.items()):
+            if now - last >= self.interval and key not in self._suppressed:
+                del self._last_seen[key]
+
+
+class JsonFormatter(logging.Formatter):
+    """한 줄 JSON 형식의 구조화 로그"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'prompt_id': getattr(record, 'prompt_id', None),
+            'session_id': getattr(record, 'session_id', None),
+            'thread': record.threadName
+        }
+        if getattr(record, 'suppressed', 0):
+            entry['suppressed'] = record.suppressed
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """사람이 읽는 콘솔 형식 (문맥과 생략 횟수 포함)"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s - %(levelname)s - %(context)s%(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        context = []
+        if getattr(record, 'session_id', None) is not None:
+            context.append(f"세션 {record.session_id}")
+        if getattr(record, 'prompt_id', None) is not None:
+            context.append(f"행 {record.prompt_id}")
+        record.context = f"[{' / '.join(context)}] " if context else ''
+
+        message = super().format(record)
+        if getattr(record, 'suppressed', 0):
+            message += f" (반복 {record.suppressed}회 생략)"
+        return message
+
+
+class LazyQueueHandler(QueueHandler):
+    """메시지 포맷을 큐 리스너 스레드로 미루는 QueueHandler
+
+    기본 QueueHandler.prepare는 로그를 남기는 스레드에서 메시지를 포맷하므로,
+    같은 프로세스 안의 큐에서는 레코드를 그대로 넘긴다.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class FilteredQueueListener(QueueListener):
+    """큐에서 꺼낸 레코드에 필터를 적용한 뒤 핸들러로 넘기는 QueueListener
+
+    핸들러마다 필터를 붙이면 같은 레코드를 여러 번 보게 되므로 리스너에서 한 번만 적용한다.
+    """
+
+    def __init__(self, log_queue, *handlers, filters=(), respect_handler_level: bool = False):
+        super().__init__(log_queue, *handlers, respect_handler_level=respect_handler_level)
+        self.filters = list(filters)
+
+    def handle(self, record: logging.LogRecord):
+        if all(log_filter.filter(record) for log_filter in self.filters):
+            super().handle(record)
+
+
+def setup_logging(log_file: str = 'chatgpt_automation.log', level: int = logging.INFO,
+                  json_file: bool = True, repeat_interval: float = 30.0) -> QueueListener:
+    """큐 기반 비동기 로깅 설정 (이 프로세스에 이미 설정되어 있으면 기존 리스너 반환)
+
+    브라우저를 다루는 스레드는 큐에 레코드를 넣기만 하고, 파일/콘솔 출력은
+    별도 리스너 스레드가 담당한다. fork된 자식 프로세스는 부모의 리스너 스레드를
+    물려받지 못하므로 새로 설정한다.
+    """
+    global _listener, _listener_pid, _setup_kwargs
+
+    with _setup_lock:
+        if _listener is not None and _listener_pid == os.getpid():
+            return _listener
+
+        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler.setFormatter(
+            JsonFormatter() if json_file else TextFormatter()
+        )
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(TextFormatter())
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = LazyQueueHandler(log_queue)
+        # 문맥은 로그를 남기는 스레드에서만 알 수 있으므로 큐에 넣을 때 기록
+        queue_handler.addFilter(ContextFilter())
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+
+        _listener = FilteredQueueListener(log_queue, file_handler, stream_handler,
+                                          filters=[RateLimitFilter(repeat_interval)], respect_handler_level=True)
+        _listener.start()
+        _listener_pid = os.getpid()
+        atexit.register(shutdown_logging)
+        _register_process_exit_flush()
+        _setup_kwargs = {'log_file': log_file, 'level': level, 'json_file': json_file,
+                         'repeat_interval': repeat_interval}
+        return _listener
+
+
+def shutdown_logging():
+    """큐에 남은 로그를 모두 출력하고 리스너 종료"""
+    global _listener
+
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def _register_process_exit_flush(*_):
+    """multiprocessing 자식 프로세스는 os._exit로 끝나 atexit가 실행되지 않으므로 종료 시 정리 함수 등록"""
+    if 'multiprocessing' in sys.modules:
+        from multiprocessing import util
+        util.Finalize(None, shutdown_logging, exitpriority=0)
+
+
+def _reinit_after_fork():
+    """fork된 자식 프로세스에서 로깅을 다시 설정
+
+    자식에는 리스너 스레드가 복사되지 않아, 물려받은 큐에 넣은 로그는 아무도 꺼내지 않고
+    쌓이기만 한다 (run_parallel 작업 노드, 여러 파일 파싱용 프로세스 풀 등).
+    """
+    global _setup_lock
+
+    # fork 시점에 다른 스레드가 잡고 있던 잠금은 자식에서 풀리지 않으므로 새로 만듦
+    _setup_lock = threading.Lock()
+    if _listener is not None:
+        setup_logging(**_setup_kwargs)
+        if 'multiprocessing' in sys.modules:
+            # Process 시작 시 정리 함수 목록이 비워지므로 그 뒤에 다시 등록
+            from multiprocessing import util
+            util.register_after_fork(_listener, _register_process_exit_flush)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reinit_after_fork)
@@ -0,0 +1,192 @@
+# metrics.py
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+
+class Metric:
+    """Prometheus 텍스트 형식으로 출력되는 지표의 공통 부분"""
+
+    metric_type = 'untyped'
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.metric_type}"]
+
+
+class Counter(Metric):
+    """증가만 하는 누적 카운터"""
+
+    metric_type = 'counter'
+
+    def __init__(self, name: str, description: str):
+        super().__init__(name, description)
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def render(self) -> List[str]:
+        return super().render() + [f"{self.name} {self.value}"]
+
+
+class Gauge(Metric):
+    """현재 값을 나타내는 게이지"""
+
+    metric_type = 'gauge'
+
+    def __init__(self, name: str, description: str):
+        super().__init__(name, description)
+        self.value = 0.0
+
+    def set(self, value: float):
+        with self._lock:
+            self.value = value
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1):
+        with self._lock:
+            self.value -= amount
+
+    def render(self) -> List[str]:
+        return super().render() + [f"{self.name} {self.value}"]
+
+
+class Histogram(Metric):
+    """버킷별 누적 개수와 합계를 기록하는 히스토그램"""
+
+    metric_type = 'histogram'
+
+    DEFAULT_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+    def __init__(self, name: str, description: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, description)
+        self.buckets = tuple(sorted(buckets))
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.bucket_counts[i] += 1
+
+    @contextmanager
+    def time(self):
+        """with 블록의 실행 시간을 기록"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            lines = super().render()
+            for bound, count in zip(self.buckets, self.bucket_counts):
+                lines.append(f'{self.name}_bucket{{le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{le="+Inf"}} {self.count}')
+            lines.append(f"{self.name}_sum {self.sum}")
+            lines.append(f"{self.name}_count {self.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """지표 모음 및 Prometheus 텍스트 출력"""
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, description: str) -> Counter:
+        return self.register(Counter(name, description))
+
+    def gauge(self, name: str, description: str) -> Gauge:
+        return self.register(Gauge(name, description))
+
+    def histogram(self, name: str, description: str, buckets: Tuple[float, ...] = Histogram.DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, description, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# 프로세스 전역 지표 (처리 루프에서 직접 갱신)
+REGISTRY = MetricsRegistry()
+
+PROMPTS_SENT = REGISTRY.counter('chatgpt_prompts_sent_total', '전송한 프롬프트 수')
+PROMPTS_SUCCEEDED = REGISTRY.counter('chatgpt_prompts_succeeded_total', '처리에 성공한 프롬프트 수')
+PROMPTS_FAILED = REGISTRY.counter('chatgpt_prompts_failed_total', '처리에 실패한 프롬프트 수')
+RESPONSE_LATENCY = REGISTRY.histogram('chatgpt_response_latency_seconds', '프롬프트 전송부터 응답 완료까지 걸린 시간')
+IMAGE_GENERATION_LATENCY = REGISTRY.histogram('chatgpt_image_generation_latency_seconds', '응답 완료 후 이미지 생성 완료까지 걸린 시간')
+DOWNLOAD_BYTES = REGISTRY.counter('chatgpt_download_bytes_total', '다운로드한 이미지 바이트 수')
+DOWNLOAD_DURATION = REGISTRY.histogram('chatgpt_download_duration_seconds', '이미지 한 장 다운로드에 걸린 시간')
+EXCEL_FLUSH_DURATION = REGISTRY.histogram('chatgpt_excel_flush_seconds', '결과 버퍼 기록에 걸린 시간')
+REQUEST_INTERVAL = REGISTRY.gauge('chatgpt_rate_limit_interval_seconds', '요청 간 최소 간격')
+RATE_LIMIT_WAITING = REGISTRY.gauge('chatgpt_rate_limit_waiting', '요청 간격 대기 중이면 1')
+ACTIVE_SESSIONS = REGISTRY.gauge('chatgpt_active_sessions', '연결된 브라우저 세션 수')
+STARTUP_SECONDS = REGISTRY.gauge('chatgpt_startup_seconds', '프로세스 시작부터 첫 프롬프트 전송까지 걸린 시간')
+
+
+class MetricsServer:
+    """지표를 /metrics 경로로 제공하는 로컬 HTTP 서버 (백그라운드 스레드)"""
+
+    def __init__(self, port: int, host: str = '127.0.0.1', registry: Optional[MetricsRegistry] = None):
+        self.port = port
+        self.host = host
+        self.registry = registry or REGISTRY
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self.registry
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # 스크레이프 요청은 로그에 남기지 않음
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True)
+        self._thread.start()
+        logging.info(f"지표 엔드포인트 시작: http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            logging.info("지표 엔드포인트를 종료했습니다.")
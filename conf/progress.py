@@ -0,0 +1,98 @@
+# progress.py
+import sys
+import time
+import threading
+from typing import Optional, Dict, Any, TextIO
+
+
+class ProgressReporter:
+    """처리 속도, 예상 남은 시간, 처리 중 개수, 오류율을 주기적으로 출력하는 클래스"""
+
+    def __init__(self, total: int = 0, interval: float = 5.0, stream: Optional[TextIO] = None):
+        self.total = total
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.started_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, total: Optional[int] = None):
+        """진행 상황 출력 시작"""
+        if total is not None:
+            self.total = total
+        self.started_at = time.time()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="progress", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """출력 중지 후 마지막 상태를 한 번 더 출력"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self._print()
+
+    def task_started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def task_finished(self, success: bool):
+        with self._lock:
+            self.in_flight = max(self.in_flight - 1, 0)
+            self.completed += 1
+            if not success:
+                self.failed += 1
+
+    def update(self, completed: int, failed: int, in_flight: int):
+        """외부 집계(예: 공유 작업 큐)로 상태를 갱신"""
+        with self._lock:
+            self.completed = completed
+            self.failed = failed
+            self.in_flight = in_flight
+
+    def snapshot(self) -> Dict[str, Any]:
+        """현재 진행 상황 (행/분, ETA 초, 처리 중 개수, 오류율)"""
+        with self._lock:
+            completed, failed, in_flight = self.completed, self.failed, self.in_flight
+
+        elapsed = time.time() - self.started_at if self.started_at else 0
+        rows_per_min = completed / elapsed * 60 if elapsed > 0 else 0.0
+        remaining = max(self.total - completed, 0)
+        eta = remaining / rows_per_min * 60 if rows_per_min > 0 else None
+
+        return {
+            'completed': completed,
+            'total': self.total,
+            'failed': failed,
+            'in_flight': in_flight,
+            'elapsed': elapsed,
+            'rows_per_min': rows_per_min,
+            'eta': eta,
+            'error_rate': failed / completed if completed else 0.0
+        }
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._print()
+
+    def _print(self):
+        state = self.snapshot()
+        eta = self._format_duration(state['eta']) if state['eta'] is not None else '--:--'
+        line = (f"[진행] {state['completed']}/{state['total']} | "
+                f"{state['rows_per_min']:.1f}행/분 | ETA {eta} | "
+                f"처리 중 {state['in_flight']} | 오류율 {state['error_rate'] * 100:.1f}%")
+        print(line, file=self.stream, flush=True)
+
+    @staticmethod
+    def _format_duration(seconds: float) -> str:
+        seconds = int(seconds)
+        hours, remainder = divmod(seconds, 3600)
+        minutes, seconds = divmod(remainder, 60)
+        if hours:
+            return f"{hours}:{minutes:02d}:{seconds:02d}"
+        return f"{minutes:02d}:{seconds:02d}"
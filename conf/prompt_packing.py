@@ -0,0 +1,60 @@
+# prompt_packing.py
+import re
+from typing import Any, Dict, List
+
+from conf.prompt_type import detect_prompt_type
+
+
+# 묶음 메시지의 항목 구분 줄 (응답도 같은 형식으로 나눠 달라고 요청)
+SECTION_MARKER = "=== {number} ==="
+SECTION_PATTERN = re.compile(r'^[ \t]*=== ?(\d+) ?===[ \t]*$', re.MULTILINE)
+
+PACK_INSTRUCTION = (
+    "Answer each of the following {count} requests separately, in order.\n"
+    "Begin each answer with a line that contains only its marker (for example \"=== 1 ===\") "
+    "and write nothing before the first marker."
+)
+
+
+def is_packable(prompt: str, max_chars: int) -> bool:
+    """한 메시지로 묶어 보낼 수 있는 짧은 텍스트 프롬프트인지 확인"""
+    return len(prompt) <= max_chars and detect_prompt_type(prompt) == 'text'
+
+
+def pack_prompts(prompts: List[str]) -> str:
+    """프롬프트들을 번호 붙은 구역으로 나눈 하나의 메시지로 합침"""
+    sections = [PACK_INSTRUCTION.format(count=len(prompts))]
+    for number, prompt in enumerate(prompts, 1):
+        sections.append(f"{SECTION_MARKER.format(number=number)}\n{prompt.strip()}")
+    return "\n\n".join(sections)
+
+
+def split_packed_response(text: str, count: int) -> Dict[int, str]:
+    """묶음 응답을 번호별 답변으로 나눔
+
+    번호가 1~count 범위이고 한 번만 나오며 내용이 비어 있지 않은 구역만 반환한다.
+    빠진 번호는 호출하는 쪽에서 개별 전송으로 처리한다.
+    """
+    markers = list(SECTION_PATTERN.finditer(text or ''))
+    occurrences: Dict[int, int] = {}
+    bodies: Dict[int, str] = {}
+
+    for i, marker in enumerate(markers):
+        number = int(marker.group(1))
+        end = markers[i + 1].start() if i + 1 < len(markers) else len(text)
+        occurrences[number] = occurrences.get(number, 0) + 1
+        bodies[number] = text[marker.end():end].strip()
+
+    return {
+        number: body for number, body in bodies.items()
+        if 1 <= number <= count and occurrences[number] == 1 and body
+    }
+
+
+def make_pack(prompts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """처리 대기열에 넣을 묶음 항목 (로그/계정 배정에는 첫 행 번호와 합친 메시지를 사용)"""
+    return {
+        'packed': prompts,
+        'row_index': prompts[0]['row_index'],
+        'full_prompt': pack_prompts([prompt['full_prompt'] for prompt in prompts])
+    }
@@ -0,0 +1,146 @@
+# prompt_template.py
+import re
+import logging
+from typing import Dict, List, Optional, Tuple, Any
+
+import pandas as pd
+
+from config import Config
+
+
+# {{ column }} 치환, {% if column %} ... {% endif %} 조건부 구간 (중첩 불가)
+TOKEN_PATTERN = re.compile(r"\{\{\s*(.+?)\s*\}\}|\{%\s*if\s+(.+?)\s*%\}(.*?)\{%\s*endif\s*%\}", re.DOTALL)
+
+
+class PromptTemplate:
+    """Jinja 형식의 플레이스홀더로 시트의 열을 조합하는 프롬프트 템플릿
+
+    템플릿은 생성 시 한 번만 컴파일되고, 같은 입력 조합의 결과는 캐시되어
+    반복되는 행은 다시 렌더링하지 않는다.
+    """
+
+    def __init__(self, source: str, max_cache_size: int = 100000):
+        self.source = source
+        self.max_cache_size = max_cache_size
+        self.segments = self._compile(source)
+        self.fields: Tuple[str, ...] = tuple(dict.fromkeys(self._collect_fields(self.segments)))
+        self._cache: Dict[Tuple[str, ...], str] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _compile(self, source: str) -> List[tuple]:
+        """템플릿 문자열을 (종류, 값) 세그먼트 목록으로 변환"""
+        segments = []
+        position = 0
+
+        for match in TOKEN_PATTERN.finditer(source):
+            if match.start() > position:
+                segments.append(('text', source[position:match.start()]))
+
+            if match.group(1) is not None:
+                segments.append(('field', match.group(1)))
+            else:
+                segments.append(('if', match.group(2), self._compile(match.group(3))))
+
+            position = match.end()
+
+        if position < len(source):
+            segments.append(('text', source[position:]))
+
+        for segment in segments:
+            if segment[0] == 'text' and ('{{' in segment[1] or '{%' in segment[1]):
+                raise ValueError(f"템플릿 구문 오류: {segment[1]!r}")
+
+        return segments
+
+    def _collect_fields(self, segments: List[tuple]) -> List[str]:
+        fields = []
+        for segment in segments:
+            if segment[0] == 'field':
+                fields.append(segment[1])
+            elif segment[0] == 'if':
+                fields.append(segment[1])
+                fields.extend(self._collect_fields(segment[2]))
+        return fields
+
+    def _render_segments(self, segments: List[tuple], values: Dict[str, str]) -> str:
+        parts = []
+        for segment in segments:
+            if segment[0] == 'text':
+                parts.append(segment[1])
+            elif segment[0] == 'field':
+                parts.append(values.get(segment[1], ''))
+            elif values.get(segment[1]):
+                parts.append(self._render_segments(segment[2], values))
+        return ''.join(parts)
+
+    @staticmethod
+    def _clean_value(value: Any) -> str:
+        if value is None or (isinstance(value, float) and pd.isna(value)):
+            return ''
+        text = str(value).strip()
+        return '' if text.lower() == 'nan' else text
+
+    def render(self, values: Dict[str, Any]) -> str:
+        """한 행의 값으로 렌더링 (캐시 사용)"""
+        key = tuple(self._clean_value(values.get(field)) for field in self.fields)
+        return self._render_key(key)
+
+    def _render_key(self, key: Tuple[str, ...]) -> str:
+        rendered = self._cache.get(key)
+        if rendered is not None:
+            self.cache_hits += 1
+            return rendered
+
+        self.cache_misses += 1
+        rendered = self._render_segments(self.segments, dict(zip(self.fields, key))).strip()
+
+        if len(self._cache) >= self.max_cache_size:
+            self._cache.clear()
+        self._cache[key] = rendered
+        return rendered
+
+    def resolve_columns(self, columns) -> Dict[str, Optional[str]]:
+        """템플릿 필드에 해당하는 실제 열 이름 찾기 (정확히 일치 우선, 없으면 대소문자 무시)"""
+        normalized = {str(column).strip().lower(): column for column in columns}
+        resolved = {}
+        for field in self.fields:
+            if field in columns:
+                resolved[field] = field
+            else:
+                resolved[field] = normalized.get(field.lower())
+        return resolved
+
+    def render_bulk(self, df: pd.DataFrame) -> pd.Series:
+        """모든 행을 일괄 렌더링 (같은 입력 조합은 한 번만 렌더링)"""
+        resolved = self.resolve_columns(df.columns)
+        missing = [field for field, column in resolved.items() if column is None]
+        if missing:
+            logging.warning(f"템플릿 필드에 해당하는 열이 없습니다 (빈 값으로 처리): {', '.join(missing)}")
+
+        cleaned = [
+            df[column].map(self._clean_value) if column is not None else pd.Series('', index=df.index)
+            for column in resolved.values()
+        ]
+
+        rendered = [self._render_key(key) for key in zip(*cleaned)] if cleaned else \
+            [self._render_key(()) for _ in range(len(df))]
+
+        logging.info(f"템플릿 렌더링 완료: {len(df)}행 (캐시 적중 {self.cache_hits}, 렌더링 {self.cache_misses})")
+        return pd.Series(rendered, index=df.index, dtype=object)
+
+
+def load_prompt_template(config: Config) -> Optional[PromptTemplate]:
+    """Config에 지정된 템플릿(문자열 또는 파일)을 컴파일"""
+    source = config.prompt_template
+
+    if not source and config.prompt_template_path:
+        with open(config.prompt_template_path, 'r', encoding='utf-8') as f:
+            source = f.read()
+
+    if not source:
+        return None
+
+    template = PromptTemplate(source.strip())
+    logging.info(f"프롬프트 템플릿을 컴파일했습니다 (필드: {', '.join(template.fields)})")
+    return template
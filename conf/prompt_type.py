@@ -0,0 +1,18 @@
+# prompt_type.py
+# 브라우저 없이도 (실행 계획, 시트 검증 등) 쓸 수 있도록 selenium에 의존하지 않는 모듈로 분리
+
+IMAGE_KEYWORDS = (
+    'generate', 'create', 'draw', 'paint', 'design', 'illustration',
+    'picture', 'image', 'photo', 'artwork', 'sketch', 'render',
+    '생성', '그려', '만들어', '디자인', '일러스트', '그림', '사진'
+)
+
+
+def detect_prompt_type(prompt: str) -> str:
+    """프롬프트 타입 감지 (이미지 생성 vs 텍스트)"""
+    prompt_lower = prompt.lower()
+
+    if any(keyword in prompt_lower for keyword in IMAGE_KEYWORDS):
+        return "image"
+    else:
+        return "text"
@@ -0,0 +1,145 @@
+# response_stream.py
+import os
+import time
+import logging
+from typing import Optional, Dict, Any
+
+
+# 어시스턴트 메시지에 MutationObserver를 붙여 텍스트 변경분(delta)을 큐에 쌓는 스크립트
+INSTALL_OBSERVER_SCRIPT = """
+const el = arguments[0];
+const prev = window.__chatgptStream;
+if (prev && prev.observer) { prev.observer.disconnect(); }
+const state = {text: '', deltas: [], observer: null};
+const push = () => {
+    const text = el.innerText || '';
+    if (text === state.text) { return; }
+    if (text.startsWith(state.text)) {
+        state.deltas.push({reset: false, text: text.slice(state.text.length)});
+    } else {
+        state.deltas.push({reset: true, text: text});
+    }
+    state.text = text;
+};
+state.observer = new MutationObserver(push);
+state.observer.observe(el, {childList: true, subtree: true, characterData: true});
+window.__chatgptStream = state;
+push();
+return true;
+"""
+
+# 쌓인 delta를 꺼내고 큐를 비우는 스크립트
+DRAIN_SCRIPT = """
+const state = window.__chatgptStream;
+if (!state) { return []; }
+const deltas = state.deltas;
+state.deltas = [];
+return deltas;
+"""
+
+STOP_OBSERVER_SCRIPT = """
+const state = window.__chatgptStream;
+if (state && state.observer) { state.observer.disconnect(); }
+window.__chatgptStream = null;
+"""
+
+
+class ResponseStreamCapture:
+    """응답 텍스트를 생성되는 동안 점진적으로 수집해 파일에 기록하는 클래스"""
+
+    def __init__(self, driver, output_path: str):
+        self.driver = driver
+        self.output_path = output_path
+        self.sent_at: Optional[float] = None
+        self.first_token_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.text = ""
+        self.attached = False
+        self._file = None
+
+    def start(self):
+        """프롬프트 전송 시점 기록 및 출력 파일 열기"""
+        os.makedirs(os.path.dirname(self.output_path) or ".", exist_ok=True)
+        self._file = open(self.output_path, 'w', encoding='utf-8')
+        self.sent_at = time.time()
+
+    def attach(self, turn_element) -> bool:
+        """현재 턴의 어시스턴트 메시지에 옵저버 설치"""
+        try:
+            self.attached = bool(self.driver.execute_script(INSTALL_OBSERVER_SCRIPT, turn_element))
+        except Exception as e:
+            logging.debug("스트림 옵저버 설치 실패: %s", e)
+            self.attached = False
+        return self.attached
+
+    def poll(self) -> int:
+        """새로 쌓인 delta를 가져와 파일에 기록하고, 추가된 문자 수를 반환"""
+        if not self.attached or not self._file:
+            return 0
+
+        try:
+            deltas = self.driver.execute_script(DRAIN_SCRIPT) or []
+        except Exception as e:
+            logging.debug("스트림 delta 수집 실패: %s", e)
+            return 0
+
+        added = 0
+        for delta in deltas:
+            chunk = delta.get('text', '')
+            if delta.get('reset'):
+                # 마크다운 재렌더링 등으로 앞부분이 바뀐 경우 전체를 다시 기록
+                self.text = chunk
+                self._file.seek(0)
+                self._file.truncate()
+            else:
+                self.text += chunk
+            self._file.write(chunk)
+            added += len(chunk)
+
+        if added:
+            self._file.flush()
+            if self.first_token_at is None and self.text.strip():
+                self.first_token_at = time.time()
+
+        return added
+
+    def finish(self) -> Dict[str, Any]:
+        """남은 delta를 기록하고 옵저버를 해제한 뒤 통계를 반환"""
+        self.poll()
+        try:
+            if self.attached:
+                self.driver.execute_script(STOP_OBSERVER_SCRIPT)
+        except Exception as e:
+            logging.debug("스트림 옵저버 해제 실패: %s", e)
+
+        if self._file:
+            self._file.close()
+            self._file = None
+
+        self.finished_at = time.time()
+        return self.get_stats()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """첫 토큰까지의 시간(TTFT)과 초당 토큰 수
+
+        토큰 수는 공백 기준 단어 수로 근사한다.
+        """
+        ttft = None
+        tokens_per_sec = None
+        token_count = len(self.text.split())
+
+        if self.sent_at is not None and self.first_token_at is not None:
+            ttft = self.first_token_at - self.sent_at
+
+            end = self.finished_at or time.time()
+            generation_time = end - self.first_token_at
+            if generation_time > 0:
+                tokens_per_sec = token_count / generation_time
+
+        return {
+            'path': self.output_path,
+            'chars': len(self.text),
+            'tokens': token_count,
+            'ttft': ttft,
+            'tokens_per_sec': tokens_per_sec
+        }
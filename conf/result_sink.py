@@ -0,0 +1,156 @@
+# result_sink.py
+import os
+import glob
+import logging
+from typing import Dict, List, Any, Set
+
+import numpy as np
+import pandas as pd
+
+from conf.metrics import EXCEL_FLUSH_DURATION
+
+
+def processed_flags(values: pd.Series) -> pd.Series:
+    """processed 열 값을 불리언으로 변환
+
+    처리하지 않은 행은 빈 셀로 남으므로 Excel에서 다시 읽으면 열이 float(nan/1.0/0.0)가
+    된다. 문자열 'true'와 숫자 1을 모두 처리 완료로 본다.
+    """
+    text = values.astype(str).str.strip().str.lower()
+    return (text == 'true') | (pd.to_numeric(values, errors='coerce') == 1)
+
+
+class ResultSink:
+    """처리 결과를 열(column) 단위 버퍼에 모았다가 한 번에 기록하는 클래스
+
+    output_format:
+        - 'excel': 원본 Excel 파일에 벡터화된 병합으로 한 번에 기록
+        - 'csv': 원본은 건드리지 않고 CSV 사이드 파일에 이어쓰기
+        - 'parquet': 원본은 건드리지 않고 Parquet 조각 파일로 기록 (pyarrow 필요)
+    """
+
+    COLUMNS = ('download_count', 'download_time', 'status', 'processed')
+    OUTPUT_FORMATS = ('excel', 'csv', 'parquet')
+
+    def __init__(self, excel_handler, output_format: str = 'excel',
+                 output_dir: str = None, flush_every: int = 50):
+        if output_format not in self.OUTPUT_FORMATS:
+            raise ValueError(f"지원되지 않는 결과 출력 형식입니다: {output_format}")
+
+        self.excel_handler = excel_handler
+        self.output_format = output_format
+        self.output_dir = output_dir or os.path.dirname(os.path.abspath(excel_handler.excel_path))
+        self.flush_every = flush_every
+        self.flushed_rows = 0
+        self._part = 0
+        self._reset_buffer()
+
+    def _reset_buffer(self):
+        self._rows: List[int] = []
+        self._columns: Dict[str, List[Any]] = {column: [] for column in self.COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def record(self, row_index: int, download_count: int = 0, download_time: str = '',
+               status: str = '', processed: bool = True):
+        """결과 한 건을 버퍼에 추가 (row_index는 DataFrame 인덱스)"""
+        self._rows.append(row_index)
+        self._columns['download_count'].append(download_count)
+        self._columns['download_time'].append(download_time)
+        self._columns['status'].append(status)
+        self._columns['processed'].append(processed)
+
+        if self.flush_every and len(self._rows) >= self.flush_every:
+            self.flush()
+
+    def to_frame(self) -> pd.DataFrame:
+        """버퍼를 NumPy 배열 기반 DataFrame으로 변환 (같은 행은 마지막 결과 유지)"""
+        index = np.asarray(self._rows, dtype=np.int64)
+        frame = pd.DataFrame({
+            'download_count': np.asarray(self._columns['download_count'], dtype=np.int64),
+            'download_time': np.asarray(self._columns['download_time'], dtype=object),
+            'status': np.asarray(self._columns['status'], dtype=object),
+            'processed': np.asarray(self._columns['processed'], dtype=bool)
+        }, index=index)
+        return frame[~frame.index.duplicated(keep='last')]
+
+    def flush(self) -> int:
+        """버퍼의 결과를 기록하고 기록한 행 수를 반환"""
+        if not self._rows:
+            return 0
+
+        frame = self.to_frame()
+
+        try:
+            with EXCEL_FLUSH_DURATION.time():
+                self._write(frame)
+
+        except Exception as e:
+            logging.error(f"결과 기록 실패: {str(e)}")
+            raise
+
+        self.flushed_rows += len(frame)
+        self._reset_buffer()
+        logging.info(f"{len(frame)}개 행의 결과를 기록했습니다 ({self.output_format}).")
+        return len(frame)
+
+    def _write(self, frame: pd.DataFrame):
+        if self.output_format == 'excel':
+            self.excel_handler.merge_result_frame(frame)
+        elif self.output_format == 'csv':
+            self._write_csv(frame)
+        else:
+            self._write_parquet(frame)
+
+    def load_processed_rows(self) -> Set[int]:
+        """이전 실행에서 처리 완료된 행 인덱스 (이어하기용)"""
+        try:
+            if self.output_format == 'excel':
+                frame = pd.read_excel(self.excel_handler.excel_path)
+            elif self.output_format == 'csv':
+                path = f"{self._side_file_base()}.csv"
+                if not os.path.exists(path):
+                    return set()
+                frame = pd.read_csv(path, index_col='row_index')
+            else:
+                paths = sorted(glob.glob(f"{self._side_file_base()}-*.parquet"))
+                if not paths:
+                    return set()
+                frame = pd.concat([pd.read_parquet(path) for path in paths])
+
+        except Exception as e:
+            logging.error(f"처리 이력 읽기 실패: {str(e)}")
+            return set()
+
+        if 'processed' not in frame.columns:
+            return set()
+
+        # 같은 행이 여러 번 기록된 경우 마지막 결과 기준
+        frame = frame[~frame.index.duplicated(keep='last')]
+        processed = processed_flags(frame['processed'])
+        return set(int(index) for index in frame.index[processed])
+
+    def _side_file_base(self) -> str:
+        name = os.path.splitext(os.path.basename(self.excel_handler.excel_path))[0]
+        os.makedirs(self.output_dir, exist_ok=True)
+        return os.path.join(self.output_dir, f"{name}_results")
+
+    def _write_csv(self, frame: pd.DataFrame):
+        path = f"{self._side_file_base()}.csv"
+        write_header = not os.path.exists(path)
+        frame.to_csv(path, mode='a', header=write_header, index_label='row_index', encoding='utf-8')
+
+    def _write_parquet(self, frame: pd.DataFrame):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("Parquet 출력에는 pyarrow 패키지가 필요합니다.")
+
+        # 이전 실행의 조각 파일을 덮어쓰지 않도록 다음 번호를 사용
+        base = self._side_file_base()
+        self._part += 1
+        while os.path.exists(f"{base}-{self._part:05d}.parquet"):
+            self._part += 1
+        path = f"{base}-{self._part:05d}.parquet"
+        frame.rename_axis('row_index').to_parquet(path)
@@ -0,0 +1,181 @@
+# retry.py
+import time
+import random
+import logging
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Deque, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+
+class FailureClass(str, Enum):
+    """재시도 정책을 구분하기 위한 실패 유형"""
+    INPUT_NOT_FOUND = 'input_not_found'
+    RESPONSE_TIMEOUT = 'response_timeout'
+    RATE_LIMITED = 'rate_limited'
+    DOWNLOAD_FAILED = 'download_failed'
+    SESSION_DEAD = 'session_dead'
+    UNKNOWN = 'unknown'
+
+
+@dataclass
+class RetryPolicy:
+    """실패 유형별 재시도 횟수와 지수 백오프 설정"""
+    max_retries: int = 2
+    base_delay: float = 5.0
+    max_delay: float = 120.0
+    # True면 대기하는 동안 다른 행도 처리하지 않음 (계정 단위 사용 제한 등)
+    pause_all: bool = False
+
+    def get_delay(self, attempt: int) -> float:
+        """attempt번째 재시도 전 대기 시간 (equal jitter 지수 백오프: 상한의 절반~상한 사이)"""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** max(attempt - 1, 0)))
+        return random.uniform(ceiling / 2, ceiling)
+
+
+DEFAULT_RETRY_POLICIES: Dict[FailureClass, RetryPolicy] = {
+    FailureClass.INPUT_NOT_FOUND: RetryPolicy(max_retries=2, base_delay=5, max_delay=30),
+    FailureClass.RESPONSE_TIMEOUT: RetryPolicy(max_retries=2, base_delay=10, max_delay=120),
+    FailureClass.RATE_LIMITED: RetryPolicy(max_retries=5, base_delay=60, max_delay=900, pause_all=True),
+    FailureClass.DOWNLOAD_FAILED: RetryPolicy(max_retries=3, base_delay=1, max_delay=10),
+    FailureClass.SESSION_DEAD: RetryPolicy(max_retries=2, base_delay=5, max_delay=60),
+    FailureClass.UNKNOWN: RetryPolicy(max_retries=1, base_delay=5, max_delay=30),
+}
+
+# 오류 메시지로 실패 유형을 추정하기 위한 키워드 (소문자 기준)
+FAILURE_KEYWORDS = (
+    (FailureClass.SESSION_DEAD, ('invalid session id', 'no such window', 'disconnected', 'session deleted',
+                                 'chrome not reachable', 'target window already closed')),
+    (FailureClass.RATE_LIMITED, ('rate limit', 'too many requests', "you've reached", '사용 한도')),
+    (FailureClass.INPUT_NOT_FOUND, ('입력창을 찾을 수 없습니다',)),
+    (FailureClass.RESPONSE_TIMEOUT, ('응답 대기 시간 초과', 'timed out', 'timeout')),
+    (FailureClass.DOWNLOAD_FAILED, ('다운로드',)),
+)
+
+
+def classify_failure(error: Union[str, BaseException, None]) -> FailureClass:
+    """오류 메시지나 예외로 실패 유형 분류"""
+    if error is None:
+        return FailureClass.UNKNOWN
+
+    text = str(error).lower()
+    for failure, keywords in FAILURE_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return failure
+    return FailureClass.UNKNOWN
+
+
+class RetryQueue:
+    """재시도할 행을 큐의 뒤에 다시 넣는 작업 큐
+
+    재시도 대기 중인 행은 건너뛰고 준비된 행을 먼저 꺼내므로, 실패한 행의 백오프가
+    정상적인 행의 처리를 막지 않는다. 원본 제너레이터는 아직 새 항목이 없을 때 None을
+    내보내 대기 중인 재시도를 먼저 처리하게 할 수 있다 (감시 모드).
+    """
+
+    def __init__(self, items: Iterable[Any], policies: Optional[Dict[FailureClass, RetryPolicy]] = None):
+        self.policies = policies or DEFAULT_RETRY_POLICIES
+        # 아직 꺼내지 않은 원본 항목 (제너레이터면 필요할 때만 읽음)
+        self._source = iter(items)
+        self._source_exhausted = False
+        # 대기열 (item, 재시도 횟수, 처리 가능 시각)
+        self._queue: Deque[Tuple[Any, int, float]] = deque()
+        self._attempts: Dict[int, Dict[FailureClass, int]] = {}
+        self._paused_until = 0.0
+
+        # 목록이 주어지면 바로 대기열에 올림
+        if isinstance(items, (list, tuple)):
+            self._queue.extend((item, 0, 0.0) for item in items)
+            self._source_exhausted = True
+
+    def __len__(self) -> int:
+        """대기열에 올라온 항목 수 (아직 읽지 않은 원본 항목은 제외)"""
+        return len(self._queue)
+
+    def has_pending(self) -> bool:
+        """처리할 항목이 남아 있는지 확인 (원본이 None을 내보내는 동안은 계속 기다림)"""
+        while not self._queue and self._fill_from_source():
+            pass
+        return bool(self._queue)
+
+    def __iter__(self) -> Iterator[Tuple[Any, int]]:
+        """(item, 재시도 횟수)를 준비되는 순서대로 반환 (필요하면 대기)"""
+        while self.has_pending():
+            item, attempt = self._pop_ready()
+            yield item, attempt
+
+    def _fill_from_source(self) -> bool:
+        """원본에서 항목 하나를 대기열에 올림 (원본이 끝났으면 False, None은 건너뜀)"""
+        if self._source_exhausted:
+            return False
+        try:
+            item = next(self._source)
+            if item is not None:
+                self._queue.append((item, 0, 0.0))
+            return True
+        except StopIteration:
+            self._source_exhausted = True
+            return False
+
+    def _pop_ready(self) -> Tuple[Any, int]:
+        while True:
+            now = time.time()
+            if self._paused_until > now:
+                time.sleep(self._paused_until - now)
+                continue
+
+            # 준비된 첫 항목 찾기 (대기 중인 항목은 순서를 유지한 채 건너뜀)
+            for position, (item, attempt, not_before) in enumerate(self._queue):
+                if not_before <= now:
+                    del self._queue[position]
+                    return item, attempt
+
+            # 대기열이 모두 재시도 대기 중이면 원본에서 새 항목을 가져옴
+            if self._fill_from_source():
+                continue
+
+            earliest = min(not_before for _, _, not_before in self._queue)
+            time.sleep(max(earliest - now, 0))
+
+    def push(self, item: Any, attempt: int = 0):
+        """새 항목을 대기열 뒤에 바로 추가 (재시도 횟수 제한 없음)"""
+        self._queue.append((item, attempt, 0.0))
+
+    def retry(self, item: Any, failure: FailureClass, attempt: int) -> bool:
+        """재시도 가능하면 큐 뒤에 다시 넣고 True, 한도를 넘으면 False
+
+        재시도 한도는 실패 유형별로 센다.
+        """
+        policy = self.policies.get(failure, self.policies[FailureClass.UNKNOWN])
+        counts = self._attempts.setdefault(id(item), {})
+        retries = counts.get(failure, 0)
+
+        if retries >= policy.max_retries:
+            self._attempts.pop(id(item), None)
+            return False
+
+        counts[failure] = retries + 1
+        delay = policy.get_delay(retries + 1)
+        not_before = time.time() + delay
+        self._queue.append((item, attempt + 1, not_before))
+
+        if policy.pause_all:
+            self._paused_until = max(self._paused_until, not_before)
+
+        logging.warning("재시도 예약 (%s, %d/%d회, %.1f초 후)", failure.value, retries + 1, policy.max_retries, delay)
+        return True
+
+    def done(self, item: Any):
+        """처리가 끝난 항목의 재시도 기록 정리"""
+        self._attempts.pop(id(item), None)
+
+
+def call_with_retry(func, policy: RetryPolicy, *args, **kwargs):
+    """결과가 참이 될 때까지 정책에 따라 바로 재시도 (현재 턴 안에서 끝나야 하는 작업용)"""
+    result = func(*args, **kwargs)
+    for attempt in range(1, policy.max_retries + 1):
+        if result:
+            break
+        time.sleep(policy.get_delay(attempt))
+        result = func(*args, **kwargs)
+    return result
@@ -0,0 +1,40 @@
+# run_journal.py
+import os
+import json
+import time
+import logging
+from typing import Dict, Any, Iterator
+
+
+class RunJournal:
+    """행별 처리 결과를 디스크에 한 줄씩(JSON Lines) 기록하는 실행 저널
+
+    메모리에는 최근 결과만 남기고 전체 이력은 저널에서 다시 읽는다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8', buffering=1)
+        self.records_written = 0
+
+    def write(self, record: Dict[str, Any]):
+        """결과 한 건 기록 (줄 단위 버퍼라 즉시 디스크에 반영됨)"""
+        record = {'time': time.strftime('%Y-%m-%d %H:%M:%S'), **record}
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self.records_written += 1
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """저널에 기록된 결과를 순서대로 읽기"""
+        self._file.flush()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+            logging.info("실행 저널 기록 완료: %s (%d건)", self.path, self.records_written)
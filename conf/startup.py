@@ -0,0 +1,72 @@
+# startup.py
+import os
+import sys
+import json
+import time
+import subprocess
+from typing import Any, Dict, Optional
+
+# 시작 경로(main 임포트)에서 불러오면 안 되는 무거운 의존성 - 실제로 쓰는 시점에 불러온다
+HEAVY_MODULES = ('selenium', 'requests', 'PIL', 'pandas', 'numpy', 'openpyxl')
+
+# main 모듈 임포트 시간 한도 (초)
+IMPORT_TIME_BUDGET = 0.3
+
+# main.py가 있는 저장소 루트 (어느 디렉토리에서 실행해도 같은 모듈을 측정)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_MEASURE_SCRIPT = """
+import sys, json, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import_time(module: str = 'main', budget: float = IMPORT_TIME_BUDGET, runs: int = 3) -> Dict[str, Any]:
+    """새 인터프리터에서 모듈 임포트 시간을 재고 한도와 무거운 의존성 로드 여부를 확인
+
+    캐시 영향을 줄이기 위해 runs번 측정해 가장 짧은 시간을 사용한다. 임포트에 실패하면
+    오류 메시지(error)와 함께 한도 초과로 보고한다.
+    """
+    script = _MEASURE_SCRIPT.format(module=module, heavy=HEAVY_MODULES)
+    samples = []
+    loaded = []
+
+    for _ in range(max(runs, 1)):
+        completed = subprocess.run(
+            [sys.executable, '-c', script], capture_output=True, text=True, cwd=PROJECT_ROOT
+        )
+        if completed.returncode != 0:
+            stderr_lines = completed.stderr.strip().splitlines()
+            return {
+                'module': module,
+                'import_seconds': None,
+                'budget_seconds': budget,
+                'heavy_modules_loaded': [],
+                'within_budget': False,
+                'error': stderr_lines[-1] if stderr_lines else f"종료 코드 {completed.returncode}"
+            }
+
+        measurement = json.loads(completed.stdout.strip().splitlines()[-1])
+        samples.append(measurement['seconds'])
+        loaded = measurement['loaded']
+
+    seconds = min(samples)
+    return {
+        'module': module,
+        'import_seconds': seconds,
+        'budget_seconds': budget,
+        'heavy_modules_loaded': loaded,
+        'within_budget': seconds <= budget and not loaded
+    }
+
+
+def seconds_since_process_start() -> Optional[float]:
+    """현재 프로세스가 시작된 뒤 지난 시간 (초)"""
+    try:
+        import psutil
+        return time.time() - psutil.Process().create_time()
+    except Exception:
+        return None
@@ -0,0 +1,215 @@
+# workbook_batch.py
+import os
+import glob
+import logging
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from conf.excel_handler import ExcelHandler
+from conf.prompt_template import PromptTemplate
+from conf.metrics import EXCEL_FLUSH_DURATION
+
+
+# 여러 파일 작업에서 쓰는 행 식별자 (원본 파일 절대 경로, 시트 이름, DataFrame 인덱스)
+RowKey = Tuple[str, str, int]
+
+GLOB_CHARS = ('*', '?', '[')
+
+
+def is_workbook_batch(source: str) -> bool:
+    """경로가 여러 Excel 파일을 가리키는지 (디렉토리 또는 glob 패턴)"""
+    return os.path.isdir(source) or any(char in source for char in GLOB_CHARS)
+
+
+def discover_workbooks(source: str) -> List[str]:
+    """디렉토리나 glob 패턴에 해당하는 .xlsx 파일 목록 (정렬된 절대 경로)
+
+    열려 있는 Excel이 만드는 잠금 파일(~$...)은 제외한다. .xls 파일은 결과를 시트에
+    다시 기록할 수 없어 건너뛴다.
+    """
+    pattern = os.path.join(source, '*') if os.path.isdir(source) else source
+
+    paths = []
+    for path in sorted(glob.glob(pattern)):
+        name = os.path.basename(path)
+        if not os.path.isfile(path) or name.startswith('~$'):
+            continue
+        if name.endswith('.xls'):
+            logging.warning(f".xls 파일은 여러 파일 작업에서 지원하지 않아 건너뜁니다: {path}")
+            continue
+        if name.endswith('.xlsx'):
+            paths.append(os.path.abspath(path))
+    return paths
+
+
+def _parse_workbook(path: str, template: Optional[PromptTemplate]) -> Dict[str, Dict[str, Any]]:
+    """프로세스 풀에서 실행되는 파일 하나의 파싱 (모든 시트)"""
+    return ExcelHandler(path, template).get_prompts_from_all_sheets()
+
+
+class WorkbookSet:
+    """여러 Excel 파일의 모든 시트를 하나의 작업으로 묶는 클래스
+
+    ExcelHandler와 같은 읽기 메서드를 제공하므로 ChatGPTAutomation이 그대로 사용할 수 있다
+    (추가되는 행 감지는 지원하지 않아 감시 모드와는 함께 쓸 수 없다).
+    파일은 프로세스 풀에서 동시에 파싱하고, 프롬프트는 우선순위(높은 순) → 파일 순서 →
+    시트 순서 → 행 순서로 하나의 목록에 합친다. 각 프롬프트에는 원본 파일(source)과
+    시트(sheet)가 붙는다.
+    """
+
+    def __init__(self, source: str, template: Optional[PromptTemplate] = None,
+                 max_workers: Optional[int] = None):
+        self.source = source
+        self.template = template
+        self.max_workers = max_workers
+        self.paths = discover_workbooks(source)
+        if not self.paths:
+            raise FileNotFoundError(f"처리할 Excel 파일을 찾을 수 없습니다: {source}")
+
+        # 저널 등 파일 이름을 만들 때 쓰는 가상의 경로 (공통 디렉토리 아래 'workbooks')
+        self.excel_path = os.path.join(os.path.commonpath([os.path.dirname(path) for path in self.paths]),
+                                       "workbooks")
+        self.processed_rows: Set[RowKey] = set()
+        self.errors: List[str] = []
+        self._prompts: Optional[List[Dict[str, Any]]] = None
+
+    def _parse_all(self) -> Iterator[Tuple[str, Dict[str, Dict[str, Any]]]]:
+        """(파일 경로, 시트별 파싱 결과)를 파일 순서대로 반환 (실패한 파일은 기록 후 건너뜀)"""
+        if len(self.paths) == 1 or self.max_workers == 1:
+            futures = None
+        else:
+            executor = ProcessPoolExecutor(max_workers=min(self.max_workers or os.cpu_count() or 1, len(self.paths)))
+            futures = [executor.submit(_parse_workbook, path, self.template) for path in self.paths]
+
+        try:
+            for i, path in enumerate(self.paths):
+                try:
+                    sheets = futures[i].result() if futures else _parse_workbook(path, self.template)
+                except Exception as e:
+                    error_msg = f"Excel 파일 읽기 실패 ({path}): {str(e)}"
+                    logging.error(error_msg)
+                    self.errors.append(error_msg)
+                    continue
+                yield path, sheets
+        finally:
+            if futures:
+                executor.shutdown()
+
+    def load(self) -> List[Dict[str, Any]]:
+        """모든 파일/시트의 프롬프트를 우선순위 순으로 합친 목록 (한 번만 파싱)"""
+        if self._prompts is not None:
+            return self._prompts
+
+        merged = []
+        sheet_count = 0
+        for workbook_order, (path, sheets) in enumerate(self._parse_all()):
+            for sheet_order, (sheet_name, parsed) in enumerate(sheets.items()):
+                sheet_count += 1
+                self.processed_rows.update((path, sheet_name, index) for index in parsed['processed'])
+                for prompt in parsed['prompts']:
+                    prompt['source'] = path
+                    merged.append(((-prompt['priority'], workbook_order, sheet_order, prompt['row_index']), prompt))
+
+        merged.sort(key=lambda item: item[0])
+        self._prompts = [prompt for _, prompt in merged]
+        logging.info(f"{len(self.paths)}개 파일, {sheet_count}개 시트에서 {len(self._prompts)}개의 프롬프트를 읽었습니다.")
+        return self._prompts
+
+    def get_unprocessed_prompts(self) -> List[Dict[str, Any]]:
+        return list(self.load())
+
+    def iter_prompts(self, chunk_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """우선순위로 정렬하려면 전체를 읽어야 하므로 파싱한 목록을 차례로 반환"""
+        return iter(self.load())
+
+    def estimate_prompt_count(self) -> int:
+        return len(self.load())
+
+
+class MultiSheetResultSink:
+    """여러 파일/시트의 결과를 모았다가 파일마다 한 번씩 원래 시트에 기록하는 클래스
+
+    결과 열은 시트의 헤더에서 찾고 없으면 오른쪽 끝에 추가한다. openpyxl로 셀만 고치므로
+    다른 시트와 서식은 그대로 유지된다. ResultSink와 달리 CSV/Parquet 출력은 없다
+    (ChatGPTAutomation이 result_output이 'excel'이 아니면 거부).
+    """
+
+    COLUMNS = ('download_count', 'download_time', 'status', 'processed')
+
+    def __init__(self, workbook_set: WorkbookSet, flush_every: int = 50):
+        self.workbook_set = workbook_set
+        self.flush_every = flush_every
+        self.flushed_rows = 0
+        # 같은 행은 마지막 결과만 유지
+        self._buffer: Dict[RowKey, Tuple[Any, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def record(self, row_key: RowKey, download_count: int = 0, download_time: str = '',
+               status: str = '', processed: bool = True):
+        """결과 한 건을 버퍼에 추가 (row_key는 (원본 파일, 시트, DataFrame 인덱스))"""
+        self._buffer[row_key] = (download_count, download_time, status, processed)
+
+        if self.flush_every and len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> int:
+        """버퍼의 결과를 원본 파일별로 묶어 기록하고 기록한 행 수를 반환"""
+        if not self._buffer:
+            return 0
+
+        by_workbook: Dict[str, Dict[str, Dict[int, Tuple[Any, ...]]]] = defaultdict(lambda: defaultdict(dict))
+        for (path, sheet_name, index), values in self._buffer.items():
+            by_workbook[path][sheet_name][index] = values
+
+        try:
+            with EXCEL_FLUSH_DURATION.time():
+                for path, sheets in by_workbook.items():
+                    self._write_workbook(path, sheets)
+
+        except Exception as e:
+            logging.error(f"결과 기록 실패: {str(e)}")
+            raise
+
+        count = len(self._buffer)
+        self.flushed_rows += count
+        self._buffer = {}
+        logging.info(f"{count}개 행의 결과를 {len(by_workbook)}개 파일에 기록했습니다.")
+        return count
+
+    def _write_workbook(self, path: str, sheets: Dict[str, Dict[int, Tuple[Any, ...]]]):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path)
+        try:
+            for sheet_name, rows in sheets.items():
+                worksheet = workbook[sheet_name]
+                columns = self._result_columns(worksheet)
+                for index, values in rows.items():
+                    # DataFrame 인덱스 0 = 엑셀 2행 (1행은 헤더)
+                    for column, value in zip(columns, values):
+                        worksheet.cell(row=index + 2, column=column, value=value)
+            workbook.save(path)
+        finally:
+            workbook.close()
+
+    def _result_columns(self, worksheet) -> List[int]:
+        """결과 열 번호 목록 (헤더에 없는 열은 오른쪽 끝에 추가)"""
+        header = {cell.value: cell.column for cell in worksheet[1] if cell.value is not None}
+        next_column = worksheet.max_column + 1
+
+        columns = []
+        for name in self.COLUMNS:
+            if name not in header:
+                worksheet.cell(row=1, column=next_column, value=name)
+                header[name] = next_column
+                next_column += 1
+            columns.append(header[name])
+        return columns
+
+    def load_processed_rows(self) -> Set[RowKey]:
+        """이전 실행에서 처리 완료된 행 (파싱할 때 시트의 processed 열에서 읽음)"""
+        self.workbook_set.load()
+        return set(self.workbook_set.processed_rows)
@@ -13,10 +13,79 @@ class Config:
     download_folder: str = "./chatgpt_images"
     user_data_dir: Optional[str] = None
     chrome_path: Optional[str] = None
+    # 프롬프트 간 요청 간격 (초)
+    request_interval: float = 3
+    # 이전 실행에서 처리 완료된 행 건너뛰기
+    resume: bool = False
+    # 프롬프트별 처리 시간 통계 수집
+    benchmark: bool = False
+    # 응답 스트리밍 수집 (프롬프트별 텍스트 파일로 점진 기록)
+    stream_responses: bool = False
+    response_folder: str = "./chatgpt_responses"
+    stream_poll_interval: float = 0.5
+    # 결과 기록 방식 ('excel', 'csv', 'parquet') 및 버퍼 플러시 주기
+    result_output: str = "excel"
+    result_output_dir: Optional[str] = None
+    result_flush_every: int = 50
+    # 프롬프트 템플릿 ({{ 열이름 }}, {% if 열이름 %}...{% endif %}) - 문자열 또는 파일 경로
+    prompt_template: Optional[str] = None
+    prompt_template_path: Optional[str] = None
+    # 다중 노드 실행용 공유 작업 큐 (SQLite 파일 경로)
+    job_store_path: Optional[str] = None
+    job_visibility_timeout: float = 300
+    job_max_attempts: int = 3
+    worker_id: Optional[str] = None
+    # 지표 엔드포인트 포트 (None이면 비활성화)
+    metrics_port: Optional[int] = None
+    # 로그 파일 (JSON 구조화 여부) 및 같은 메시지 반복 출력 최소 간격 (초)
+    log_file: str = "chatgpt_automation.log"
+    log_json: bool = True
+    log_repeat_interval: float = 30.0
+    # 메모리 제한 모드: 프롬프트를 스트리밍으로 읽고, 행별 결과는 저널 파일에 기록하며
+    # 메모리에는 최근 오류 max_retained_errors건만 유지
+    memory_bounded: bool = False
+    max_retained_errors: int = 100
+    journal_path: Optional[str] = None
+    # memory_check_every개 행마다 탭 JS 힙을 확인해 한도(MB)를 넘으면 탭을 새로 엶
+    memory_check_every: int = 20
+    # 메모리 제한 모드에서 처리 시간 통계(--benchmark)에 보관하는 표본 수 (p50/p95는 표본 기준 근사치)
+    latency_sample_size: int = 1000
+    chrome_memory_limit_mb: float = 1500
+    # 다운로드 이미지 중복 검사 (지각 해시 'phash'/'ahash', 해밍 거리 허용치)
+    # duplicate_action: 'skip'이면 중복 이미지를 삭제, 'flag'면 저장한 채 로그/결과에만 표시
+    dedup_images: bool = False
+    dedup_hash: str = "phash"
+    dedup_max_distance: int = 4
+    duplicate_action: str = "skip"
+    # 실행 계획만 세우고 브라우저는 열지 않음 (처리 시간 이력으로 소요 시간 추정)
+    dry_run: bool = False
+    # 프롬프트 타입별 처리 시간 이력 파일 (None이면 결과 출력 디렉토리 또는 현재 디렉토리)
+    latency_history_path: Optional[str] = None
+    # 계정 풀 설정 파일 (JSON, 계정별 Chrome 프로필/디버그 포트/사용 한도) - None이면 단일 계정
+    accounts_path: Optional[str] = None
+    # 작업 노드가 여러 개일 때 이 노드가 맡는 계정 몫 (계정을 account_shard_count개로 나눈 것 중 몇 번째인지)
+    account_shard_index: int = 0
+    account_shard_count: int = 1
+    # 감시 모드: 실행 중 시트에 추가되는 행을 확인 주기(초)마다 읽어 처리 대기열에 추가
+    # watch_idle_timeout초 동안 새 행이 없으면 종료 (None이면 중단할 때까지 계속)
+    watch: bool = False
+    watch_poll_interval: float = 10
+    watch_idle_timeout: Optional[float] = None
+    # 이미지 저장 방식 ('files': 폴더에 개별 파일, 'archive': 크기 제한 tar 샤드 + 행별 오프셋 색인)
+    image_output: str = "files"
+    archive_shard_size_mb: float = 1024
+    # 짧은 텍스트 프롬프트를 pack_size개씩 한 메시지로 묶어 전송 (pack_max_chars자 이하만)
+    pack_text_prompts: bool = False
+    pack_size: int = 5
+    pack_max_chars: int = 500
+    # 디렉토리/glob으로 여러 Excel 파일을 처리할 때 파일 파싱에 쓰는 프로세스 수 (None이면 CPU 수)
+    parse_workers: Optional[int] = None
 
     def __post_init__(self):
         # 다운로드 폴더 생성
         os.makedirs(self.download_folder, exist_ok=True)
+        if self.stream_responses:
+            os.makedirs(self.response_folder, exist_ok=True)
 
         # 기본 사용자 데이터 디렉토리 설정
         if not self.user_data_dir:
@@ -1,9 +1,221 @@
 # main.py
+import os
+import sys
+import glob
+import json
+import time
 import logging
+import argparse
+import multiprocessing
+from dataclasses import replace
 from pathlib import Path
 
 from config import Config
 from conf.chatgpt_automation import ChatGPTAutomation
+from conf.job_store import JobStore
+from conf.progress import ProgressReporter
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """명령행 인자 파싱"""
+    parser = argparse.ArgumentParser(description="ChatGPT 자동화 도구")
+    parser.add_argument("source", nargs="?",
+                        help="프롬프트 Excel 파일 경로, 또는 여러 파일의 디렉토리/glob 패턴 (생략 시 대화형 입력)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="동시에 실행할 브라우저 작업 노드 수 (2 이상이면 공유 작업 큐 사용)")
+    parser.add_argument("--rate", type=float, default=None, help="작업 노드당 분당 최대 프롬프트 수")
+    parser.add_argument("--resume", action="store_true", help="이전 실행에서 처리된 행 건너뛰기")
+    parser.add_argument("--output-dir", default=None, help="이미지/응답/결과 파일 출력 디렉토리")
+    parser.add_argument("--benchmark", action="store_true", help="프롬프트별 처리 시간 통계 수집")
+    parser.add_argument("--debug-port", type=int, default=9222, help="Chrome 디버그 포트 (작업 노드마다 1씩 증가)")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="지표 엔드포인트 포트 (작업 노드는 포트+1부터 순서대로 사용)")
+    parser.add_argument("--memory-bounded", action="store_true",
+                        help="대량 실행용 메모리 제한 모드 (프롬프트 스트리밍, 결과 저널 기록, 탭 메모리 관리)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="브라우저를 열지 않고 프롬프트 수와 예상 소요 시간만 출력")
+    parser.add_argument("--watch", action="store_true", help="실행 중 시트에 추가되는 행도 이어서 처리")
+    parser.add_argument("--watch-timeout", type=float, default=None,
+                        help="감시 모드에서 새 행이 없으면 종료할 때까지의 시간 (초, 생략 시 계속 감시)")
+    parser.add_argument("--archive", action="store_true",
+                        help="이미지를 개별 파일 대신 크기 제한 tar 샤드와 행별 색인으로 저장")
+    parser.add_argument("--pack", type=int, default=None, metavar="K",
+                        help="짧은 텍스트 프롬프트를 K개씩 한 메시지로 묶어 전송")
+    parser.add_argument("--parse-workers", type=int, default=None,
+                        help="여러 파일 작업에서 Excel 파싱에 쓸 프로세스 수 (생략 시 CPU 수)")
+    parser.add_argument("--accounts", default=None,
+                        help="계정 풀 설정 JSON (계정마다 Chrome 프로필과 디버그 포트, 사용 한도 지정)")
+    parser.add_argument("--check-startup", action="store_true",
+                        help="main 임포트 시간과 무거운 의존성 로드 여부를 측정해 한도 초과 시 종료 코드 1")
+    parser.add_argument("--progress-interval", type=float, default=5.0, help="진행 상황 출력 간격 (초)")
+    return parser.parse_args(argv)
+
+
+def build_config(args: argparse.Namespace) -> Config:
+    """명령행 인자로 설정 생성"""
+    config = Config(
+        debug_port=args.debug_port,
+        download_folder="./downloaded_images",
+        default_wait_time=30,
+        max_wait_time=120,
+        resume=args.resume,
+        benchmark=args.benchmark,
+        metrics_port=args.metrics_port,
+        memory_bounded=args.memory_bounded,
+        dry_run=args.dry_run,
+        accounts_path=args.accounts,
+        watch=args.watch,
+        watch_idle_timeout=args.watch_timeout,
+        image_output="archive" if args.archive else "files",
+        pack_text_prompts=bool(args.pack and args.pack > 1),
+        pack_size=args.pack or 5,
+        parse_workers=args.parse_workers
+    )
+
+    if args.output_dir:
+        config.download_folder = os.path.join(args.output_dir, "images")
+        config.response_folder = os.path.join(args.output_dir, "responses")
+        config.result_output_dir = args.output_dir
+        os.makedirs(config.download_folder, exist_ok=True)
+
+    if args.rate:
+        config.request_interval = 60.0 / args.rate
+
+    return config
+
+
+def _run_worker_process(config: Config, db_path: str) -> None:
+    """작업 노드 프로세스 진입점"""
+    automation = ChatGPTAutomation(None, config)
+    store = JobStore(db_path, config.job_visibility_timeout, config.job_max_attempts)
+    try:
+        automation.run_worker(store)
+    finally:
+        store.close()
+        automation.cleanup()
+
+
+def run_parallel(excel_path: str, config: Config, workers: int, progress: ProgressReporter) -> dict:
+    """공유 작업 큐를 만들고 작업 노드 프로세스 여러 개로 처리한 뒤 결과 병합
+
+    작업 노드마다 디버그 포트와 Chrome 프로필 디렉토리가 따로 필요하다.
+    """
+    base_dir = config.result_output_dir or os.path.dirname(os.path.abspath(excel_path))
+    config.job_store_path = config.job_store_path or os.path.join(base_dir, "jobs.db")
+
+    coordinator = ChatGPTAutomation(excel_path, config)
+    store = coordinator.open_job_store()
+    results = {'total_prompts': 0, 'processed_prompts': 0, 'downloaded_images': 0, 'errors': []}
+
+    try:
+        coordinator.enqueue_jobs(store)
+        counts = store.counts()
+        results['total_prompts'] = sum(counts.values())
+
+        processes = []
+        for i in range(workers):
+            worker_config = replace(
+                config,
+                debug_port=config.debug_port + i,
+                user_data_dir=f"{config.user_data_dir}_{i}",
+                worker_id=f"local-{i}",
+                # 계정 풀을 쓰면 노드마다 겹치지 않는 계정 몫만 사용
+                account_shard_index=i,
+                account_shard_count=workers,
+                metrics_port=config.metrics_port + i + 1 if config.metrics_port else None
+            )
+            process = multiprocessing.Process(
+                target=_run_worker_process, args=(worker_config, config.job_store_path), name=f"worker-{i}"
+            )
+            process.start()
+            processes.append(process)
+
+        progress.start(results['total_prompts'])
+        while any(process.is_alive() for process in processes):
+            counts = store.counts()
+            progress.update(counts['done'] + counts['failed'], counts['failed'], counts['leased'])
+            time.sleep(1)
+
+        counts = store.counts()
+        progress.update(counts['done'] + counts['failed'], counts['failed'], counts['leased'])
+        progress.stop()
+
+        coordinator.merge_job_results(store)
+        results['image_manifest'] = coordinator.image_manifest_path()
+        for job in store.iter_results(os.path.abspath(excel_path)):
+            if job['status'] == 'done':
+                results['processed_prompts'] += 1
+                results['downloaded_images'] += job['result'].get('download_count', 0)
+            else:
+                results['errors'].append(f"행 {job['row_index']}: {job['result'].get('error', '알 수 없는 오류')}")
+
+        return results
+
+    finally:
+        store.close()
+        coordinator.cleanup()
+
+
+def run_headless(args: argparse.Namespace) -> int:
+    """비대화형 실행: 진행 상황은 stderr, 결과 JSON은 stdout으로 출력"""
+    from conf.workbook_batch import is_workbook_batch
+
+    batch = is_workbook_batch(args.source)
+    if not (glob.glob(args.source) if batch else Path(args.source).exists()):
+        print(json.dumps({'error': f"Excel 파일을 찾을 수 없습니다: {args.source}"}, ensure_ascii=False))
+        return 1
+
+    if batch and args.workers > 1 and not args.dry_run:
+        print(json.dumps({'error': "여러 파일 작업은 --workers 1로만 실행할 수 있습니다."}, ensure_ascii=False))
+        return 1
+
+    # 작업 노드는 공유 작업 큐의 행을 하나씩 처리하므로 이 옵션들을 적용하지 않음
+    if args.workers > 1 and not args.dry_run:
+        unsupported = [flag for flag, enabled in (('--watch', args.watch), ('--pack', args.pack and args.pack > 1),
+                                                  ('--memory-bounded', args.memory_bounded)) if enabled]
+        if unsupported:
+            print(json.dumps({'error': f"{', '.join(unsupported)}은(는) --workers 1로만 실행할 수 있습니다."},
+                             ensure_ascii=False))
+            return 1
+
+    if batch and args.watch:
+        print(json.dumps({'error': "여러 파일 작업은 감시 모드(--watch)를 지원하지 않습니다."}, ensure_ascii=False))
+        return 1
+
+    if args.accounts and args.workers > 1 and not args.dry_run:
+        from conf.account_pool import load_accounts
+
+        account_count = len(load_accounts(args.accounts))
+        if args.workers > account_count:
+            print(json.dumps({'error': f"--workers({args.workers})가 계정 수({account_count})보다 많습니다."},
+                             ensure_ascii=False))
+            return 1
+
+    config = build_config(args)
+    progress = ProgressReporter(interval=args.progress_interval)
+    automation = None
+
+    try:
+        if args.dry_run:
+            automation = ChatGPTAutomation(args.source, config)
+            results = automation.plan_run(args.workers)
+        elif args.workers > 1:
+            results = run_parallel(args.source, config, args.workers, progress)
+        else:
+            automation = ChatGPTAutomation(args.source, config)
+            results = automation.run_automation(progress)
+
+    except Exception as e:
+        logging.error(f"메인 실행 중 오류: {str(e)}")
+        print(json.dumps({'error': str(e)}, ensure_ascii=False))
+        return 1
+
+    finally:
+        if automation:
+            automation.cleanup()
+
+    print(json.dumps(results, ensure_ascii=False, default=str))
+    return 2 if results['errors'] else 0
 
 
 def main():
@@ -62,5 +274,19 @@ def main():
             pass
 
 
+def check_startup() -> int:
+    """시작 경로 임포트 시간 측정 결과를 JSON으로 출력"""
+    from conf.startup import measure_import_time
+
+    report = measure_import_time('main')
+    print(json.dumps(report, ensure_ascii=False))
+    return 0 if report['within_budget'] else 1
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    cli_args = parse_args()
+    if cli_args.check_startup:
+        sys.exit(check_startup())
+    if cli_args.source:
+        sys.exit(run_headless(cli_args))
+    main()
@@ -0,0 +1,73 @@
+# test_image_archive.py
+import os
+import tarfile
+
+from conf.image_archive import ImageArchive
+
+
+def _read_bytes(archive, row_index, source='', sheet=''):
+    """메모리 뷰를 바로 bytes로 복사 (close 전에 매핑을 놓아주도록)"""
+    return [(name, bytes(view)) for name, view in archive.read(row_index, source, sheet)]
+
+
+def test_offsets_stay_correct_across_shard_rollover(tmp_path):
+    # 샤드 한도 약 10KB, 이미지 4KB → 두 개마다 새 샤드
+    archive = ImageArchive(str(tmp_path), shard_size_mb=0.01)
+    images = {row: bytes([row]) * 4000 + f"row-{row}".encode() for row in range(1, 6)}
+
+    refs = {row: archive.add_bytes(row, f"image_{row}.png", data) for row, data in images.items()}
+    shards = {ref.split('/')[0] for ref in refs.values()}
+    assert len(shards) >= 2
+
+    for row, data in images.items():
+        assert _read_bytes(archive, row) == [(f"image_{row}.png", data)]
+
+    archive.close()
+
+    # 샤드는 그대로 tar로도 풀 수 있어야 함
+    for shard in shards:
+        with tarfile.open(os.path.join(str(tmp_path), shard)) as tar:
+            for member in tar.getmembers():
+                row = int(member.name.split('_')[1].split('.')[0])
+                assert tar.extractfile(member).read() == images[row]
+
+
+def test_reopened_archive_appends_and_reads_old_rows(tmp_path):
+    archive = ImageArchive(str(tmp_path), shard_size_mb=1)
+    archive.add_bytes(1, "a.png", b"first")
+    archive.close()
+
+    archive = ImageArchive(str(tmp_path), shard_size_mb=1)
+    archive.add_bytes(2, "b.png", b"second")
+    assert _read_bytes(archive, 1) == [("a.png", b"first")]
+    assert _read_bytes(archive, 2) == [("b.png", b"second")]
+    archive.close()
+
+    assert len([name for name in os.listdir(str(tmp_path)) if name.endswith('.tar')]) == 1
+
+
+def test_rows_are_keyed_by_source_and_sheet(tmp_path):
+    archive = ImageArchive(str(tmp_path), shard_size_mb=1)
+    archive.add_bytes(3, "x.png", b"book-a", source="a.xlsx", sheet="Sheet1")
+    archive.add_bytes(3, "x.png", b"book-b", source="b.xlsx", sheet="Sheet1")
+    archive.add_bytes(3, "y.png", b"book-a-2", source="a.xlsx", sheet="Sheet1")
+
+    assert _read_bytes(archive, 3, "a.xlsx", "Sheet1") == [("x.png", b"book-a"), ("y.png", b"book-a-2")]
+    assert _read_bytes(archive, 3, "b.xlsx", "Sheet1") == [("x.png", b"book-b")]
+    assert archive.lookup(3, "a.xlsx", "Sheet2") == []
+    archive.close()
+
+
+def test_add_files_moves_files_into_shard(tmp_path):
+    source_dir = tmp_path / "downloads"
+    source_dir.mkdir()
+    path = source_dir / "img.png"
+    path.write_bytes(b"png-bytes")
+
+    archive = ImageArchive(str(tmp_path / "archive"), shard_size_mb=1)
+    refs = archive.add_files(7, [str(path)])
+
+    assert refs[0].endswith("/img.png")
+    assert not path.exists()
+    assert _read_bytes(archive, 7) == [("img.png", b"png-bytes")]
+    archive.close()
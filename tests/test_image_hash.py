@@ -0,0 +1,38 @@
+# test_image_hash.py
+import random
+
+from conf.image_hash import BKTree, hamming_distance
+
+
+def test_search_matches_linear_scan():
+    rng = random.Random(7)
+    hashes = [rng.getrandbits(64) for _ in range(500)]
+    tree = BKTree()
+    for i, hash_value in enumerate(hashes):
+        tree.add(hash_value, i)
+
+    assert len(tree) == len(hashes)
+    for query in hashes[:20] + [rng.getrandbits(64) for _ in range(20)]:
+        for max_distance in (0, 4, 30):
+            expected = sorted((hamming_distance(query, h), i) for i, h in enumerate(hashes)
+                              if hamming_distance(query, h) <= max_distance)
+            assert sorted(tree.search(query, max_distance)) == expected
+
+
+def test_search_returns_closest_first_and_keeps_equal_hashes():
+    tree = BKTree()
+    tree.add(0b0000, "a.png")
+    tree.add(0b0000, "a_copy.png")
+    tree.add(0b0011, "b.png")
+    tree.add(0b1111, "c.png")
+
+    matches = tree.search(0b0001, 1)
+    assert [distance for distance, _ in matches] == [1, 1, 1]
+    assert {value for _, value in matches} == {"a.png", "a_copy.png", "b.png"}
+
+    assert tree.search(0b0000, 0) == [(0, "a.png"), (0, "a_copy.png")]
+    assert tree.search(0b1111, 4)[0] == (0, "c.png")
+
+
+def test_empty_tree():
+    assert BKTree().search(123, 64) == []
@@ -0,0 +1,105 @@
+# test_job_store.py
+import time
+
+import pytest
+
+from conf.job_store import JobStore
+
+
+SOURCE = "/data/prompts.xlsx"
+
+
+def _prompts(*rows):
+    return [{'row_index': row, 'full_prompt': f"프롬프트 {row}"} for row in rows]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"), visibility_timeout=60, max_attempts=2)
+    yield store
+    store.close()
+
+
+def test_enqueue_ignores_rows_already_queued(store):
+    assert store.enqueue(_prompts(1, 2), SOURCE) == 2
+    assert store.enqueue(_prompts(2, 3), SOURCE) == 1
+    assert store.counts() == {'pending': 3, 'leased': 0, 'done': 0, 'failed': 0}
+
+
+def test_lease_complete_and_results(store):
+    store.enqueue(_prompts(1, 2, 3), SOURCE)
+
+    jobs = store.lease("w1", batch_size=2)
+    assert [job['row_index'] for job in jobs] == [1, 2]
+    assert all(job['source'] == SOURCE for job in jobs)
+    # 임대 중인 작업은 다른 노드에 다시 나가지 않음
+    assert [job['row_index'] for job in store.lease("w2", batch_size=5)] == [3]
+
+    assert store.complete(jobs[0]['job_id'], "w1", {'success': True, 'download_count': 1})
+    # 다른 노드 이름으로는 완료 보고가 받아들여지지 않음
+    assert not store.complete(jobs[1]['job_id'], "w2", {'success': True})
+
+    assert store.counts() == {'pending': 0, 'leased': 2, 'done': 1, 'failed': 0}
+    assert not store.is_drained()
+    assert list(store.iter_results(SOURCE)) == [
+        {'row_index': 1, 'status': 'done', 'result': {'success': True, 'download_count': 1}}
+    ]
+
+
+def test_fail_requeues_until_max_attempts(store):
+    store.enqueue(_prompts(1), SOURCE)
+
+    job = store.lease("w1")[0]
+    assert store.fail(job['job_id'], "w1", "응답 대기 시간 초과")
+    assert store.counts()['pending'] == 1
+
+    job = store.lease("w1")[0]
+    assert store.fail(job['job_id'], "w1", "응답 대기 시간 초과")
+    assert store.counts()['failed'] == 1
+    assert store.lease("w1") == []
+    assert store.is_drained()
+    assert list(store.iter_results())[0]['result'] == {'error': "응답 대기 시간 초과"}
+
+
+def test_expired_lease_is_reassigned_and_counted(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"), visibility_timeout=0.01, max_attempts=2)
+    store.enqueue(_prompts(1), SOURCE)
+
+    first = store.lease("w1")[0]
+    time.sleep(0.05)
+    second = store.lease("w2")[0]
+    assert second['job_id'] == first['job_id']
+    # 만료된 노드의 늦은 완료 보고는 무시됨
+    assert not store.complete(first['job_id'], "w1", {'success': True})
+
+    # 두 번째 만료로 시도 한도에 도달하면 실패 처리
+    time.sleep(0.05)
+    assert store.requeue_expired() == 1
+    assert store.counts()['failed'] == 1
+    assert "임대 만료" in list(store.iter_results())[0]['result']['error']
+    store.close()
+
+
+def test_heartbeat_extends_lease(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"), visibility_timeout=0.2, max_attempts=2)
+    store.enqueue(_prompts(1), SOURCE)
+
+    job = store.lease("w1")[0]
+    time.sleep(0.12)
+    assert store.heartbeat("w1") == 1
+    time.sleep(0.12)
+    assert store.requeue_expired() == 0
+    assert store.complete(job['job_id'], "w1", {'success': True})
+    store.close()
+
+
+def test_clear_finished_keeps_active_jobs(store):
+    store.enqueue(_prompts(1, 2, 3), SOURCE)
+    store.enqueue(_prompts(1), "/data/other.xlsx")
+    done, leased = store.lease("w1", batch_size=2)
+    store.complete(done['job_id'], "w1", {'success': True})
+
+    assert store.clear_finished(SOURCE) == 1
+    assert store.counts() == {'pending': 2, 'leased': 1, 'done': 0, 'failed': 0}
+    # 지운 행은 다시 등록할 수 있음
+    assert store.enqueue(_prompts(1), SOURCE) == 1
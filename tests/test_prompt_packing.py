@@ -0,0 +1,53 @@
+# test_prompt_packing.py
+from conf.prompt_packing import is_packable, pack_prompts, split_packed_response, make_pack
+
+
+def test_pack_and_split_round_trip():
+    prompts = ["첫 번째 질문", "두 번째 질문", "세 번째 질문"]
+    message = pack_prompts(prompts)
+
+    assert message.index("=== 1 ===") < message.index("=== 2 ===") < message.index("=== 3 ===")
+
+    response = "=== 1 ===\n답 1\n\n=== 2 ===\n답 2\n=== 3 ===\n답 3\n"
+    assert split_packed_response(response, 3) == {1: "답 1", 2: "답 2", 3: "답 3"}
+
+
+def test_split_tolerates_marker_spacing():
+    response = "  ===1===  \n하나\n=== 2===\n둘"
+    assert split_packed_response(response, 2) == {1: "하나", 2: "둘"}
+
+
+def test_split_drops_duplicate_out_of_range_and_empty_sections():
+    response = (
+        "=== 1 ===\n답 1\n"
+        "=== 2 ===\n답 2a\n"
+        "=== 2 ===\n답 2b\n"
+        "=== 3 ===\n   \n"
+        "=== 9 ===\n범위 밖\n"
+    )
+    assert split_packed_response(response, 3) == {1: "답 1"}
+
+
+def test_split_without_markers_returns_nothing():
+    assert split_packed_response("구분 없이 한 번에 답함", 2) == {}
+    assert split_packed_response("", 2) == {}
+    assert split_packed_response(None, 2) == {}
+
+
+def test_text_before_first_marker_is_ignored():
+    response = "Sure! Here are the answers.\n=== 1 ===\n답 1"
+    assert split_packed_response(response, 1) == {1: "답 1"}
+
+
+def test_is_packable_checks_length():
+    assert is_packable("짧은 질문", max_chars=100)
+    assert not is_packable("긴 질문" * 100, max_chars=100)
+
+
+def test_make_pack_uses_first_row():
+    prompts = [{'row_index': 4, 'full_prompt': "가"}, {'row_index': 7, 'full_prompt': "나"}]
+    pack = make_pack(prompts)
+
+    assert pack['row_index'] == 4
+    assert pack['packed'] is prompts
+    assert pack['full_prompt'] == pack_prompts(["가", "나"])
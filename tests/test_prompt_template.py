@@ -0,0 +1,49 @@
+# test_prompt_template.py
+import pandas as pd
+import pytest
+
+from conf.prompt_template import PromptTemplate
+
+
+def test_render_fields_and_conditional_section():
+    template = PromptTemplate("{{ subject }} 그림{% if style %}, {{ style }} 스타일{% endif %}")
+
+    assert template.render({'subject': "고양이", 'style': "수채화"}) == "고양이 그림, 수채화 스타일"
+    assert template.render({'subject': "고양이", 'style': float('nan')}) == "고양이 그림"
+    assert template.render({'subject': "강아지"}) == "강아지 그림"
+
+
+def test_repeated_rows_hit_the_cache():
+    template = PromptTemplate("{{ a }}-{{ b }}")
+    for _ in range(3):
+        assert template.render({'a': 1, 'b': 2}) == "1-2"
+    template.render({'a': 1, 'b': 3})
+
+    assert template.cache_misses == 2
+    assert template.cache_hits == 2
+
+
+def test_cache_is_cleared_at_max_size():
+    template = PromptTemplate("{{ a }}", max_cache_size=2)
+    for value in ("x", "y", "z"):
+        template.render({'a': value})
+
+    assert len(template._cache) == 1
+    assert template.render({'a': "z"}) == "z"
+    assert template.cache_hits == 1
+
+
+def test_render_bulk_matches_columns_case_insensitively():
+    template = PromptTemplate("{{ subject }} / {{ missing }}")
+    df = pd.DataFrame({'Subject': ["산", "바다", "산"]}, index=[5, 6, 7])
+
+    rendered = template.render_bulk(df)
+    assert list(rendered.index) == [5, 6, 7]
+    assert list(rendered) == ["산 /", "바다 /", "산 /"]
+    assert template.cache_misses == 2
+    assert template.cache_hits == 1
+
+
+def test_unclosed_tag_is_rejected():
+    with pytest.raises(ValueError):
+        PromptTemplate("{{ subject }} {% if style %}스타일")
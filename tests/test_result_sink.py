@@ -0,0 +1,34 @@
+# test_result_sink.py
+import pandas as pd
+import pytest
+
+from conf.excel_handler import ExcelHandler
+from conf.result_sink import ResultSink, processed_flags
+
+
+def _make_workbook(path, rows: int = 6):
+    """G열에 프롬프트가 있는 시트 (1행 헤더, 2행은 건너뛰는 행)"""
+    columns = ['a', 'b', 'c', 'd', 'e', 'f', 'prompt']
+    data = [['', '', '', '', '', '', 'skip']]
+    data += [['', '', '', '', '', '', f"prompt {i}"] for i in range(rows)]
+    pd.DataFrame(data, columns=columns).to_excel(path, index=False)
+
+
+@pytest.mark.parametrize('output_format', ['excel', 'csv'])
+def test_processed_rows_round_trip(tmp_path, output_format):
+    excel_path = tmp_path / 'prompts.xlsx'
+    _make_workbook(excel_path)
+
+    sink = ResultSink(ExcelHandler(str(excel_path)), output_format=output_format,
+                      output_dir=str(tmp_path), flush_every=0)
+    sink.record(1, download_count=2, download_time='2024-01-01 00:00:00', status='success')
+    sink.record(2, status='failed', processed=False)
+    sink.record(4, status='success')
+    sink.flush()
+
+    assert sink.load_processed_rows() == {1, 4}
+
+
+def test_processed_flags_accepts_excel_values():
+    values = pd.Series([float('nan'), 1.0, 0.0, True, False, 'TRUE', '1', 'false', None], dtype=object)
+    assert processed_flags(values).tolist() == [False, True, False, True, False, True, True, False, False]
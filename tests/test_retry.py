@@ -0,0 +1,103 @@
+# test_retry.py
+import time
+
+import pytest
+
+from conf.retry import RetryQueue, RetryPolicy, FailureClass, classify_failure, call_with_retry
+
+
+def _policies(**overrides):
+    """테스트용 짧은 대기 정책 (UNKNOWN은 항상 필요)"""
+    policies = {failure: RetryPolicy(max_retries=2, base_delay=0.05, max_delay=0.05) for failure in FailureClass}
+    policies.update(overrides)
+    return policies
+
+
+def test_items_come_out_in_order_with_attempt_zero():
+    queue = RetryQueue(['a', 'b', 'c'], _policies())
+    assert list(queue) == [('a', 0), ('b', 0), ('c', 0)]
+
+
+def test_retried_item_goes_behind_ready_items():
+    queue = RetryQueue(['a', 'b', 'c'], _policies())
+    seen = []
+    for item, attempt in queue:
+        seen.append((item, attempt))
+        if item == 'a' and attempt == 0:
+            assert queue.retry(item, FailureClass.RESPONSE_TIMEOUT, attempt)
+
+    assert seen == [('a', 0), ('b', 0), ('c', 0), ('a', 1)]
+
+
+def test_retry_is_exhausted_per_failure_class():
+    queue = RetryQueue([], _policies())
+    item = {'row_index': 1}
+
+    assert queue.retry(item, FailureClass.RESPONSE_TIMEOUT, 0)
+    assert queue.retry(item, FailureClass.RESPONSE_TIMEOUT, 1)
+    # 다른 실패 유형은 따로 센다
+    assert queue.retry(item, FailureClass.INPUT_NOT_FOUND, 2)
+    assert not queue.retry(item, FailureClass.RESPONSE_TIMEOUT, 3)
+
+
+def test_generator_source_is_read_lazily_and_none_is_skipped():
+    pulled = []
+
+    def source():
+        for item in ['a', None, 'b']:
+            pulled.append(item)
+            yield item
+
+    queue = RetryQueue(source(), _policies())
+    iterator = iter(queue)
+    assert next(iterator) == ('a', 0)
+    assert pulled == ['a']
+    assert list(iterator) == [('b', 0)]
+
+
+def test_pause_all_holds_back_other_items():
+    policies = _policies(**{FailureClass.RATE_LIMITED: RetryPolicy(max_retries=1, base_delay=0.2, max_delay=0.2,
+                                                                  pause_all=True)})
+    queue = RetryQueue(['a', 'b'], policies)
+    iterator = iter(queue)
+
+    item, attempt = next(iterator)
+    started = time.time()
+    queue.retry(item, FailureClass.RATE_LIMITED, attempt)
+
+    assert next(iterator) == ('b', 0)
+    assert time.time() - started >= 0.09
+
+
+@pytest.mark.parametrize('attempt', [1, 2, 3, 10])
+def test_delay_stays_between_half_ceiling_and_ceiling(attempt):
+    policy = RetryPolicy(base_delay=4, max_delay=20)
+    ceiling = min(20, 4 * 2 ** (attempt - 1))
+    for _ in range(50):
+        assert ceiling / 2 <= policy.get_delay(attempt) <= ceiling
+
+
+@pytest.mark.parametrize('error, expected', [
+    ("Message: invalid session id", FailureClass.SESSION_DEAD),
+    ("사용 한도에 도달했습니다.", FailureClass.RATE_LIMITED),
+    ("입력창을 찾을 수 없습니다.", FailureClass.INPUT_NOT_FOUND),
+    ("응답 대기 시간 초과", FailureClass.RESPONSE_TIMEOUT),
+    ("이미지 다운로드 실패", FailureClass.DOWNLOAD_FAILED),
+    ("something else", FailureClass.UNKNOWN),
+    (None, FailureClass.UNKNOWN),
+])
+def test_classify_failure(error, expected):
+    assert classify_failure(error) == expected
+
+
+def test_call_with_retry_stops_at_first_truthy_result():
+    results = iter([0, 0, 3, 5])
+    calls = []
+
+    def attempt():
+        value = next(results)
+        calls.append(value)
+        return value
+
+    assert call_with_retry(attempt, RetryPolicy(max_retries=5, base_delay=0, max_delay=0)) == 3
+    assert calls == [0, 0, 3]